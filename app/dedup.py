@@ -0,0 +1,205 @@
+import os
+import re
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+
+DEDUP_DB_FILE = os.getenv("DEDUP_DB_FILE", "near_duplicates.db")
+
+# 64 permutations in 8 bands of 8 rows: pairs above ~0.77 Jaccard similarity
+# become LSH candidates, and candidates are confirmed against DUPLICATE_THRESHOLD
+NUM_PERM = 64
+LSH_BANDS = 8
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 5
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.8"))
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(1)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Hashed word n-grams of the normalized text"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {zlib.crc32(' '.join(words).encode())} if words else set()
+    return {zlib.crc32(' '.join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)}
+
+def minhash_signature(text):
+    """MinHash signature of a text as a list of NUM_PERM ints (None for empty text)"""
+    hashed = shingles(text)
+    if not hashed:
+        return None
+    return [min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashed) for a, b in _PERMUTATIONS]
+
+def estimate_similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the two texts behind the signatures"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+def _band_keys(signature):
+    return [(band, tuple(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])) for band in range(LSH_BANDS)]
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index of stored articles, used to catch republished copies.
+
+    Signatures of stored articles and the duplicate -> canonical links are
+    persisted in SQLite. On first use only signatures whose article is still
+    in the article store (as returned by loader()) are loaded, so the index
+    never points at an article the store has lost.
+    """
+
+    def __init__(self, path=DEDUP_DB_FILE, loader=None, threshold=DUPLICATE_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._loader = loader
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS signatures (
+                url TEXT PRIMARY KEY,
+                signature BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS duplicates (
+                url TEXT PRIMARY KEY,
+                canonical_url TEXT NOT NULL,
+                source TEXT,
+                similarity REAL,
+                detected_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_duplicates_canonical ON duplicates(canonical_url);
+        """)
+        self._conn.commit()
+        self._signatures = None
+        self._buckets = {}
+        self.checked = 0
+        self.duplicates_found = 0
+
+    def _ensure_loaded(self):
+        if self._signatures is not None:
+            return
+        stored = None
+        if self._loader:
+            try:
+                stored = set(self._loader())
+            except Exception as e:
+                print(f"Error reading stored URLs for near-duplicate index: {e}")
+        self._signatures = {}
+        self._buckets = {}
+        for url, blob in self._conn.execute("SELECT url, signature FROM signatures"):
+            if stored is None or url in stored:
+                self._index(url, list(array('Q', blob)))
+        print(f"Near-duplicate index loaded with {len(self._signatures)} signatures")
+
+    def _index(self, url, signature):
+        self._signatures[url] = signature
+        for key in _band_keys(signature):
+            self._buckets.setdefault(key, set()).add(url)
+
+    def find_duplicate(self, signature):
+        """Return (canonical_url, similarity) of the closest indexed near-duplicate, or None"""
+        with self._lock:
+            self._ensure_loaded()
+            candidates = set()
+            for key in _band_keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+
+            best = None
+            for url in candidates:
+                similarity = estimate_similarity(signature, self._signatures[url])
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (url, similarity)
+            return best
+
+    def check(self, article):
+        """
+        Check an extracted article against the index.
+
+        Returns (canonical_url, similarity) when it is a near-duplicate of an
+        article already seen, else None after adding it to the in-memory index
+        so later copies in the same run are caught too.
+        """
+        signature = minhash_signature(article.get('text', ''))
+        if signature is None:
+            return None
+        article['minhash'] = signature
+
+        with self._lock:
+            self.checked += 1
+            match = self.find_duplicate(signature)
+            if match:
+                self.duplicates_found += 1
+                return match
+            self._index(article['url'], signature)
+            return None
+
+    def reindex(self, article):
+        """Index a new revision of an already stored article under its own URL"""
+        signature = minhash_signature(article.get('text', ''))
+        if signature is None:
+            return
+        article['minhash'] = signature
+        with self._lock:
+            self._ensure_loaded()
+            self._index(article['url'], signature)
+
+    def link_duplicate(self, url, canonical_url, source=None, similarity=None):
+        """Record that url is a copy of canonical_url"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO duplicates (url, canonical_url, source, similarity, detected_at) "
+                    "VALUES (?, ?, ?, ?, ?)", (url, canonical_url, source, similarity, time.time())
+                )
+
+    def save(self, articles):
+        """Persist the signatures of stored articles"""
+        rows = [(art['url'], array('Q', art['minhash']).tobytes()) for art in articles if art.get('minhash')]
+        if not rows:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO signatures (url, signature) VALUES (?, ?)", rows)
+
+    def get_duplicates(self, canonical_url):
+        """Return the copies linked to a canonical article"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, source, similarity FROM duplicates WHERE canonical_url = ?", (canonical_url,)
+            ).fetchall()
+        return [{"url": url, "source": source, "similarity": similarity} for url, source, similarity in rows]
+
+    def forget(self, urls):
+        """Drop the signatures of evicted articles and the duplicates linked to them"""
+        urls = list(urls)
+        with self._lock:
+            with self._conn:
+                for i in range(0, len(urls), 500):
+                    chunk = urls[i:i + 500]
+                    placeholders = ','.join('?' * len(chunk))
+                    self._conn.execute(f"DELETE FROM signatures WHERE url IN ({placeholders})", chunk)
+                    self._conn.execute(f"DELETE FROM duplicates WHERE canonical_url IN ({placeholders})", chunk)
+            # Rebuilt from the remaining signatures on next use
+            self._signatures = None
+
+    def linked_urls(self, canonical_urls=None):
+        """URLs of recorded duplicates, optionally only those whose canonical article is in canonical_urls"""
+        with self._lock:
+            rows = self._conn.execute("SELECT url, canonical_url FROM duplicates").fetchall()
+        return [url for url, canonical in rows if canonical_urls is None or canonical in canonical_urls]
+
+    def get_stats(self):
+        """Get duplicate detection statistics for monitoring"""
+        with self._lock:
+            linked = self._conn.execute("SELECT COUNT(*) FROM duplicates").fetchone()[0]
+            return {
+                "indexed_articles": len(self._signatures) if self._signatures is not None else 0,
+                "checked": self.checked,
+                "duplicates_found": self.duplicates_found,
+                "linked_duplicates": linked
+            }
@@ -0,0 +1,521 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+from utils.http import http_get
+
+# Try to import newspaper3k, fallback if not available
+try:
+    from newspaper import Article
+    NEWSPAPER_AVAILABLE = True
+except ImportError as e:
+    NEWSPAPER_AVAILABLE = False
+    print(f"Warning: newspaper3k not available: {e}")
+    print("Using fallback article extraction")
+
+MIN_ARTICLE_LENGTH = 100
+
+TITLE_SELECTORS = ['h1', 'title', '.headline', '.title']
+CONTENT_SELECTORS = ['article', '.content', '.article-body', '.post-content', 'main', '.entry-content']
+# Content "selector" recorded when a page only yielded text as loose paragraphs
+PARAGRAPHS = 'p'
+
+EXTRACTION_PROFILE_FILE = os.getenv("EXTRACTION_PROFILE_FILE", "extraction_profiles.json")
+# A profile that keeps missing is dropped so the host is re-learned
+MAX_PROFILE_MISSES = 3
+
+# Optional process pool for HTML parsing (0 parses on the fetch threads).
+# Pages are sent to the workers in chunks to keep IPC overhead low.
+EXTRACT_PROCESSES = int(os.getenv("INGEST_EXTRACT_PROCESSES", "0"))
+EXTRACT_CHUNKSIZE = int(os.getenv("INGEST_EXTRACT_CHUNKSIZE", "4"))
+
+# Per-extractor counters, see get_extractor_stats()
+_stats_lock = threading.Lock()
+_extractor_stats = {}
+
+def _record(extractor, seconds, success):
+    with _stats_lock:
+        stats = _extractor_stats.setdefault(extractor, {"attempts": 0, "successes": 0, "total_seconds": 0.0})
+        stats["attempts"] += 1
+        stats["total_seconds"] += seconds
+        if success:
+            stats["successes"] += 1
+
+def fetch_html(url):
+    """Download a page once through the shared keep-alive session, returning the raw bytes"""
+    response = http_get(url)
+    response.raise_for_status()
+    # Raw bytes let each parser detect the encoding from the page itself
+    return response.content
+
+def parse_with_newspaper(url, html):
+    """Parse already downloaded HTML with newspaper3k, returning (title, text)"""
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    return article.title, article.text
+
+def _soup_select(soup, selector):
+    """Text of the first element matching a selector (all paragraphs for PARAGRAPHS)"""
+    if selector == PARAGRAPHS:
+        return ' '.join([p.get_text().strip() for p in soup.find_all('p')])
+    elem = soup.select_one(selector)
+    return elem.get_text().strip() if elem else None
+
+def soup_extract(html, parser='html.parser', profile=None):
+    """
+    Parse already downloaded HTML with BeautifulSoup selectors.
+
+    Selectors from a learned profile are tried before the fixed lists.
+    Returns (title, text, title_selector, content_selector).
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, parser)
+    profile = profile or {}
+
+    # Try to extract title
+    title, title_selector = None, None
+    for selector in _preferred(profile.get("title_selector"), TITLE_SELECTORS):
+        title = _soup_select(soup, selector)
+        if title:
+            title_selector = selector
+            break
+
+    # Try to extract main content
+    text, content_selector = "", None
+    for selector in _preferred(profile.get("content_selector"), CONTENT_SELECTORS):
+        text = _soup_select(soup, selector)
+        if text:
+            content_selector = selector
+            break
+
+    # If no specific content found, get all paragraphs
+    if not text:
+        text = _soup_select(soup, PARAGRAPHS)
+        content_selector = PARAGRAPHS if text else None
+
+    return title, text, title_selector, content_selector
+
+def parse_with_soup(html, parser='html.parser'):
+    """Parse already downloaded HTML with BeautifulSoup selectors, returning (title, text)"""
+    title, text, _, _ = soup_extract(html, parser)
+    return title, text
+
+def _preferred(selector, selectors):
+    if selector and selector != PARAGRAPHS:
+        return [selector] + [s for s in selectors if s != selector]
+    return selectors
+
+def selector_xpath(selector):
+    """Translate the simple tag / .class selectors used here into XPath"""
+    if selector.startswith('.'):
+        return f"//*[contains(concat(' ', normalize-space(@class), ' '), ' {selector[1:]} ')]"
+    return f"//{selector}"
+
+def parse_with_lxml(html, title_selector, content_selector):
+    """
+    Fast path for hosts with a known profile: query the two learned selectors
+    on an lxml tree without building a BeautifulSoup tree. Returns (title, text).
+    """
+    import lxml.html
+
+    tree = lxml.html.fromstring(html)
+
+    def first_text(selector):
+        if not selector:
+            return None
+        if selector == PARAGRAPHS:
+            return ' '.join(p.text_content().strip() for p in tree.iter('p'))
+        matches = tree.xpath(selector_xpath(selector))
+        return matches[0].text_content().strip() if matches else None
+
+    return first_text(title_selector), first_text(content_selector) or ""
+
+def lxml_available():
+    try:
+        import lxml.html  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def soup_parser():
+    """lxml is much faster than the stdlib parser when it is installed"""
+    return 'lxml' if lxml_available() else 'html.parser'
+
+def profile_host(url):
+    """Host key of a profile; www. variants share one"""
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+class ExtractionProfileCache:
+    """
+    Per-domain record of the title and content selectors that produced good
+    text, so later pages from the same host try those selectors first (and,
+    with lxml installed, skip the BeautifulSoup tree entirely).
+    """
+
+    def __init__(self, path=EXTRACTION_PROFILE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._profiles = self._load()
+        # Pool workers learn profiles but leave saving them to the parent process
+        self.autosave = True
+        self.hits = 0
+        self.misses = 0
+        self.fast_path_hits = 0
+        self.fast_path_seconds = 0.0
+        self.full_parses = 0
+        self.full_parse_seconds = 0.0
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error loading extraction profiles: {e}")
+        return {}
+
+    def save(self):
+        """Atomically write the profile file"""
+        with self._lock:
+            data = json.dumps(self._profiles, ensure_ascii=False, indent=2)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with self._save_lock:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            print(f"Error saving extraction profiles: {e}")
+            return False
+
+    def get(self, host):
+        with self._lock:
+            profile = self._profiles.get(host)
+            return dict(profile) if profile else None
+
+    def record_success(self, host, title_selector, content_selector, fast_path_seconds=None):
+        """Remember the selectors that worked; returns True if the profile changed"""
+        with self._lock:
+            profile = self._profiles.get(host)
+            changed = (profile is None or profile["title_selector"] != title_selector
+                       or profile["content_selector"] != content_selector)
+            if changed:
+                profile = self._profiles[host] = {"title_selector": title_selector,
+                                                  "content_selector": content_selector, "successes": 0}
+            profile["successes"] += 1
+            profile["misses"] = 0
+            if fast_path_seconds is not None:
+                self.hits += 1
+                self.fast_path_hits += 1
+                self.fast_path_seconds += fast_path_seconds
+        if changed and self.autosave:
+            self.save()
+        return changed
+
+    def record_hit(self):
+        """A profiled host whose learned selectors matched during a full parse"""
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self, host):
+        """The learned selectors did not find enough text on a page from this host"""
+        with self._lock:
+            self.misses += 1
+            profile = self._profiles.get(host)
+            if profile is None:
+                return
+            profile["misses"] = profile.get("misses", 0) + 1
+            dropped = profile["misses"] >= MAX_PROFILE_MISSES
+            if dropped:
+                del self._profiles[host]
+        if dropped and self.autosave:
+            self.save()
+
+    def record_full_parse(self, seconds):
+        with self._lock:
+            self.full_parses += 1
+            self.full_parse_seconds += seconds
+
+    def get_stats(self):
+        """Get profile hit rate and the parse time saved by the lxml fast path"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            avg_full = self.full_parse_seconds / self.full_parses if self.full_parses else 0.0
+            avg_fast = self.fast_path_seconds / self.fast_path_hits if self.fast_path_hits else 0.0
+            saved = max(0.0, self.fast_path_hits * avg_full - self.fast_path_seconds)
+            return {
+                "profiles": len(self._profiles),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "fast_path_hits": self.fast_path_hits,
+                "avg_fast_parse_ms": round(1000 * avg_fast, 2),
+                "avg_full_parse_ms": round(1000 * avg_full, 2),
+                "saved_parse_seconds": round(saved, 3)
+            }
+
+extraction_profiles = ExtractionProfileCache()
+
+def extract_with_profile(url, html):
+    """
+    Extract (title, text) using the host's learned selector profile.
+
+    Known hosts go through the lxml fast path when it is installed; on a miss
+    (or for unknown hosts) the full BeautifulSoup pass runs with the learned
+    selectors first, and the selectors that worked become the host's profile.
+    """
+    host = profile_host(url)
+    profile = extraction_profiles.get(host)
+
+    if profile and lxml_available():
+        start = time.perf_counter()
+        try:
+            title, text = parse_with_lxml(html, profile["title_selector"], profile["content_selector"])
+        except Exception:
+            title, text = None, ""
+        if len(text.strip()) > MIN_ARTICLE_LENGTH:
+            extraction_profiles.record_success(host, profile["title_selector"], profile["content_selector"],
+                                               fast_path_seconds=time.perf_counter() - start)
+            return title, text
+
+    start = time.perf_counter()
+    title, text, title_selector, content_selector = soup_extract(html, soup_parser(), profile)
+    extraction_profiles.record_full_parse(time.perf_counter() - start)
+
+    if profile:
+        if content_selector and content_selector == profile["content_selector"] and len(text.strip()) > MIN_ARTICLE_LENGTH:
+            extraction_profiles.record_hit()
+        else:
+            extraction_profiles.record_miss(host)
+
+    if content_selector and len(text.strip()) > MIN_ARTICLE_LENGTH:
+        extraction_profiles.record_success(host, title_selector, content_selector)
+    return title, text
+
+def extract_from_html(url, html):
+    """
+    Run the extractors over one downloaded page, best first.
+
+    Returns {'title', 'text', 'extractor'} for the first extractor that finds
+    enough text, or None.
+    """
+    extractors = []
+    if NEWSPAPER_AVAILABLE:
+        extractors.append(("newspaper3k", lambda: parse_with_newspaper(url, html)))
+    extractors.append(("beautifulsoup", lambda: extract_with_profile(url, html)))
+
+    for name, extractor in extractors:
+        start = time.perf_counter()
+        try:
+            title, text = extractor()
+        except Exception as e:
+            _record(name, time.perf_counter() - start, False)
+            print(f"{name} failed for {url}: {e}")
+            continue
+
+        success = bool(text) and len(text.strip()) > MIN_ARTICLE_LENGTH
+        _record(name, time.perf_counter() - start, success)
+        if success:
+            return {"title": title or "No title", "text": text, "extractor": name}
+
+    return None
+
+def extract_article_fallback(url):
+    """Fallback article extraction using requests and BeautifulSoup"""
+    try:
+        title, text = extract_with_profile(url, fetch_html(url))
+        return {
+            'title': title or 'No title',
+            'text': text,
+            'success': len(text) > MIN_ARTICLE_LENGTH
+        }
+    except Exception as e:
+        print(f"Fallback extraction failed for {url}: {e}")
+        return {'title': 'No title', 'text': '', 'success': False}
+
+def extract_article(url, source):
+    """Download one article exactly once and parse it with newspaper3k, then the BeautifulSoup fallback"""
+    try:
+        html = fetch_html(url)
+    except Exception as e:
+        print(f"Download failed for {url}: {e}")
+        return None
+
+    return article_from_result(url, source, extract_from_html(url, html))
+
+def article_from_result(url, source, result):
+    """Build the article dict from an extract_from_html() result (None if it found too little text)"""
+    if not result:
+        print(f"Skipped article with insufficient content: {url}")
+        return None
+
+    print(f"Successfully parsed with {result['extractor']}: {result['title'][:50]}...")
+    return {
+        "title": result['title'],
+        "text": result['text'],
+        "url": url,
+        "source": source
+    }
+
+def _init_extract_worker():
+    extraction_profiles.autosave = False
+
+def _extract_chunk(pages):
+    """
+    Pool worker: run extract_from_html over a chunk of (url, html) pages.
+
+    Returns the results with the extractor counters and host profiles of the
+    chunk, which the parent process merges into its own.
+    """
+    with _stats_lock:
+        _extractor_stats.clear()
+    results = [extract_from_html(url, html) for url, html in pages]
+    with _stats_lock:
+        stats = {name: dict(counts) for name, counts in _extractor_stats.items()}
+    profiles = {host: extraction_profiles.get(host) for host in {profile_host(url) for url, _ in pages}}
+    return results, stats, profiles
+
+def _merge_chunk_stats(stats, profiles):
+    with _stats_lock:
+        for name, counts in stats.items():
+            total = _extractor_stats.setdefault(name, {"attempts": 0, "successes": 0, "total_seconds": 0.0})
+            for key, value in counts.items():
+                total[key] += value
+    for host, profile in profiles.items():
+        if not profile:
+            continue
+        current = extraction_profiles.get(host)
+        if (not current or current["title_selector"] != profile["title_selector"]
+                or current["content_selector"] != profile["content_selector"]):
+            extraction_profiles.record_success(host, profile["title_selector"], profile["content_selector"])
+
+class ExtractionPool:
+    """
+    Parses downloaded pages with extract_from_html in worker processes, so
+    newspaper3k and BeautifulSoup are not serialised by the GIL.
+
+    Pages are sent to the workers in chunks of chunksize to keep pickling and
+    IPC overhead low, and at most processes * chunksize pages are read ahead
+    of the consumer.
+    """
+
+    def __init__(self, processes=EXTRACT_PROCESSES, chunksize=EXTRACT_CHUNKSIZE):
+        self.processes = max(1, processes)
+        self.chunksize = max(1, chunksize)
+        # spawn: workers must not inherit the locks and sockets of the fetch threads
+        self._executor = ProcessPoolExecutor(max_workers=self.processes,
+                                             mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_extract_worker)
+
+    @property
+    def read_ahead(self):
+        """Most pages taken from the input and not yet handed back to the consumer"""
+        return self.processes * self.chunksize
+
+    def imap(self, pages):
+        """
+        Parse (key, url, html) triples, yielding (key, result) as chunks finish.
+
+        result is what extract_from_html returns; pages with html None (failed
+        downloads) are passed straight through. Pages are only taken from the
+        input while the consumer is waiting for a result and fewer than
+        read_ahead are being parsed, so a consumer that stops early leaves
+        the rest of the input (and its downloads) untouched. When no result
+        is ready and no more pages may be taken, a partial chunk is sent.
+        """
+        pages = iter(pages)
+        in_flight = {}
+        ready = deque()
+        chunk = []
+        exhausted = False
+
+        def submit():
+            future = self._executor.submit(_extract_chunk, [(url, html) for _, url, html in chunk])
+            in_flight[future] = [key for key, _, _ in chunk]
+            chunk.clear()
+
+        def collect(futures):
+            for future in futures:
+                keys = in_flight.pop(future)
+                try:
+                    results, stats, profiles = future.result()
+                    _merge_chunk_stats(stats, profiles)
+                except Exception as e:
+                    print(f"Extraction worker failed: {e}")
+                    results = [None] * len(keys)
+                ready.extend(zip(keys, results))
+
+        try:
+            while True:
+                if ready:
+                    yield ready.popleft()
+                    continue
+
+                done = [future for future in in_flight if future.done()]
+                if done:
+                    collect(done)
+                    continue
+
+                parsing = len(chunk) + sum(len(keys) for keys in in_flight.values())
+                if not exhausted and parsing < self.read_ahead:
+                    try:
+                        key, url, html = next(pages)
+                    except StopIteration:
+                        exhausted = True
+                        continue
+                    if html is None:
+                        ready.append((key, None))
+                        continue
+                    chunk.append((key, url, html))
+                    if len(chunk) >= self.chunksize:
+                        submit()
+                    continue
+
+                if chunk:
+                    submit()
+                elif in_flight:
+                    done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                    collect(done)
+                else:
+                    return
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def shutdown(self):
+        self._executor.shutdown(cancel_futures=True)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_extraction_pool(processes=EXTRACT_PROCESSES):
+    """Return the process-wide extraction pool, starting its workers on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractionPool(processes)
+        return _pool
+
+def get_extractor_stats():
+    """Get per-extractor attempt, success and parse time statistics, plus selector profile stats"""
+    with _stats_lock:
+        result = {
+            name: {
+                "attempts": stats["attempts"],
+                "successes": stats["successes"],
+                "avg_parse_ms": round(1000 * stats["total_seconds"] / stats["attempts"], 2) if stats["attempts"] else 0.0
+            }
+            for name, stats in _extractor_stats.items()
+        }
+    result["profiles"] = extraction_profiles.get_stats()
+    return result
@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+import time
+
+FEED_REGISTRY_FILE = os.getenv("FEED_REGISTRY_FILE", "feeds.json")
+
+class FeedRegistry:
+    """
+    Persistent list of RSS feeds to ingest.
+
+    Stored as a JSON file so deployments can grow the feed list to hundreds
+    of entries without code changes; seeded from default_feeds the first
+    time it is created.
+    """
+
+    def __init__(self, path=FEED_REGISTRY_FILE, default_feeds=()):
+        self.path = path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._feeds = self._load()
+        if self._feeds is None:
+            self._feeds = []
+            for url in default_feeds:
+                self._append(url)
+            self.save()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error loading feed registry: {e}")
+                return []
+        return None
+
+    def save(self):
+        """Atomically write the registry file"""
+        with self._lock:
+            data = json.dumps(self._feeds, ensure_ascii=False, indent=2)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with self._save_lock:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            print(f"Error saving feed registry: {e}")
+            return False
+
+    def _append(self, url, name=None):
+        self._feeds.append({"url": url, "name": name, "enabled": True, "added_at": time.time()})
+
+    def add(self, url, name=None):
+        """Register a feed (re-enabling it if it already exists)"""
+        with self._lock:
+            for feed in self._feeds:
+                if feed["url"] == url:
+                    feed["enabled"] = True
+                    break
+            else:
+                self._append(url, name)
+        self.save()
+
+    def disable(self, url):
+        with self._lock:
+            for feed in self._feeds:
+                if feed["url"] == url:
+                    feed["enabled"] = False
+        self.save()
+
+    def enabled_urls(self):
+        with self._lock:
+            return [feed["url"] for feed in self._feeds if feed.get("enabled", True)]
+
+    def all(self):
+        with self._lock:
+            return [dict(feed) for feed in self._feeds]
@@ -0,0 +1,214 @@
+import calendar
+import json
+import os
+import threading
+import time
+
+FEED_STATE_FILE = os.getenv("FEED_STATE_FILE", "feed_state.json")
+MAX_SEEN_ENTRY_IDS = 500  # Per feed; RSS documents rarely carry more than ~100 entries
+
+# Publish rate estimation: entries published in the last RATE_WINDOW seconds,
+# smoothed with an exponentially weighted moving average
+RATE_WINDOW = 24 * 3600
+RATE_SMOOTHING = 0.5
+NOT_MODIFIED_DECAY = 0.8
+
+# An entry updated at least this long after publication is treated as a revision
+REVISION_GRACE = 60
+
+def entry_id(entry):
+    """Stable identifier of a feed entry (guid, falling back to the link)"""
+    return entry.get('id') or entry.get('guid') or entry.get('link')
+
+def _timestamp(parsed):
+    if not parsed:
+        return None
+    try:
+        # feedparser normalises *_parsed times to UTC
+        return calendar.timegm(parsed)
+    except Exception:
+        return None
+
+def entry_timestamp(entry):
+    """Published/updated time of a feed entry as a Unix timestamp, or None"""
+    return _timestamp(entry.get('published_parsed') or entry.get('updated_parsed'))
+
+def entry_updated_at(entry):
+    """Latest of the published and updated times of a feed entry, or None"""
+    timestamps = [ts for ts in (_timestamp(entry.get('published_parsed')), _timestamp(entry.get('updated_parsed')))
+                  if ts]
+    return max(timestamps) if timestamps else None
+
+def entry_is_revised(entry):
+    """Whether the feed marks the entry as updated after it was published"""
+    published = _timestamp(entry.get('published_parsed'))
+    updated = _timestamp(entry.get('updated_parsed'))
+    return bool(published and updated and updated - published >= REVISION_GRACE)
+
+def entry_revision(entry):
+    """Identifier of one revision of a feed entry: its id, plus the update time for revised entries"""
+    if entry_is_revised(entry):
+        return f"{entry_id(entry)}@{int(entry_updated_at(entry))}"
+    return entry_id(entry)
+
+class FeedStateStore:
+    """
+    Persistent per-feed state used to make feed polling conditional.
+
+    For every feed URL we keep the HTTP validators (ETag, Last-Modified),
+    the IDs (revisions) of entries already handed to the extractor, the
+    newest entry timestamp seen and fetch bookkeeping. State is saved to a
+    JSON file.
+    """
+
+    def __init__(self, path=FEED_STATE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._feeds = self._load()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error loading feed state: {e}")
+        return {}
+
+    def save(self):
+        """Atomically write the state file"""
+        with self._lock:
+            data = json.dumps(self._feeds, ensure_ascii=False, indent=2)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with self._save_lock:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            print(f"Error saving feed state: {e}")
+            return False
+
+    def _feed(self, feed_url):
+        return self._feeds.setdefault(feed_url, {
+            "etag": None,
+            "last_modified": None,
+            "seen_entry_ids": [],
+            "latest_entry_at": None,
+            "last_fetched_at": None,
+            "last_changed_at": None,
+            "fetch_count": 0,
+            "not_modified_count": 0,
+            "publish_rate_per_hour": None,
+            "poll_interval": None,
+            "next_poll_at": None
+        })
+
+    def get(self, feed_url):
+        """Return a copy of the state of one feed"""
+        with self._lock:
+            state = dict(self._feed(feed_url))
+            state["seen_entry_ids"] = list(state["seen_entry_ids"])
+            return state
+
+    def conditional_headers(self, feed_url):
+        """HTTP headers that make the next request for this feed conditional"""
+        state = self.get(feed_url)
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+        return headers
+
+    def record_fetch(self, feed_url, not_modified=False, entries=(), new_entries=0):
+        """Record a fetch and update the feed's estimated publish rate (entries per hour)"""
+        with self._lock:
+            state = self._feed(feed_url)
+            now = time.time()
+            previous_fetch = state["last_fetched_at"]
+            state["last_fetched_at"] = now
+            state["fetch_count"] += 1
+            rate = state.get("publish_rate_per_hour")
+
+            if not_modified:
+                state["not_modified_count"] += 1
+                if rate is not None:
+                    state["publish_rate_per_hour"] = rate * NOT_MODIFIED_DECAY
+                return
+
+            state["last_changed_at"] = now
+            recent = [ts for ts in (entry_timestamp(e) for e in entries) if ts and now - ts <= RATE_WINDOW]
+            if recent:
+                observed = len(recent) / (RATE_WINDOW / 3600)
+            elif previous_fetch:
+                observed = new_entries / max((now - previous_fetch) / 3600, 0.1)
+            else:
+                observed = 0.0
+            state["publish_rate_per_hour"] = observed if rate is None else (
+                RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * rate)
+
+    def schedule(self, feed_url, interval, next_poll_at):
+        """Store the polling interval chosen for a feed and when it is next due"""
+        with self._lock:
+            state = self._feed(feed_url)
+            state["poll_interval"] = interval
+            state["next_poll_at"] = next_poll_at
+
+    def new_entries(self, feed_url, entries):
+        """
+        Filter feed entries down to the ones not handed to the extractor before.
+
+        A revised entry (updated after publication) counts as new once per
+        revision, so article updates are picked up.
+        """
+        state = self.get(feed_url)
+        seen = set(state["seen_entry_ids"])
+        watermark = state.get("latest_entry_at")
+
+        fresh = []
+        for entry in entries:
+            if entry_revision(entry) in seen:
+                continue
+            updated_at = entry_updated_at(entry)
+            if watermark and updated_at and updated_at <= watermark:
+                continue
+            fresh.append(entry)
+        return fresh
+
+    def mark_seen(self, feed_url, entry):
+        with self._lock:
+            state = self._feed(feed_url)
+            state["seen_entry_ids"].append(entry_revision(entry))
+            del state["seen_entry_ids"][:-MAX_SEEN_ENTRY_IDS]
+
+    def commit(self, feed_url, etag=None, last_modified=None, entries=()):
+        """
+        Store the validators of a fully processed feed response.
+
+        Only called once every new entry of the response has been turned
+        into an article, so neither a later 304 nor the entry watermark can
+        hide entries whose download failed.
+        """
+        with self._lock:
+            state = self._feed(feed_url)
+            state["etag"] = etag
+            state["last_modified"] = last_modified
+            timestamps = [ts for ts in (entry_updated_at(e) for e in entries) if ts]
+            if timestamps:
+                state["latest_entry_at"] = max([state.get("latest_entry_at") or 0] + timestamps)
+
+    def get_stats(self):
+        """Get polling statistics for monitoring"""
+        with self._lock:
+            feeds = list(self._feeds.values())
+        total_fetches = sum(f["fetch_count"] for f in feeds)
+        not_modified = sum(f["not_modified_count"] for f in feeds)
+        return {
+            "feeds_tracked": len(feeds),
+            "total_fetches": total_fetches,
+            "not_modified_responses": not_modified,
+            "not_modified_rate": round(not_modified / total_fetches, 3) if total_fetches else 0.0
+        }
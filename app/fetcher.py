@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+from app.pipeline import StageStats
+
+# Global and per-host concurrency limits for network fetches
+MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", "16"))
+PER_HOST_LIMIT = int(os.getenv("INGEST_PER_HOST_LIMIT", "4"))
+
+# Requests in flight per host across every fetch run of the process (e.g. concurrent scheduler polls)
+_host_counts = defaultdict(int)
+_host_lock = threading.Lock()
+# How long a run with nothing in flight waits before re-checking hosts that other runs keep busy
+BUSY_HOST_WAIT = 0.05
+
+def get_host(url):
+    """Return the lowercase host of a URL (empty string if it has none)"""
+    try:
+        return urlparse(url).netloc.lower()
+    except Exception:
+        return ""
+
+class FetchStats:
+    """Counters and timing for one concurrent fetch run"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.finished_at = None
+        self.submitted = 0
+        self.completed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.timing = StageStats()
+
+    def finish(self):
+        self.finished_at = time.time()
+
+    @property
+    def elapsed(self):
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return end - self.started_at
+
+    @property
+    def articles_per_second(self):
+        return self.succeeded / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "articles_per_second": round(self.articles_per_second, 2)
+        }
+
+def fetch_concurrently(items, worker, url_of=None, max_workers=MAX_WORKERS,
+                       per_host_limit=PER_HOST_LIMIT, stats=None):
+    """
+    Run worker(item) for every item in a bounded thread pool.
+
+    At most max_workers calls run at once, and at most per_host_limit calls
+    of all fetch runs in the process target the same host. Items are only
+    submitted once their host has a free slot, so waiting on a busy host
+    never occupies a pool thread.
+
+    Yields (item, result) pairs in completion order. A worker that raises
+    yields a result of None and is counted as failed.
+    """
+    url_of = url_of or (lambda item: item)
+    max_workers = max(1, max_workers)
+    per_host_limit = max(1, per_host_limit)
+    pending = deque(items)
+    in_flight = {}
+
+    def submit_ready(executor):
+        # Walk the queue once, submitting everything whose host has capacity
+        for _ in range(len(pending)):
+            if len(in_flight) >= max_workers:
+                break
+            item = pending.popleft()
+            host = get_host(url_of(item))
+            with _host_lock:
+                if _host_counts[host] >= per_host_limit:
+                    pending.append(item)
+                    continue
+                _host_counts[host] += 1
+            in_flight[executor.submit(worker, item)] = (item, host, time.perf_counter())
+            if stats is not None:
+                stats.submitted += 1
+
+    def release_host(host):
+        with _host_lock:
+            _host_counts[host] -= 1
+            if not _host_counts[host]:
+                del _host_counts[host]
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while pending or in_flight:
+            submit_ready(executor)
+            if not in_flight:
+                # Every pending host is busy with other runs
+                time.sleep(BUSY_HOST_WAIT)
+                continue
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                item, host, submitted_at = in_flight.pop(future)
+                release_host(host)
+
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Fetch failed for {url_of(item)}: {e}")
+                    result = None
+
+                if stats is not None:
+                    stats.timing.record(time.perf_counter() - submitted_at, error=not result)
+                    stats.completed += 1
+                    if result:
+                        stats.succeeded += 1
+                    else:
+                        stats.failed += 1
+
+                yield item, result
+    finally:
+        # Stop promptly if the consumer closes the generator early
+        executor.shutdown(wait=False, cancel_futures=True)
+        for _, host, _ in in_flight.values():
+            release_host(host)
+        if stats is not None:
+            stats.finish()
@@ -1,31 +1,13 @@
-import requests
 import time
-import json
 import os
+import queue
+import threading
+import hashlib
+import uuid
 
-# Try to import newspaper3k, fallback if not available
-try:
-    from newspaper import Article
-    NEWSPAPER_AVAILABLE = True
-except ImportError as e:
-    NEWSPAPER_AVAILABLE = False
-    print(f"Warning: newspaper3k not available: {e}")
-    print("Using fallback article extraction")
-
-# Try to import heavy dependencies, fallback if not available
-try:
-    from sentence_transformers import SentenceTransformer
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
-    print("Warning: sentence-transformers not available, using fallback storage")
-
-try:
-    import chromadb
-    CHROMADB_AVAILABLE = True
-except ImportError:
-    CHROMADB_AVAILABLE = False
-    print("Warning: chromadb not available, using fallback storage")
+# Heavy dependencies load lazily, once per process, through utils.resources
+from utils.resources import SENTENCE_TRANSFORMERS_AVAILABLE, EMBEDDING_MODEL_NAME, get_embedding_model
+from retrieval.store import VECTOR_STORE_AVAILABLE, get_collection, bump_collection_version
 
 NEWS_SOURCES = [
     "https://rss.cnn.com/rss/cnn_topstories.rss",
@@ -33,231 +15,609 @@ NEWS_SOURCES = [
     "http://feeds.bbci.co.uk/news/world/rss.xml"
 ]
 
-# Initialize components based on availability
-if SENTENCE_TRANSFORMERS_AVAILABLE:
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-else:
-    model = None
-
-if CHROMADB_AVAILABLE:
-    chroma_client = chromadb.Client()
-    collection = chroma_client.get_or_create_collection("news")
-else:
-    # Fallback: use simple file-based storage
-    collection = None
-    FALLBACK_STORAGE_FILE = "news_articles.json"
+# Articles are embedded and written to the store in batches of this size
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "16"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
 
-import feedparser
-
-def extract_article_fallback(url):
-    """Fallback article extraction using requests and BeautifulSoup"""
-    try:
-        import requests
-        from bs4 import BeautifulSoup
-
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Try to extract title
-        title = None
-        for selector in ['h1', 'title', '.headline', '.title']:
-            title_elem = soup.select_one(selector)
-            if title_elem:
-                title = title_elem.get_text().strip()
-                break
+# Pipeline sizing: misinformation-check workers and bounded queue length between stages
+MISINFO_WORKERS = int(os.getenv("INGEST_MISINFO_WORKERS", "2"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "8"))
 
-        # Try to extract main content
-        text = ""
-        for selector in ['article', '.content', '.article-body', '.post-content', 'main', '.entry-content']:
-            content_elem = soup.select_one(selector)
-            if content_elem:
-                text = content_elem.get_text().strip()
-                break
-
-        # If no specific content found, get all paragraphs
-        if not text:
-            paragraphs = soup.find_all('p')
-            text = ' '.join([p.get_text().strip() for p in paragraphs])
-
-        return {
-            'title': title or 'No title',
-            'text': text,
-            'success': len(text) > 100
-        }
+if not SENTENCE_TRANSFORMERS_AVAILABLE:
+    print("Warning: sentence-transformers not available, using fallback storage")
 
-    except Exception as e:
-        print(f"Fallback extraction failed for {url}: {e}")
-        return {'title': 'No title', 'text': '', 'success': False}
-
-def load_fallback_storage():
-    """Load articles from fallback JSON storage"""
-    if os.path.exists(FALLBACK_STORAGE_FILE):
-        try:
-            with open(FALLBACK_STORAGE_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading fallback storage: {e}")
-    return []
-
-def save_to_fallback_storage(articles):
-    """Save articles to fallback JSON storage"""
-    try:
-        with open(FALLBACK_STORAGE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(articles, f, ensure_ascii=False, indent=2)
-        return True
-    except Exception as e:
-        print(f"Error saving to fallback storage: {e}")
-        return False
+import feedparser
 
-def fetch_rss_articles():
-    articles = []
+from app.feed_registry import FeedRegistry
+from app.extract import (extract_article, fetch_html, article_from_result, get_extraction_pool,
+                         get_extractor_stats, EXTRACT_PROCESSES)
+from app.fetcher import fetch_concurrently, FetchStats, MAX_WORKERS, PER_HOST_LIMIT
+from app.pipeline import Stage, BatchStage, StageStats, DONE, progress_reporter
+from app.feed_state import FeedStateStore, entry_is_revised
+from app.seen_urls import SeenUrlIndex
+from app.dedup import NearDuplicateIndex
+from app.journal import IngestJournal, FETCHED, CHECKED, EMBEDDED, STORED
+from utils.urls import canonicalize_url
+from utils.http import http_get
+from retrieval.fallback_store import get_fallback_store
+from retrieval.chunking import chunk_article, passage_id
+from retrieval.embedding_cache import get_embedding_cache
+from retrieval.bm25 import get_bm25_index
+
+from app.replay import activate_from_env
+
+# Serve feeds and pages from a recorded archive (or record them) when configured
+activate_from_env()
+
+# Ingestion state files are opened on first use, so importing this module creates nothing on disk
+_feed_state_store = None
+_ingest_journal = None
+_feed_registry = None
+_near_duplicate_index = None
+_state_lock = threading.Lock()
+
+def get_feed_state_store():
+    """Return the process-wide per-feed polling state, loading it on first use"""
+    global _feed_state_store
+    with _state_lock:
+        if _feed_state_store is None:
+            _feed_state_store = FeedStateStore()
+        return _feed_state_store
+
+def get_ingest_journal():
+    """Return the stage checkpoints of in-flight articles, so an interrupted run can be resumed"""
+    global _ingest_journal
+    with _state_lock:
+        if _ingest_journal is None:
+            _ingest_journal = IngestJournal()
+        return _ingest_journal
+
+def get_feed_registry():
+    """Return the persistent registry of feeds to ingest, seeded from NEWS_SOURCES on first use"""
+    global _feed_registry
+    with _state_lock:
+        if _feed_registry is None:
+            _feed_registry = FeedRegistry(default_feeds=NEWS_SOURCES)
+        return _feed_registry
+
+def stored_article_urls():
+    """Return the URLs of every article in the active store"""
+    if VECTOR_STORE_AVAILABLE:
+        # Every article has a first passage; its metadata carries the article URL
+        metadatas = get_collection().get(where={"chunk_index": 0}, include=["metadatas"])['metadatas']
+        return [meta['url'] for meta in metadatas]
+    return get_fallback_store().urls()
+
+def stored_versions(urls):
+    """Map each stored article URL among urls to its content hash and version"""
+    if VECTOR_STORE_AVAILABLE:
+        # The first passage of every article carries the article's metadata
+        metadatas = get_collection().get(ids=[passage_id(url, 0) for url in urls], include=["metadatas"])['metadatas']
+        return {meta['url']: {"content_hash": meta.get('content_hash'), "version": meta.get('version', 1),
+                              "timestamp": meta.get('timestamp')}
+                for meta in metadatas}
+    return get_fallback_store().versions(urls)
+
+def content_hash(art):
+    """Hash of an article's whitespace-normalised title and text"""
+    normalized = ' '.join(f"{art.get('title') or ''}\n{art.get('text') or ''}".split())
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+def get_near_duplicate_index():
+    """Return the MinHash signatures of stored articles, used to drop republished copies"""
+    global _near_duplicate_index
+    with _state_lock:
+        if _near_duplicate_index is None:
+            _near_duplicate_index = NearDuplicateIndex(loader=stored_article_urls)
+        return _near_duplicate_index
+
+def seen_article_urls():
+    """Stored URLs plus the URLs linked to them as near-duplicates"""
+    stored = stored_article_urls()
+    return list(stored) + get_near_duplicate_index().linked_urls(canonical_urls=set(stored))
+
+# Canonical URLs already in the store, checked before any article download
+seen_url_index = SeenUrlIndex(loader=seen_article_urls)
+
+def forget_articles(urls):
+    """Drop evicted articles from the near-duplicate, keyword and seen-URL indexes"""
+    get_near_duplicate_index().forget(urls)
+    get_bm25_index().remove_many(urls)
+    seen_url_index.reset()
+
+def fetch_feed(feed_url, state_store=None):
+    """
+    Conditionally fetch and parse one RSS feed.
+
+    Returns a dict with the source title, the entries not seen before and the
+    response validators, or None when the feed is unchanged (HTTP 304) or empty.
+    """
+    state_store = state_store or get_feed_state_store()
+    print(f"Fetching from: {feed_url}")
+
+    response = http_get(feed_url, headers=state_store.conditional_headers(feed_url))
+
+    if response.status_code == 304:
+        state_store.record_fetch(feed_url, not_modified=True)
+        print(f"Feed not modified since last fetch: {feed_url}")
+        return None
+
+    response.raise_for_status()
+    feed = feedparser.parse(response.content, response_headers=dict(response.headers))
+    entries = state_store.new_entries(feed_url, feed.entries)
+    state_store.record_fetch(feed_url, entries=feed.entries, new_entries=len(entries))
+
+    if not feed.entries:
+        print(f"No entries found in feed: {feed_url}")
+        return None
+
+    print(f"Found {len(feed.entries)} entries in feed ({len(entries)} new)")
+    return {
+        "source": feed.feed.title if hasattr(feed.feed, 'title') else "Unknown",
+        "entries": entries[:10],  # Limit to 10 articles per feed
+        "etag": response.headers.get('ETag'),
+        "last_modified": response.headers.get('Last-Modified')
+    }
+
+# Stats of the most recent fetch run, see get_fetch_stats()
+last_fetch_stats = None
+
+def iter_rss_articles(max_workers=MAX_WORKERS, per_host_limit=PER_HOST_LIMIT, stats=None, state_store=None,
+                      seen_urls=None, feed_stats=None, feed_urls=None, extract_processes=EXTRACT_PROCESSES,
+                      exclude_urls=None):
+    """
+    Fetch all feeds and their new articles concurrently, yielding each article as soon as it is parsed.
+
+    Feeds (feed_urls, by default every enabled feed in the registry) are
+    fetched in parallel first, then every new entry whose canonical URL is
+    not already stored is downloaded in a bounded thread pool with at most
+    per_host_limit requests per host; stored articles are downloaded again
+    only when the feed marks them as updated, and never when listed in
+    exclude_urls. With extract_processes set, pages
+    are parsed in a process pool instead of on the download threads. An entry is marked as seen once its
+    article has been handed to the consumer, and a feed's ETag/Last-Modified are only
+    stored when all of its new entries were handed over, so neither closing the
+    generator early nor a failed download loses entries.
+    """
+    global last_fetch_stats
+    state_store = state_store or get_feed_state_store()
+    seen_urls = seen_urls if seen_urls is not None else seen_url_index
+    feed_urls = feed_urls if feed_urls is not None else get_feed_registry().enabled_urls()
+    stats = stats or FetchStats()
+    last_fetch_stats = stats
     print("Fetching articles from RSS feeds...")
 
-    for feed_url in NEWS_SOURCES:
-        try:
-            print(f"Fetching from: {feed_url}")
-            feed = feedparser.parse(feed_url)
-
-            if not feed.entries:
-                print(f"No entries found in feed: {feed_url}")
+    jobs = []
+    feeds = {}
+    queued_urls = {canonicalize_url(url) for url in exclude_urls or ()}
+    for feed_url, result in fetch_concurrently(feed_urls, lambda url: fetch_feed(url, state_store),
+                                               max_workers=max_workers, per_host_limit=per_host_limit,
+                                               stats=feed_stats):
+        if not result:
+            continue
+        result["outstanding"] = 0
+        feeds[feed_url] = result
+        for entry in result["entries"]:
+            if not entry.get('link'):
                 continue
 
-            print(f"Found {len(feed.entries)} entries in feed")
-
-            for entry in feed.entries[:10]:  # Limit to 10 articles per feed
-                url = entry.link
-                article_data = None
+            # Skip articles that are already stored (unless the feed marks them as updated)
+            # or queued from another feed
+            url = canonicalize_url(entry.link)
+            if url in queued_urls or (url in seen_urls and not entry_is_revised(entry)):
+                state_store.mark_seen(feed_url, entry)
+                stats.skipped += 1
+                continue
 
-                # Try newspaper3k first if available
-                if NEWSPAPER_AVAILABLE:
-                    try:
-                        article = Article(url)
-                        article.download()
-                        article.parse()
-
-                        if article.text and len(article.text.strip()) > 100:
-                            article_data = {
-                                "title": article.title or "No title",
-                                "text": article.text,
-                                "url": url,
-                                "source": feed.feed.title if hasattr(feed.feed, 'title') else "Unknown"
-                            }
-                            print(f"Successfully parsed with newspaper3k: {article.title[:50]}...")
-                    except Exception as e:
-                        print(f"Newspaper3k failed for {url}: {e}")
-
-                # If newspaper3k failed or unavailable, try fallback
-                if not article_data:
-                    try:
-                        fallback_result = extract_article_fallback(url)
-                        if fallback_result['success']:
-                            article_data = {
-                                "title": fallback_result['title'],
-                                "text": fallback_result['text'],
-                                "url": url,
-                                "source": feed.feed.title if hasattr(feed.feed, 'title') else "Unknown"
-                            }
-                            print(f"Successfully parsed with fallback: {fallback_result['title'][:50]}...")
-                    except Exception as e:
-                        print(f"Fallback extraction failed for {url}: {e}")
-
-                # Add article if we got content
-                if article_data:
-                    articles.append(article_data)
-                else:
-                    print(f"Skipped article with insufficient content: {url}")
-
-        except Exception as e:
-            print(f"Failed to fetch feed {feed_url}: {e}")
-            continue
+            queued_urls.add(url)
+            jobs.append((entry.link, result["source"], feed_url, entry))
+            result["outstanding"] += 1
+        result["failed"] = 0
+        if not result["outstanding"]:
+            state_store.commit(feed_url, result["etag"], result["last_modified"])
+
+    if extract_processes:
+        # Threads only download; parsing is CPU bound and runs in worker processes
+        downloads = fetch_concurrently(jobs, lambda job: fetch_html(job[0]), url_of=lambda job: job[0],
+                                       max_workers=max_workers, per_host_limit=per_host_limit, stats=stats)
+        parsed = get_extraction_pool(extract_processes).imap((job, job[0], html) for job, html in downloads)
+        articles = ((job, article_from_result(job[0], job[1], result)) for job, result in parsed)
+    else:
+        articles = fetch_concurrently(jobs, lambda job: extract_article(job[0], job[1]), url_of=lambda job: job[0],
+                                      max_workers=max_workers, per_host_limit=per_host_limit, stats=stats)
 
+    try:
+        for (_, _, feed_url, entry), article_data in articles:
+            feed = feeds[feed_url]
+            feed["outstanding"] -= 1
+            if article_data:
+                state_store.mark_seen(feed_url, entry)
+            else:
+                # Retried on the next poll: the feed is fetched in full again and the watermark stays put
+                feed["failed"] += 1
+            if not feed["outstanding"] and not feed["failed"]:
+                state_store.commit(feed_url, feed["etag"], feed["last_modified"], feed["entries"])
+
+            if article_data:
+                # The canonical URL keys the article; the link it was published under is kept for display
+                article_data["link"] = article_data["url"]
+                article_data["url"] = canonicalize_url(article_data["url"])
+                yield article_data
+    finally:
+        articles.close()
+        state_store.save()
+
+    print(f"Fetched {stats.succeeded} articles in {stats.elapsed:.1f}s "
+          f"({stats.articles_per_second:.2f} articles/sec, {stats.skipped} skipped as already seen)")
+
+def fetch_rss_articles(max_workers=MAX_WORKERS, per_host_limit=PER_HOST_LIMIT):
+    articles = list(iter_rss_articles(max_workers=max_workers, per_host_limit=per_host_limit))
     print(f"Total articles fetched: {len(articles)}")
     return articles
 
+def get_fetch_stats():
+    """Get throughput statistics of the last fetch run for monitoring"""
+    return last_fetch_stats.to_dict() if last_fetch_stats else {}
+
 from fact_checking.misinfo import detect_misinformation
 
-def ingest_news(max_articles=5, progress_callback=None):
+def deduplicate_article(art):
+    """
+    Return the article, or None when it needs no further processing.
+
+    A stored article whose content hash is unchanged is dropped; a changed
+    one continues as its next version. New articles that are near-duplicates
+    of one already seen are dropped after recording the link.
+    """
+    art['content_hash'] = content_hash(art)
+    previous = stored_versions([art['url']]).get(art['url'])
+    if previous:
+        seen_url_index.add(art['url'])
+        if previous['content_hash'] == art['content_hash']:
+            print(f"Skipping unchanged article: {art['url']}")
+            return None
+        art['version'] = (previous.get('version') or 1) + 1
+        art['timestamp'] = previous.get('timestamp')
+        get_near_duplicate_index().reindex(art)
+        print(f"Article updated, storing version {art['version']}: {art['url']}")
+        return art
+
+    art['version'] = 1
+    match = get_near_duplicate_index().check(art)
+    if not match:
+        return art
+
+    canonical_url, similarity = match
+    if canonical_url != art['url']:
+        # Matching itself means another run is already ingesting this very article
+        get_near_duplicate_index().link_duplicate(art['url'], canonical_url, art.get('source'), similarity)
+    seen_url_index.add(art['url'])
+    print(f"Skipping near-duplicate ({similarity:.2f}) of {canonical_url}: {art['url']}")
+    return None
+
+def analyse_article(art):
+    """Return a copy of the article with its misinformation verdict attached"""
     try:
-        print(f"Starting news ingestion for {max_articles} articles...")
-        articles = fetch_rss_articles()
-        print(f"Fetched {len(articles)} articles from RSS feeds")
+        misinfo_verdict, misinfo_explanation = detect_misinformation(art['text'])
+    except Exception as e:
+        print(f"Misinformation detection failed for {art['url']}: {e}")
+        misinfo_verdict = "Unknown"
+        misinfo_explanation = "Analysis failed"
+    return dict(art, misinfo_verdict=misinfo_verdict, misinfo_explanation=misinfo_explanation)
+
+def article_passages(batch):
+    """Split a batch of articles into passages, in article order"""
+    return [(art, passage) for art in batch for passage in chunk_article(art)]
+
+def embed_articles(batch, batch_size=EMBEDDING_BATCH_SIZE):
+    """
+    Embed every passage of a batch of articles (None when embeddings are not used).
+
+    Passages already in the embedding cache (same text under any URL, or
+    from an earlier run) are not encoded again; the rest go through a
+    single encode() call. Embeddings follow article_passages(batch).
+    """
+    if not VECTOR_STORE_AVAILABLE:
+        return None
+    passages = article_passages(batch)
+    if not passages:
+        return []
+    embeddings = get_embedding_cache().encode(get_embedding_model(), [passage['text'] for _, passage in passages],
+                                              EMBEDDING_MODEL_NAME, batch_size=batch_size)
+    return [embedding.tolist() for embedding in embeddings]
+
+def store_articles(batch, embeddings=None):
+    """
+    Store a batch of analysed articles in one go.
+
+    With ChromaDB every passage of the batch is upserted with a single call,
+    embedding them first if no embeddings are given; passages are keyed
+    url#chunk-i and carry their article's canonical URL, original link,
+    metadata, content hash and version. The passages of an updated
+    article's previous version are deleted first, since the new version may
+    have fewer of them. The fallback store upserts the whole articles in
+    one transaction. Returns the number of articles stored.
+    """
+    if not batch:
+        return 0
+
+    now = time.time()
+    updated = [art['url'] for art in batch if art.get('version', 1) > 1]
+    if VECTOR_STORE_AVAILABLE:
+        # Use ChromaDB with passage embeddings
+        if embeddings is None:
+            embeddings = embed_articles(batch)
+        passages = article_passages(batch)
+        collection = get_collection()
+        if updated:
+            collection.delete(where={"url": {"$in": updated}})
+        if passages:
+            collection.upsert(
+                ids=[passage['id'] for _, passage in passages],
+                documents=[passage['text'] for _, passage in passages],
+                embeddings=embeddings,
+                metadatas=[{
+                    "title": art['title'],
+                    "url": art['url'],
+                    "link": art.get('link') or art['url'],
+                    "chunk_index": passage['chunk_index'],
+                    "source": art['source'],
+                    "misinfo_verdict": art['misinfo_verdict'],
+                    "misinfo_explanation": art['misinfo_explanation'],
+                    "content_hash": art.get('content_hash') or content_hash(art),
+                    "version": art.get('version', 1),
+                    "timestamp": art.get('timestamp') or now,
+                    "updated_at": now
+                } for art, passage in passages]
+            )
+        if passages or updated:
+            bump_collection_version()
+    else:
+        # Use fallback storage, one transaction per batch
+        get_fallback_store().upsert_many([{
+            "title": art['title'],
+            "text": art['text'],
+            "url": art['url'],
+            "link": art.get('link') or art['url'],
+            "source": art['source'],
+            "misinfo_verdict": art['misinfo_verdict'],
+            "misinfo_explanation": art['misinfo_explanation'],
+            "timestamp": now,
+            "content_hash": art.get('content_hash') or content_hash(art)
+        } for art in batch])
+
+    if updated:
+        print(f"Stored {len(updated)} updated articles")
+    # Keyword index for the lightweight search and the sparse side of hybrid search
+    get_bm25_index().add_many(batch)
+    get_near_duplicate_index().save(batch)
+    for art in batch:
+        seen_url_index.add(art['url'])
+    return len(batch)
+
+def checkpoint(art, stage, run_id):
+    """Record an article that completed a stage in the journal, leased to run_id, passing it on"""
+    if art is not None:
+        get_ingest_journal().record(art, stage, run_id)
+    return art
+
+# Per-stage timings of the most recent ingestion run, see get_ingest_stats()
+last_stage_timings = {}
+
+def ingest_news(max_articles=5, progress_callback=None, batch_size=INGEST_BATCH_SIZE,
+                fetch_workers=MAX_WORKERS, misinfo_workers=MISINFO_WORKERS, queue_size=PIPELINE_QUEUE_SIZE,
+                feed_urls=None, extract_processes=EXTRACT_PROCESSES, resume=True):
+    """
+    Ingest up to max_articles new articles through a streaming pipeline.
+
+    Articles flow feed -> extract -> dedup -> misinfo -> embed -> store,
+    where near-duplicates of already seen articles are linked to their
+    canonical copy and dropped before any LLM call. Every stage has its own
+    workers and a bounded input queue, so a slow stage applies backpressure
+    instead of buffering everything in memory. The feed stage
+    only pulls another article while fewer than max_articles are in flight
+    or stored, so nothing is downloaded just to be thrown away, and the run
+    stops as soon as max_articles are stored.
+
+    Every article is checkpointed in the ingestion journal after each stage.
+    With resume, articles an earlier run left unfinished are picked up
+    first, after their last completed stage, so they are neither downloaded
+    nor sent to Gemini again; they count towards max_articles, so a large
+    backfill can run as a series of smaller calls. Articles another live
+    run is working on are leased to it and left alone.
+
+    progress_callback(current, total) is called from the calling thread;
+    callbacks that also accept stage_timings receive per-stage timings.
+    """
+    global last_stage_timings
+    if max_articles <= 0:
+        return 0
+    report_progress = progress_reporter(progress_callback)
+    journal = get_ingest_journal()
+    # Owner of this run's journal leases
+    run_id = uuid.uuid4().hex
 
-        if not articles:
-            print("No articles found from RSS feeds")
-            return 0
+    try:
+        print(f"Starting news ingestion for {max_articles} articles...")
+        journal.prune()
+        resumed = []
+        if resume:
+            resumed = journal.resume(max_articles, run_id)
+            if resumed:
+                print(f"Resuming {len(resumed)} articles from the ingestion journal")
+
+        slots = threading.Semaphore(max_articles)
+        stop = threading.Event()
+        feed_stats = FetchStats()
+        fetch_stats = FetchStats()
+        store_stats = StageStats()
+        results = queue.Queue(maxsize=queue_size)
+        # Articles lost to an error in any stage
+        failed = []
+
+        def release_slots(item, error):
+            # A failed article (or batch) frees its slot for another article
+            items = item if isinstance(item, list) else [item]
+            if error is not None:
+                failed.extend(items)
+            for _ in items:
+                slots.release()
+
+        # Near-duplicates are dropped before the misinformation check and free their slot
+        dedup_stage = Stage("dedup", lambda art: checkpoint(deduplicate_article(art), FETCHED, run_id), workers=1,
+                            queue_size=queue_size, on_error=release_slots,
+                            on_drop=lambda item: release_slots(item, None))
+        misinfo_stage = Stage("misinfo", lambda art: checkpoint(analyse_article(art), CHECKED, run_id),
+                              workers=misinfo_workers, queue_size=queue_size, on_error=release_slots)
+
+        def embed_batch(batch):
+            embeddings = embed_articles(batch)
+            journal.advance([art['url'] for art in batch], EMBEDDED)
+            return batch, embeddings
+
+        embed_stage = BatchStage("embed", embed_batch, batch_size=batch_size, queue_size=queue_size,
+                                 on_error=release_slots)
+        dedup_stage.start(misinfo_stage.input)
+        misinfo_stage.start(embed_stage.input)
+        embed_stage.start(results)
+
+        def produce():
+            # Resumed articles re-enter the pipeline after their last checkpoint
+            for stage, art in resumed:
+                slots.acquire()
+                (misinfo_stage if stage == FETCHED else embed_stage).input.put(art)
+
+            # More downloads in flight than articles wanted would only be wasted
+            articles = iter_rss_articles(max_workers=min(fetch_workers, max_articles),
+                                         stats=fetch_stats, feed_stats=feed_stats, feed_urls=feed_urls,
+                                         extract_processes=extract_processes,
+                                         exclude_urls=journal.leased_urls())
+            try:
+                while True:
+                    # Take a slot before pulling the next article so none is fetched in vain
+                    while not slots.acquire(timeout=0.2):
+                        if stop.is_set():
+                            return
+                    try:
+                        art = next(articles)
+                    except StopIteration:
+                        slots.release()
+                        return
+                    dedup_stage.input.put(art)
+            except Exception as e:
+                print(f"Feed stage failed: {e}")
+            finally:
+                articles.close()
+                dedup_stage.input.put(DONE)
+
+        def stage_timings():
+            return {
+                "feed": feed_stats.timing.to_dict(),
+                "extract": fetch_stats.timing.to_dict(),
+                "dedup": dedup_stage.stats.to_dict(),
+                "misinfo": misinfo_stage.stats.to_dict(),
+                "embed": embed_stage.stats.to_dict(),
+                "store": store_stats.to_dict()
+            }
+
+        producer = threading.Thread(target=produce, name="feed", daemon=True)
+        producer.start()
 
         count = 0
-        errors = 0
+        reported = 0
+        next_heartbeat = time.monotonic() + journal.lease_seconds / 3
 
-        for idx, art in enumerate(articles[:max_articles]):
+        # The store stage runs on the calling thread, which also reports progress and renews journal leases
+        while True:
             try:
-                if progress_callback:
-                    progress_callback(idx + 1, min(max_articles, len(articles)))
+                item = results.get(timeout=0.2)
+            except queue.Empty:
+                item = None
+
+            if time.monotonic() >= next_heartbeat:
+                journal.heartbeat(run_id)
+                next_heartbeat = time.monotonic() + journal.lease_seconds / 3
 
-                print(f"Processing article {idx + 1}: {art.get('title', 'No title')[:50]}...")
+            if item is DONE:
+                break
 
-                # Detect misinformation
+            if item is not None:
+                batch, embeddings = item
+                start = time.perf_counter()
                 try:
-                    misinfo_verdict, misinfo_explanation = detect_misinformation(art['text'])
+                    stored = store_articles(batch, embeddings)
+                    journal.advance([art['url'] for art in batch], STORED)
+                    count += stored
+                    store_stats.record(time.perf_counter() - start)
+                    print(f"Stored batch of {stored} articles")
                 except Exception as e:
-                    print(f"Misinformation detection failed for article {idx + 1}: {e}")
-                    misinfo_verdict = "Unknown"
-                    misinfo_explanation = "Analysis failed"
-
-                # Store article based on available storage
-                if CHROMADB_AVAILABLE and SENTENCE_TRANSFORMERS_AVAILABLE:
-                    # Use ChromaDB with embeddings
-                    embedding = model.encode(art['text'])
-                    collection.add(
-                        ids=[art['url']],
-                        documents=[art['text']],
-                        embeddings=[embedding.tolist()],
-                        metadatas=[{
-                            "title": art['title'],
-                            "url": art['url'],
-                            "source": art['source'],
-                            "misinfo_verdict": misinfo_verdict,
-                            "misinfo_explanation": misinfo_explanation
-                        }]
-                    )
-                else:
-                    # Use fallback storage
-                    existing_articles = load_fallback_storage()
-
-                    # Check if article already exists
-                    if not any(existing['url'] == art['url'] for existing in existing_articles):
-                        article_data = {
-                            "title": art['title'],
-                            "text": art['text'],
-                            "url": art['url'],
-                            "source": art['source'],
-                            "misinfo_verdict": misinfo_verdict,
-                            "misinfo_explanation": misinfo_explanation,
-                            "timestamp": time.time()
-                        }
-                        existing_articles.append(article_data)
-                        save_to_fallback_storage(existing_articles)
-
-                count += 1
-                print(f"Successfully processed article {idx + 1}")
-
-            except Exception as e:
-                errors += 1
-                print(f"Error processing article {idx + 1}: {e}")
-                continue
-
-        print(f"Ingestion completed: {count} successful, {errors} errors")
+                    store_stats.record(time.perf_counter() - start, error=True)
+                    release_slots(batch, e)
+                    print(f"Error storing batch of {len(batch)} articles: {e}")
+
+                if count >= max_articles:
+                    stop.set()
+
+            analysed = min(misinfo_stage.stats.count, max_articles)
+            if analysed != reported:
+                reported = analysed
+                report_progress(analysed, max_articles, stage_timings())
+
+        stop.set()
+        producer.join()
+
+        last_stage_timings = stage_timings()
+        report_progress(count, count, last_stage_timings)
+
+        print(f"Ingestion completed: {count} successful, {len(failed)} errors")
+        for stage, timing in last_stage_timings.items():
+            print(f"  {stage:>8}: {timing['count']} items, avg {timing['avg_ms']}ms, total {timing['total_seconds']}s")
+        if VECTOR_STORE_AVAILABLE:
+            cache_stats = get_embedding_cache().get_stats()
+            print(f"  Embedding cache: {cache_stats['hit_rate']:.0%} hit rate, {cache_stats['entries']} entries")
+        for line in monitoring_summary():
+            print(f"  {line}")
         return count
 
     except Exception as e:
         print(f"Critical error in ingest_news: {e}")
         raise e
+    finally:
+        journal.release(run_id)
+
+def get_ingest_stats():
+    """Get per-stage timings of the last ingestion run for monitoring"""
+    return dict(last_stage_timings)
+
+def get_journal_stats():
+    """Get the number of journaled articles at each checkpoint for monitoring"""
+    return get_ingest_journal().get_stats()
+
+def get_feed_polling_stats():
+    """Get conditional-GET statistics of feed polling for monitoring"""
+    return get_feed_state_store().get_stats()
+
+def get_seen_url_stats():
+    """Get lookup statistics of the seen-URL index for monitoring"""
+    return seen_url_index.get_stats()
+
+def get_dedup_stats():
+    """Get near-duplicate detection statistics for monitoring"""
+    return get_near_duplicate_index().get_stats()
+
+def monitoring_summary():
+    """One-line summaries of the caches and indexes that save ingestion work, for logs and the debug panel"""
+    feeds = get_feed_polling_stats()
+    seen = get_seen_url_stats()
+    profiles = get_extractor_stats()["profiles"]
+    dedup = get_dedup_stats()
+    return [
+        f"Feed polling: {feeds['not_modified_rate']:.0%} of {feeds['total_fetches']} fetches not modified",
+        f"Seen URLs: {seen['hits']} of {seen['lookups']} entries skipped before download",
+        f"Extraction profiles: {profiles['hit_rate']:.0%} hit rate, "
+        f"{profiles['saved_parse_seconds']}s parse time saved",
+        f"Near-duplicates: {dedup['duplicates_found']} of {dedup['checked']} articles dropped"
+    ]
 
 if __name__ == "__main__":
     articles = fetch_rss_articles()
@@ -0,0 +1,136 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+INGEST_JOURNAL_FILE = os.getenv("INGEST_JOURNAL_FILE", "ingest_journal.db")
+# An article that fails this many resumed runs in a row is dropped from the journal
+MAX_RESUME_ATTEMPTS = 3
+# Seconds an article stays leased to the run working on it without a heartbeat;
+# after that the run is presumed dead and the article can be resumed
+JOURNAL_LEASE_SECONDS = int(os.getenv("INGEST_JOURNAL_LEASE", "300"))
+
+# Checkpoints in pipeline order; an article resumes after the last one it reached
+FETCHED = "fetched"    # extracted and past near-duplicate detection
+CHECKED = "checked"    # misinformation verdict attached
+EMBEDDED = "embedded"  # passages embedded (vectors live in the embedding cache)
+STORED = "stored"
+STAGES = [FETCHED, CHECKED, EMBEDDED, STORED]
+
+class IngestJournal:
+    """
+    Crash-resumable record of the articles an ingestion run is working on.
+
+    Every article is checkpointed with the last pipeline stage it completed
+    and its payload at that point (text, versioning, misinformation
+    verdict), so a run that dies midway can be resumed without downloading
+    or analysing those articles again. Stored articles are pruned when the
+    next run begins.
+
+    Every unfinished article is leased to the run (owner) that recorded or
+    resumed it. Runs renew their leases with heartbeat() and give them up
+    with release(); resume() only hands out articles whose lease is missing
+    or expired, so concurrent runs, in one process or several sharing the
+    journal file, never pick up each other's in-flight articles.
+    """
+
+    def __init__(self, path=INGEST_JOURNAL_FILE, lease_seconds=JOURNAL_LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                url TEXT PRIMARY KEY,
+                stage TEXT NOT NULL,
+                article TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                owner TEXT,
+                lease_expires REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_stage ON articles(stage);
+        """)
+        self._conn.commit()
+        self.resumed = 0
+
+    def record(self, art, stage, owner):
+        """Checkpoint one article with its current payload, leasing it to owner"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO articles (url, stage, article, attempts, updated_at, owner, lease_expires) "
+                "VALUES (?, ?, ?, COALESCE((SELECT attempts FROM articles WHERE url = ?), 0), ?, ?, ?)",
+                (art['url'], stage, json.dumps(art, ensure_ascii=False), art['url'], now, owner,
+                 now + self.lease_seconds))
+
+    def advance(self, urls, stage):
+        """Move articles to a later stage without rewriting their payload"""
+        if not urls:
+            return
+        with self._lock, self._conn:
+            now = time.time()
+            self._conn.executemany("UPDATE articles SET stage = ?, updated_at = ? WHERE url = ?",
+                                   [(stage, now, url) for url in urls])
+
+    def resume(self, limit, owner):
+        """
+        Lease up to limit unfinished articles no live run holds to owner, oldest first.
+
+        Returns (stage, article) pairs. Each claim counts as an attempt; an
+        article that has used up MAX_RESUME_ATTEMPTS is dropped instead.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM articles WHERE stage != ? AND attempts >= ? "
+                               "AND (owner IS NULL OR lease_expires < ?)", (STORED, MAX_RESUME_ATTEMPTS, now))
+            # A single statement, so two processes can never claim the same article
+            self._conn.execute(
+                "UPDATE articles SET owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE url IN ("
+                "SELECT url FROM articles WHERE stage != ? AND (owner IS NULL OR lease_expires < ?) "
+                "ORDER BY updated_at LIMIT ?)", (owner, now + self.lease_seconds, STORED, now, limit))
+            claimed = self._conn.execute(
+                "SELECT stage, article FROM articles WHERE owner = ? AND stage != ? ORDER BY updated_at",
+                (owner, STORED)).fetchall()
+            self.resumed += len(claimed)
+        return [(stage, json.loads(article)) for stage, article in claimed]
+
+    def leased_urls(self):
+        """URLs of unfinished articles that some live run is working on"""
+        with self._lock:
+            return {row[0] for row in self._conn.execute(
+                "SELECT url FROM articles WHERE stage != ? AND owner IS NOT NULL AND lease_expires >= ?",
+                (STORED, time.time()))}
+
+    def heartbeat(self, owner):
+        """Renew the leases of every article owner is working on"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE articles SET lease_expires = ? WHERE owner = ?",
+                               (time.time() + self.lease_seconds, owner))
+
+    def release(self, owner):
+        """Give up owner's leases, e.g. when a run ends before storing its articles"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE articles SET owner = NULL, lease_expires = NULL WHERE owner = ?", (owner,))
+
+    def prune(self):
+        """Forget articles that were stored"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM articles WHERE stage = ?", (STORED,))
+
+    def get_stats(self):
+        """Get the number of articles at each checkpoint for monitoring"""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT stage, COUNT(*) FROM articles GROUP BY stage").fetchall())
+            leased = self._conn.execute(
+                "SELECT COUNT(*) FROM articles WHERE stage != ? AND owner IS NOT NULL AND lease_expires >= ?",
+                (STORED, time.time())).fetchone()[0]
+            return {
+                "stages": {stage: counts.get(stage, 0) for stage in STAGES},
+                "unfinished": sum(count for stage, count in counts.items() if stage != STORED),
+                "leased": leased,
+                "resumed": self.resumed
+            }
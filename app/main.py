@@ -1,5 +1,6 @@
 
 import streamlit as st
+import itertools
 import time
 import logging
 from datetime import datetime
@@ -7,27 +8,90 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.ingest import ingest_news
-from retrieval.search import search_news
+from app.ingest import ingest_news, get_journal_stats, get_fetch_stats, monitoring_summary
+from retrieval.search import search_news_stream, get_search_stats, PENDING
+from retrieval.store import VECTOR_STORE_AVAILABLE, get_store_stats
+from retrieval.retention import get_retention_stats
+from utils.resources import warm_up, get_resource_stats
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def render_result(res, show_debug_info, key):
+    """Render one search result card; key keeps its widgets unique across re-renders"""
+    # Header with source and credibility
+    col_source, col_cred = st.columns([3, 1])
+    with col_source:
+        st.markdown(f"### 📰 **Source:** {res.get('source', 'Unknown')}")
+    with col_cred:
+        credibility = res.get('credibility', 'N/A')
+        if isinstance(credibility, (int, float)) and credibility >= 0.8:
+            st.success(f"Credibility: {credibility}")
+        elif isinstance(credibility, (int, float)) and credibility >= 0.5:
+            st.warning(f"Credibility: {credibility}")
+        else:
+            st.error(f"Credibility: {credibility}")
+
+    # Misinformation detection
+    misinfo_verdict = res.get('misinfo_verdict', 'Unknown')
+    misinfo_explanation = res.get('misinfo_explanation', '')
+
+    if misinfo_verdict == "Likely Safe":
+        st.success(f"🛡️ **Misinformation Detection:** {misinfo_verdict}")
+    elif misinfo_verdict == "Potentially Misleading":
+        st.warning(f"⚠️ **Misinformation Detection:** {misinfo_verdict}")
+    else:
+        st.error(f"🚨 **Misinformation Detection:** {misinfo_verdict}")
+
+    if misinfo_explanation:
+        st.markdown(f"*{misinfo_explanation}*")
+
+    # Fact-checking results
+    fact_check = res.get('fact_check', 'Unverified')
+    evidence = res.get('evidence', 'No evidence provided')
+
+    if fact_check == PENDING:
+        st.info("⏳ **Fact-Check:** checking against the retrieved context...")
+    elif fact_check == "Likely True":
+        st.success(f"✅ **Fact-Check:** {fact_check}")
+    elif fact_check == "Likely False":
+        st.error(f"❌ **Fact-Check:** {fact_check}")
+    else:
+        st.info(f"❓ **Fact-Check:** {fact_check}")
+
+    if fact_check != PENDING:
+        st.markdown(f"**Evidence:** {evidence}")
+
+    # Debug information
+    if show_debug_info or 'context' in res:
+        with st.expander("🔧 Debug Information"):
+            if 'context' in res:
+                st.subheader("Retrieved News Context")
+                st.text_area("Context", res['context'], height=100, disabled=True, key=f"context-{key}")
+
+            if show_debug_info:
+                st.subheader("Raw Result Data")
+                st.json(res)
+
+    st.markdown("---")
+
+
 def main():
     """Main Streamlit application function"""
 
-    # Check for heavy dependencies and show deployment mode
-    try:
-        import sentence_transformers
-        import chromadb
+    # Check for heavy dependencies (without importing them) and show deployment mode
+    if VECTOR_STORE_AVAILABLE:
         FULL_MODE = True
         deployment_mode = "Full Mode (with AI embeddings)"
-    except ImportError:
+    else:
         FULL_MODE = False
         deployment_mode = "Lightweight Mode (keyword search)"
         st.info(f"🚀 Running in {deployment_mode} - optimized for cloud deployment")
 
+    # Load the embedding model and Gemini client in the background while the page renders
+    warm_up()
+
     # Import cache utilities from our improved modules
     try:
         from fact_checking.check import get_cache_stats as get_fact_check_cache_stats, clear_expired_cache as clear_fact_check_cache
@@ -118,6 +182,12 @@ def main():
         show_debug_info = st.checkbox("Show Debug Information", value=False)
         auto_refresh = st.checkbox("Auto-refresh Results", value=False)
 
+        if show_debug_info:
+            with st.expander("⏱️ Model Load Times"):
+                st.table([{"resource": name, **stats} for name, stats in get_resource_stats().items()])
+            with st.expander("🗄️ Index & Retention"):
+                st.json({"store": get_store_stats(), "retention": get_retention_stats()})
+
     # Main content area
     col1, col2 = st.columns([2, 1])
 
@@ -151,9 +221,12 @@ def main():
             progress_bar = st.progress(0, text="Preparing to ingest news articles...")
             status_placeholder = st.empty()
             
-            def progress_callback(current, total):
+            stage_timings_seen = {}
+
+            def progress_callback(current, total, stage_timings=None):
                 progress = current / total if total > 0 else 0
                 progress_bar.progress(progress, text=f"Ingesting article {current} of {total}")
+                stage_timings_seen.update(stage_timings or {})
                 
                 # Update status
                 if current % 5 == 0:  # Update every 5 articles
@@ -174,6 +247,25 @@ def main():
             """, unsafe_allow_html=True)
             
             logger.info(f"Ingested {count} articles in {end_time - start_time:.1f} seconds")
+
+            if show_debug_info and stage_timings_seen:
+                with st.expander("⏱️ Ingestion Stage Timings"):
+                    st.table([{"stage": stage, **timing} for stage, timing in stage_timings_seen.items()])
+                    if FULL_MODE:
+                        from retrieval.embedding_cache import get_embedding_cache
+                        cache_stats = get_embedding_cache().get_stats()
+                        st.caption(f"Embedding cache: {cache_stats['hit_rate']:.0%} hit rate, "
+                                   f"{cache_stats['entries']}/{cache_stats['max_entries']} entries")
+                    journal_stats = get_journal_stats()
+                    if journal_stats['unfinished']:
+                        st.caption(f"Ingestion journal: {journal_stats['unfinished']} unfinished articles "
+                                   f"will be resumed by the next run")
+                    fetch_stats = get_fetch_stats()
+                    if fetch_stats:
+                        st.caption(f"Downloads: {fetch_stats['succeeded']} of {fetch_stats['submitted']} succeeded, "
+                                   f"{fetch_stats['articles_per_second']} articles/s")
+                    for line in monitoring_summary():
+                        st.caption(line)
             
         except Exception as e:
             st.markdown(f"""
@@ -245,89 +337,55 @@ def main():
             search_button = True
 
     if query and search_button:
-        with st.spinner("Retrieving and fact-checking..."):
-            try:
-                start_time = time.time()
-                results = search_news(query)
-                end_time = time.time()
-
-                if not results:
-                    st.warning("No results found. Try a different query or ingest more recent news.")
-                else:
-                    st.success(f"Found {len(results)} relevant articles in {end_time - start_time:.1f}s")
-
-                    # Display results
-                    for i, res in enumerate(results):
-                        with st.container():
-                            # Header with source and credibility
-                            col_source, col_cred = st.columns([3, 1])
-                            with col_source:
-                                st.markdown(f"### 📰 **Source:** {res.get('source', 'Unknown')}")
-                            with col_cred:
-                                credibility = res.get('credibility', 'N/A')
-                                if isinstance(credibility, (int, float)) and credibility >= 0.8:
-                                    st.success(f"Credibility: {credibility}")
-                                elif isinstance(credibility, (int, float)) and credibility >= 0.5:
-                                    st.warning(f"Credibility: {credibility}")
-                                else:
-                                    st.error(f"Credibility: {credibility}")
-
-                            # Misinformation detection
-                            misinfo_verdict = res.get('misinfo_verdict', 'Unknown')
-                            misinfo_explanation = res.get('misinfo_explanation', '')
-
-                            if misinfo_verdict == "Likely Safe":
-                                st.success(f"🛡️ **Misinformation Detection:** {misinfo_verdict}")
-                            elif misinfo_verdict == "Potentially Misleading":
-                                st.warning(f"⚠️ **Misinformation Detection:** {misinfo_verdict}")
-                            else:
-                                st.error(f"🚨 **Misinformation Detection:** {misinfo_verdict}")
-
-                            if misinfo_explanation:
-                                st.markdown(f"*{misinfo_explanation}*")
-
-                            # Fact-checking results
-                            fact_check = res.get('fact_check', 'Unverified')
-                            evidence = res.get('evidence', 'No evidence provided')
-
-                            if fact_check == "Likely True":
-                                st.success(f"✅ **Fact-Check:** {fact_check}")
-                            elif fact_check == "Likely False":
-                                st.error(f"❌ **Fact-Check:** {fact_check}")
-                            else:
-                                st.info(f"❓ **Fact-Check:** {fact_check}")
-
-                            st.markdown(f"**Evidence:** {evidence}")
-
-                            # Debug information
-                            if show_debug_info or 'context' in res:
-                                with st.expander("🔧 Debug Information"):
-                                    if 'context' in res:
-                                        st.subheader("Retrieved News Context")
-                                        st.text_area("Context", res['context'], height=100, disabled=True)
-
-                                    if show_debug_info:
-                                        st.subheader("Raw Result Data")
-                                        st.json(res)
-
-                            st.markdown("---")
+        try:
+            start_time = time.time()
+            status = st.empty()
+            with st.spinner("Retrieving..."):
+                stream = search_news_stream(query)
+                # The first result arrives once retrieval is done, before any fact check
+                first = next(stream, None)
+
+            if first is None:
+                st.warning("No results found. Try a different query or ingest more recent news.")
+            else:
+                # One placeholder per result card, re-rendered as its fact check completes
+                results = {}
+                cards = []
+                for rank, res in itertools.chain([first], stream):
+                    while len(cards) <= rank:
+                        cards.append(st.empty())
+                    results[rank] = res
+                    checked = sum(r.get('fact_check') != PENDING for r in results.values())
+                    status.info(f"Found {len(results)} relevant articles in {time.time() - start_time:.1f}s, "
+                                f"fact-checked {checked}...")
+                    with cards[rank].container():
+                        render_result(res, show_debug_info, key=f"{rank}-{res.get('fact_check') != PENDING}")
+
+                status.success(f"Found {len(results)} relevant articles in {time.time() - start_time:.1f}s")
+                if show_debug_info:
+                    timings = get_search_stats()["last_search"]
+                    st.caption(" · ".join(f"{stage.replace('_ms', '')} {value} ms"
+                                          for stage, value in timings.items() if stage.endswith('_ms')
+                                          and not isinstance(value, list)))
+                    if timings.get('fact_checks_ms'):
+                        st.caption("fact checks per result: " + ", ".join(
+                            f"#{n} {value} ms" for n, value in enumerate(timings['fact_checks_ms'], start=1)))
+        except Exception as e:
+            st.markdown(f"""
+            <div class="status-box error-box">
+                ❌ Error during search and fact-checking: {str(e)}
+            </div>
+            """, unsafe_allow_html=True)
+            logger.error(f"Search failed: {e}")
 
-            except Exception as e:
-                st.markdown(f"""
-                <div class="status-box error-box">
-                    ❌ Error during search and fact-checking: {str(e)}
-                </div>
-                """, unsafe_allow_html=True)
-                logger.error(f"Search failed: {e}")
-
-                # Show fallback options
-                with st.expander("What you can do:"):
-                    st.markdown("""
-                    - Try a simpler query
-                    - Check if news ingestion completed successfully
-                    - Verify your API configurations
-                    - The system may be using fallback methods - results might be limited but still useful
-                    """)
+            # Show fallback options
+            with st.expander("What you can do:"):
+                st.markdown("""
+                - Try a simpler query
+                - Check if news ingestion completed successfully
+                - Verify your API configurations
+                - The system may be using fallback methods - results might be limited but still useful
+                """)
 
     # Footer with system information
     st.markdown("---")
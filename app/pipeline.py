@@ -0,0 +1,177 @@
+import inspect
+import math
+import queue
+import threading
+import time
+from collections import deque
+
+# Marks the end of a stage's input
+DONE = object()
+
+# Most recent per-item timings kept for percentiles
+LATENCY_SAMPLES = 4096
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list (0.0 when empty)"""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+class StageStats:
+    """Timing counters for one pipeline stage"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, seconds, error=False):
+        with self._lock:
+            self.count += 1
+            self.samples.append(seconds)
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            if error:
+                self.errors += 1
+
+    def to_dict(self):
+        with self._lock:
+            samples = sorted(self.samples)
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "total_seconds": round(self.total_seconds, 3),
+                "avg_ms": round(1000 * self.total_seconds / self.count, 1) if self.count else 0.0,
+                "p50_ms": round(1000 * percentile(samples, 0.50), 1),
+                "p95_ms": round(1000 * percentile(samples, 0.95), 1),
+                "max_ms": round(1000 * self.max_seconds, 1)
+            }
+
+class Stage:
+    """
+    A pool of worker threads applying fn to items taken from a bounded queue.
+
+    fn returns the item to pass downstream, or None to drop it, in which case
+    on_drop(item) is called. When fn raises, on_error(item, exception) is
+    called and the item is dropped.
+    Because the input queue is bounded, a slow stage blocks the stage
+    feeding it instead of letting work pile up in memory.
+    """
+
+    def __init__(self, name, fn, workers=1, queue_size=8, on_error=None, on_drop=None):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.input = queue.Queue(maxsize=max(1, queue_size))
+        self.on_error = on_error
+        self.on_drop = on_drop
+        self.stats = StageStats()
+        self._output = None
+        self._threads = []
+        self._alive = 0
+        self._alive_lock = threading.Lock()
+
+    def start(self, output):
+        """Start the workers, sending results to the output queue"""
+        self._output = output
+        self._alive = self.workers
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _finish_worker(self):
+        with self._alive_lock:
+            self._alive -= 1
+            last = self._alive == 0
+        if last:
+            self._output.put(DONE)
+        else:
+            # Let the sibling workers see the end of input too
+            self.input.put(DONE)
+
+    def _process(self, item):
+        start = time.perf_counter()
+        try:
+            result = self.fn(item)
+        except Exception as e:
+            self.stats.record(time.perf_counter() - start, error=True)
+            print(f"Stage {self.name} failed: {e}")
+            if self.on_error:
+                self.on_error(item, e)
+            return
+        self.stats.record(time.perf_counter() - start)
+        if result is not None:
+            self._output.put(result)
+        elif self.on_drop:
+            self.on_drop(item)
+
+    def _run(self):
+        while True:
+            item = self.input.get()
+            if item is DONE:
+                self._finish_worker()
+                return
+            self._process(item)
+
+class BatchStage(Stage):
+    """
+    A single-worker stage that groups items into lists of up to batch_size.
+
+    A partial batch is flushed once no new item arrives within max_wait
+    seconds, so a trickle of items is not held back indefinitely.
+    """
+
+    def __init__(self, name, fn, batch_size=16, max_wait=0.5, queue_size=8, on_error=None):
+        super().__init__(name, fn, workers=1, queue_size=queue_size, on_error=on_error)
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait
+
+    def _run(self):
+        batch = []
+        while True:
+            try:
+                item = self.input.get(timeout=self.max_wait if batch else None)
+            except queue.Empty:
+                self._process(batch)
+                batch = []
+                continue
+
+            if item is DONE:
+                if batch:
+                    self._process(batch)
+                self._finish_worker()
+                return
+
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._process(batch)
+                batch = []
+
+def progress_reporter(callback):
+    """
+    Wrap a progress callback as report(current, total, stage_timings).
+
+    Callbacks that accept a stage_timings argument (or **kwargs) receive the
+    per-stage timings; plain callback(current, total) callbacks keep working.
+    """
+    if not callback:
+        return lambda current, total, stage_timings: None
+
+    try:
+        params = inspect.signature(callback).parameters.values()
+        wants_timings = any(p.name == "stage_timings" or p.kind == p.VAR_KEYWORD for p in params)
+    except (TypeError, ValueError):
+        wants_timings = False
+
+    def report(current, total, stage_timings):
+        if wants_timings:
+            callback(current, total, stage_timings=stage_timings)
+        else:
+            callback(current, total)
+
+    return report
@@ -0,0 +1,339 @@
+"""
+Offline replay of ingestion from recorded feeds and article pages.
+
+An archive is a directory holding index.json (URL -> status, headers and
+body file) and the raw bodies under bodies/. A live run is captured with
+RecordingAdapter and replayed with ReplayAdapter, which serves every
+request from the archive after an injected latency; nothing touches the
+network, so throughput runs are reproducible in CI and on laptops. The
+archive can also be served by a local stand-in HTTP server, and requests
+routed to it with ServerReplayAdapter, to keep a real socket round trip
+in the measurement.
+
+Run with:
+    python -m app.replay record ARCHIVE [--articles N]
+    python -m app.replay ingest ARCHIVE [--articles N] [--latency SECONDS]
+    python -m app.replay serve ARCHIVE [--port PORT] [--latency SECONDS]
+
+The CLI runs against scratch ingestion state, so the live stores and feed
+state are left alone. Long-running processes (Streamlit, the scheduler) replay when
+INGEST_REPLAY_DIR or INGEST_REPLAY_SERVER is set, and record when
+INGEST_RECORD_DIR is set.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import urlparse, parse_qs, quote
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.http import get_session, use_adapter, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE
+
+REPLAY_LATENCY = float(os.getenv("INGEST_REPLAY_LATENCY", "0"))
+REPLAY_JITTER = 0.2  # +/- 20% of the latency
+
+# Hop-by-hop and encoding headers no longer describe the stored (decoded) body
+SKIPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+class Archive:
+    """Recorded responses keyed by URL, stored as index.json plus one body file per URL"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._index = {}
+        index_path = os.path.join(directory, "index.json")
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                self._index = json.load(f)
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def feeds(self):
+        """Feed URLs the archive was recorded from"""
+        feeds_path = os.path.join(self.directory, "feeds.json")
+        if not os.path.exists(feeds_path):
+            return []
+        with open(feeds_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_feeds(self, feed_urls):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "feeds.json"), 'w', encoding='utf-8') as f:
+            json.dump(list(feed_urls), f, indent=2)
+
+    def get(self, url):
+        """Return (status, headers, body) for a recorded URL, or None"""
+        with self._lock:
+            entry = self._index.get(url)
+        if entry is None:
+            return None
+        with open(os.path.join(self.directory, entry["body"]), 'rb') as f:
+            return entry["status"], entry["headers"], f.read()
+
+    def put(self, url, status, headers, body):
+        name = os.path.join("bodies", hashlib.sha1(url.encode('utf-8')).hexdigest())
+        os.makedirs(os.path.join(self.directory, "bodies"), exist_ok=True)
+        with open(os.path.join(self.directory, name), 'wb') as f:
+            f.write(body)
+        headers = {k: v for k, v in headers.items() if k.lower() not in SKIPPED_HEADERS}
+        with self._lock:
+            self._index[url] = {"status": status, "headers": headers, "body": name, "recorded_at": time.time()}
+
+    def save(self):
+        """Atomically write the index"""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            data = json.dumps(self._index, ensure_ascii=False, indent=2)
+        index_path = os.path.join(self.directory, "index.json")
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, index_path)
+
+def inject_latency(latency):
+    if latency > 0:
+        time.sleep(latency * random.uniform(1 - REPLAY_JITTER, 1 + REPLAY_JITTER))
+
+def recorded_response(archive, url, request_headers=None):
+    """(status, headers, body) for a URL, honouring If-None-Match like the origin did"""
+    recorded = archive.get(url)
+    if recorded is None:
+        return 404, {}, b""
+    status, headers, body = recorded
+    etag = CaseInsensitiveDict(headers).get("ETag")
+    if etag and request_headers and request_headers.get("If-None-Match") == etag:
+        return 304, headers, b""
+    return status, headers, body
+
+class ReplayAdapter(BaseAdapter):
+    """Transport adapter that answers requests from an Archive instead of the network"""
+
+    def __init__(self, archive, latency=REPLAY_LATENCY):
+        super().__init__()
+        self.archive = archive if isinstance(archive, Archive) else Archive(archive)
+        self.latency = latency
+        self.requests = 0
+        self.misses = 0
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        inject_latency(self.latency)
+        status, headers, body = recorded_response(self.archive, request.url, request.headers)
+        self.requests += 1
+        if status == 404 and not headers:
+            self.misses += 1
+
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.raw = BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.reason = "Replayed"
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+class RecordingAdapter(HTTPAdapter):
+    """Pooled live transport that also writes every response into an Archive"""
+
+    def __init__(self, archive, **kwargs):
+        kwargs.setdefault("pool_connections", HTTP_POOL_CONNECTIONS)
+        kwargs.setdefault("pool_maxsize", HTTP_POOL_MAXSIZE)
+        super().__init__(**kwargs)
+        self.archive = archive if isinstance(archive, Archive) else Archive(archive)
+
+    def send(self, request, **kwargs):
+        # Always record full bodies, even for feeds this process has fetched before
+        request.headers.pop("If-None-Match", None)
+        request.headers.pop("If-Modified-Since", None)
+        response = super().send(request, **kwargs)
+        if response.status_code != 304:
+            self.archive.put(request.url, response.status_code, dict(response.headers), response.content)
+        return response
+
+class ServerReplayAdapter(HTTPAdapter):
+    """Sends every request to a local stand-in server started with serve_archive()"""
+
+    def __init__(self, server_url, **kwargs):
+        super().__init__(**kwargs)
+        self.server_url = server_url.rstrip('/')
+
+    def send(self, request, **kwargs):
+        original_url = request.url
+        request.url = f"{self.server_url}/replay?url={quote(original_url, safe='')}"
+        try:
+            response = super().send(request, **kwargs)
+        finally:
+            request.url = original_url
+        response.url = original_url
+        return response
+
+def serve_archive(directory, host="127.0.0.1", port=0, latency=REPLAY_LATENCY):
+    """Serve an archive over HTTP on a background thread, returning the server"""
+    archive = Archive(directory)
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            url = parse_qs(urlparse(self.path).query).get("url", [""])[0]
+            inject_latency(latency)
+            status, headers, body = recorded_response(archive, url, self.headers)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="replay-server", daemon=True).start()
+    return server
+
+@contextmanager
+def replay(directory, latency=REPLAY_LATENCY):
+    """Serve all HTTP of the shared session from a recorded archive while in the block"""
+    with use_adapter(ReplayAdapter(directory, latency)) as adapter:
+        yield adapter
+
+@contextmanager
+def record(directory):
+    """Record all HTTP of the shared session into an archive while in the block"""
+    adapter = RecordingAdapter(directory)
+    try:
+        with use_adapter(adapter):
+            yield adapter
+    finally:
+        adapter.archive.save()
+
+# Settings pointing every piece of ingestion state at one directory
+STATE_ENV = {
+    "FEED_STATE_FILE": "feed_state.json",
+    "FEED_REGISTRY_FILE": "feeds.json",
+    "FALLBACK_DB_FILE": "news_articles.db",
+    "DEDUP_DB_FILE": "near_duplicates.db",
+    "EXTRACTION_PROFILE_FILE": "extraction_profiles.json",
+    "CHROMA_PATH": "chroma_db",
+    "NUMPY_INDEX_DIR": "vector_index",
+    "EMBEDDING_CACHE_DIR": "embedding_cache",
+    "INGEST_JOURNAL_FILE": "ingest_journal.db",
+    "BM25_DB_FILE": "bm25_index.db"
+}
+
+def use_scratch_state(directory):
+    """
+    Point all ingestion state (feed state, seen URLs, stores, caches) at a
+    scratch directory, so a recording or replay starts from nothing and does
+    not touch the real stores. Must run before app.ingest is imported.
+    """
+    if "app.ingest" in sys.modules:
+        raise RuntimeError("use_scratch_state() must be called before app.ingest is imported")
+    os.makedirs(directory, exist_ok=True)
+    for name, filename in STATE_ENV.items():
+        os.environ[name] = os.path.join(directory, filename)
+
+def activate_from_env():
+    """Mount a replay or recording adapter for the whole process when configured by environment"""
+    replay_dir = os.getenv("INGEST_REPLAY_DIR")
+    replay_server = os.getenv("INGEST_REPLAY_SERVER")
+    record_dir = os.getenv("INGEST_RECORD_DIR")
+    if not (replay_dir or replay_server or record_dir):
+        return None
+
+    if replay_dir:
+        adapter = ReplayAdapter(replay_dir, float(os.getenv("INGEST_REPLAY_LATENCY", REPLAY_LATENCY)))
+        print(f"Replaying ingestion from {replay_dir} ({len(adapter.archive)} recorded responses)")
+    elif replay_server:
+        adapter = ServerReplayAdapter(replay_server)
+        print(f"Replaying ingestion through {replay_server}")
+    else:
+        adapter = RecordingAdapter(record_dir)
+        print(f"Recording ingestion into {record_dir}")
+        import atexit
+        atexit.register(adapter.archive.save)
+
+    session = get_session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return adapter
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay ingestion traffic")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Fetch live feeds and articles into an archive")
+    record_parser.add_argument("archive")
+    record_parser.add_argument("--articles", type=int, default=30)
+    record_parser.add_argument("--feeds", nargs="*", metavar="FEED_URL", help="Feeds to record (default: NEWS_SOURCES)")
+
+    ingest_parser = subparsers.add_parser("ingest", help="Run ingest_news against an archive")
+    ingest_parser.add_argument("archive")
+    ingest_parser.add_argument("--articles", type=int, default=30)
+    ingest_parser.add_argument("--latency", type=float, default=REPLAY_LATENCY, help="Seconds added per request")
+    ingest_parser.add_argument("--misinfo", choices=["local", "gemini"], default="local",
+                               help="Misinformation detector; local keeps the replay offline and reproducible")
+
+    serve_parser = subparsers.add_parser("serve", help="Serve an archive as a local stand-in server")
+    serve_parser.add_argument("archive")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--latency", type=float, default=REPLAY_LATENCY, help="Seconds added per request")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        server = serve_archive(args.archive, port=args.port, latency=args.latency)
+        print(f"Serving {args.archive} on http://127.0.0.1:{server.server_port} "
+              f"(set INGEST_REPLAY_SERVER to use it)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    with tempfile.TemporaryDirectory(prefix="replay-state-") as state_dir:
+        use_scratch_state(state_dir)
+        if args.command == "ingest":
+            # Read when fact_checking.misinfo is imported, and wins over .env
+            os.environ["MISINFO_BACKEND"] = args.misinfo
+        from app.ingest import iter_rss_articles, ingest_news, NEWS_SOURCES
+
+        if args.command == "record":
+            feed_urls = args.feeds or NEWS_SOURCES
+            with record(args.archive) as adapter:
+                articles = iter_rss_articles(feed_urls=feed_urls)
+                count = sum(1 for _ in itertools.islice(articles, args.articles))
+                articles.close()
+                adapter.archive.save_feeds(feed_urls)
+            print(f"Recorded {len(adapter.archive)} responses for {count} articles into {args.archive}")
+        else:
+            archive = Archive(args.archive)
+            with replay(archive, latency=args.latency) as adapter:
+                start = time.perf_counter()
+                count = ingest_news(max_articles=args.articles, feed_urls=archive.feeds)
+                elapsed = time.perf_counter() - start
+            print(f"Replayed ingestion of {count} articles in {elapsed:.1f}s "
+                  f"({adapter.requests} requests, {adapter.misses} not in archive)")
+
+if __name__ == "__main__":
+    main()
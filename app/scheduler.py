@@ -0,0 +1,150 @@
+"""
+Background ingestion scheduler.
+
+Polls every enabled feed in the feed registry on its own adaptive interval:
+feeds that publish often are polled often, quiet feeds back off towards
+MAX_POLL_INTERVAL. Intervals are jittered so polls do not synchronise, and
+a global worker budget caps how many feeds are ingested at once, keeping
+network and LLM load smooth.
+
+Run with:  python -m app.scheduler [--workers N] [--add FEED_URL ...] [--once]
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ingest import ingest_news, get_feed_registry, get_feed_state_store, forget_articles
+from retrieval.retention import CompactionThread
+
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "2"))
+MIN_POLL_INTERVAL = int(os.getenv("MIN_POLL_INTERVAL", "120"))
+MAX_POLL_INTERVAL = int(os.getenv("MAX_POLL_INTERVAL", "3600"))
+TARGET_ENTRIES_PER_POLL = 2.0  # Aim to find about this many new entries per poll
+POLL_JITTER = 0.15              # +/- 15% of the interval
+MAX_ARTICLES_PER_POLL = int(os.getenv("MAX_ARTICLES_PER_POLL", "10"))
+
+def compute_interval(publish_rate_per_hour):
+    """Polling interval in seconds for a feed publishing at the given rate"""
+    if not publish_rate_per_hour:
+        return MAX_POLL_INTERVAL
+    interval = 3600 * TARGET_ENTRIES_PER_POLL / publish_rate_per_hour
+    return max(MIN_POLL_INTERVAL, min(MAX_POLL_INTERVAL, interval))
+
+def with_jitter(interval):
+    return interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+
+class FeedScheduler:
+    """Polls registered feeds on adaptive, jittered intervals with a bounded worker pool"""
+
+    def __init__(self, registry=None, state_store=None, workers=SCHEDULER_WORKERS,
+                 max_articles_per_poll=MAX_ARTICLES_PER_POLL, compaction=True):
+        self.registry = registry or get_feed_registry()
+        self.state_store = state_store or get_feed_state_store()
+        self.workers = max(1, workers)
+        self.max_articles_per_poll = max_articles_per_poll
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # Retention compaction runs next to polling so the index stays bounded
+        self.compaction = CompactionThread(on_evicted=forget_articles) if compaction else None
+        self.polls = 0
+        self.articles_ingested = 0
+
+    def due_feeds(self, now=None):
+        """Enabled feeds whose next poll time has passed, most overdue first"""
+        now = now or time.time()
+        due = []
+        for url in self.registry.enabled_urls():
+            next_poll_at = self.state_store.get(url).get("next_poll_at") or 0
+            if next_poll_at <= now:
+                due.append((next_poll_at, url))
+        return [url for _, url in sorted(due)]
+
+    def poll(self, feed_url):
+        """Ingest new articles from one feed and schedule its next poll"""
+        try:
+            # One misinformation worker per poll keeps concurrent LLM calls within the worker budget
+            count = ingest_news(max_articles=self.max_articles_per_poll, feed_urls=[feed_url], misinfo_workers=1)
+            with self._lock:
+                self.articles_ingested += count
+        except Exception as e:
+            print(f"Scheduled poll of {feed_url} failed: {e}")
+        finally:
+            rate = self.state_store.get(feed_url).get("publish_rate_per_hour")
+            interval = compute_interval(rate)
+            next_poll_at = time.time() + with_jitter(interval)
+            self.state_store.schedule(feed_url, interval, next_poll_at)
+            self.state_store.save()
+            print(f"Next poll of {feed_url} in {next_poll_at - time.time():.0f}s "
+                  f"(rate {rate or 0:.2f}/h)")
+            with self._lock:
+                self.polls += 1
+                self._in_flight.discard(feed_url)
+
+    def run(self, once=False):
+        """Poll due feeds until stop() is called (or a single round when once=True)"""
+        print(f"Scheduler started with {self.workers} workers for {len(self.registry.enabled_urls())} feeds")
+        if self.compaction and not once and not self.compaction.is_alive():
+            self.compaction.start()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while not self._stop.is_set():
+                for url in self.due_feeds():
+                    with self._lock:
+                        if url in self._in_flight or len(self._in_flight) >= self.workers:
+                            continue
+                        self._in_flight.add(url)
+                    executor.submit(self.poll, url)
+
+                if once:
+                    break
+                self._stop.wait(self.seconds_until_next_poll())
+
+    def seconds_until_next_poll(self):
+        """How long the loop can sleep, re-checking at least every few seconds for freed workers"""
+        next_times = [self.state_store.get(url).get("next_poll_at") or 0 for url in self.registry.enabled_urls()]
+        if not next_times:
+            return 5.0
+        return max(0.5, min(5.0, min(next_times) - time.time()))
+
+    def stop(self):
+        self._stop.set()
+        if self.compaction:
+            self.compaction.stop()
+
+    def get_stats(self):
+        """Get scheduler statistics for monitoring"""
+        with self._lock:
+            return {
+                "feeds": len(self.registry.enabled_urls()),
+                "in_flight": len(self._in_flight),
+                "polls": self.polls,
+                "articles_ingested": self.articles_ingested
+            }
+
+def main():
+    parser = argparse.ArgumentParser(description="Background news ingestion scheduler")
+    parser.add_argument("--workers", type=int, default=SCHEDULER_WORKERS, help="Feeds ingested concurrently")
+    parser.add_argument("--add", nargs="*", default=[], metavar="FEED_URL", help="Register feeds before starting")
+    parser.add_argument("--once", action="store_true", help="Poll every due feed once and exit")
+    args = parser.parse_args()
+
+    for url in args.add:
+        get_feed_registry().add(url)
+        print(f"Registered feed: {url}")
+
+    scheduler = FeedScheduler(workers=args.workers)
+    try:
+        scheduler.run(once=args.once)
+    except KeyboardInterrupt:
+        scheduler.stop()
+    print(f"Scheduler stopped: {scheduler.get_stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import threading
+
+from utils.urls import canonicalize_url
+
+class SeenUrlIndex:
+    """
+    Set of canonical URLs that are already stored, consulted before any download.
+
+    The index is backed by the article store: on first use it is seeded from
+    loader(), which returns every stored URL, and ingestion adds new URLs as
+    they are written. It therefore never disagrees with the store after a
+    restart.
+    """
+
+    def __init__(self, loader=None):
+        self._loader = loader
+        self._urls = None
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+
+    def _ensure_loaded(self):
+        if self._urls is not None:
+            return
+        urls = set()
+        if self._loader:
+            try:
+                urls = {canonicalize_url(url) for url in self._loader() if url}
+            except Exception as e:
+                print(f"Error seeding seen-URL index: {e}")
+        self._urls = urls
+        print(f"Seen-URL index loaded with {len(urls)} stored URLs")
+
+    def __contains__(self, url):
+        with self._lock:
+            self._ensure_loaded()
+            self.lookups += 1
+            if canonicalize_url(url) in self._urls:
+                self.hits += 1
+                return True
+            return False
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._urls)
+
+    def add(self, url):
+        with self._lock:
+            self._ensure_loaded()
+            self._urls.add(canonicalize_url(url))
+
+    def reset(self):
+        """Drop the in-memory set so it is re-seeded from the store on next use"""
+        with self._lock:
+            self._urls = None
+
+    def get_stats(self):
+        """Get lookup statistics for monitoring"""
+        with self._lock:
+            return {
+                "indexed_urls": len(self._urls) if self._urls is not None else 0,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0
+            }
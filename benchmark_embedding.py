@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark batched embedding and bulk ChromaDB writes at different batch sizes
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = (
+    "government election minister economy market climate storm police court report "
+    "health hospital vaccine research university study data official statement war "
+    "peace talks border trade energy oil prices inflation bank rates city council "
+    "school teachers students technology company shares investors football match"
+).split()
+
+def make_corpus(n_articles, words_per_article=400, seed=42):
+    """Generate a deterministic synthetic corpus of article texts"""
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(WORDS) for _ in range(words_per_article)) for _ in range(n_articles)]
+
+def bench_encode(model, texts, batch_size):
+    """Encode the whole corpus in chunks of batch_size, returning articles/sec"""
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        model.encode(texts[i:i + batch_size], batch_size=batch_size)
+    return len(texts) / (time.perf_counter() - start)
+
+def bench_encode_and_store(model, client, texts, batch_size):
+    """Encode and bulk-add the corpus into a scratch collection, returning articles/sec"""
+    try:
+        client.delete_collection("benchmark_embedding")
+    except Exception:
+        pass
+    collection = client.get_or_create_collection("benchmark_embedding")
+
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        chunk = texts[i:i + batch_size]
+        embeddings = model.encode(chunk, batch_size=batch_size)
+        collection.add(
+            ids=[f"doc-{i + j}" for j in range(len(chunk))],
+            documents=chunk,
+            embeddings=[embedding.tolist() for embedding in embeddings]
+        )
+    elapsed = time.perf_counter() - start
+
+    client.delete_collection("benchmark_embedding")
+    return len(texts) / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=128, help="Number of synthetic articles")
+    parser.add_argument("--batch-sizes", default="1,4,8,16,32,64", help="Comma separated batch sizes")
+    args = parser.parse_args()
+
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        print("✗ sentence-transformers is not installed, nothing to benchmark")
+        return False
+
+    try:
+        import chromadb
+        client = chromadb.Client()
+    except ImportError:
+        client = None
+        print("⚠️  chromadb is not installed, only measuring encode()")
+
+    print("Loading sentence transformer model...")
+    model = SentenceTransformer('all-MiniLM-L6-v2')
+    texts = make_corpus(args.articles)
+    batch_sizes = [int(size) for size in args.batch_sizes.split(',')]
+
+    # Warm up so the first measurement does not pay for lazy initialisation
+    model.encode(texts[:2])
+
+    print(f"\n=== Embedding benchmark ({len(texts)} articles) ===")
+    print(f"{'batch':>6} {'encode art/s':>14} {'encode+add art/s':>18}")
+    for batch_size in batch_sizes:
+        encode_rate = bench_encode(model, texts, batch_size)
+        store_rate = bench_encode_and_store(model, client, texts, batch_size) if client else None
+        store_col = f"{store_rate:18.1f}" if store_rate is not None else f"{'n/a':>18}"
+        print(f"{batch_size:>6} {encode_rate:14.1f} {store_col}")
+
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
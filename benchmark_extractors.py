@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark parse time per article for each HTML extractor on the same pages,
+and extraction throughput with the parsing process pool at several sizes
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+import statistics
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.extract
+from app.extract import (NEWSPAPER_AVAILABLE, parse_with_newspaper, parse_with_soup, fetch_html,
+                         extract_from_html, ExtractionPool, ExtractionProfileCache)
+from benchmark_embedding import make_corpus
+
+def make_page(text, seed):
+    """Wrap article text in a page with typical navigation, ads and footer clutter"""
+    rng = random.Random(seed)
+    nav = ''.join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(40))
+    paragraphs = ''.join(f'<p>{text[i:i + 300]}</p>' for i in range(0, len(text), 300))
+    related = ''.join(f'<div class="promo"><a href="/story/{rng.randint(0, 10**6)}">Related story</a></div>'
+                      for _ in range(30))
+    return (f'<html><head><title>Story {seed}</title></head><body><header><ul>{nav}</ul></header>'
+            f'<main><h1>Headline {seed}</h1><article class="article-body">{paragraphs}</article></main>'
+            f'<aside>{related}</aside><footer><p>Copyright</p></footer></body></html>').encode()
+
+def load_pages(args):
+    """Download each URL once, or build synthetic pages"""
+    if args.urls:
+        pages = []
+        for url in args.urls:
+            try:
+                pages.append((url, fetch_html(url)))
+            except Exception as e:
+                print(f"✗ Could not download {url}: {e}")
+        return pages
+    return [(f"https://example.com/story/{i}", make_page(text, i))
+            for i, text in enumerate(make_corpus(args.pages, words_per_article=800))]
+
+def benchmark_pool(pages, process_counts, chunksize):
+    """Pages per second through extract_from_html in-process and through the process pool"""
+    print(f"\n=== Extraction throughput ({len(pages)} pages, chunks of {chunksize}) ===")
+    start = time.perf_counter()
+    for url, html in pages:
+        extract_from_html(url, html)
+    elapsed = time.perf_counter() - start
+    print(f"{'in-process':<28} {len(pages) / elapsed:9.1f} pages/s")
+
+    for processes in process_counts:
+        pool = ExtractionPool(processes, chunksize)
+        # Warm up so worker start-up is not measured
+        list(pool.imap((i, url, html) for i, (url, html) in enumerate(pages[:processes * chunksize])))
+        start = time.perf_counter()
+        parsed = sum(1 for _, result in pool.imap((i, url, html) for i, (url, html) in enumerate(pages)) if result)
+        elapsed = time.perf_counter() - start
+        pool.shutdown()
+        print(f"{f'{processes} processes':<28} {len(pages) / elapsed:9.1f} pages/s ({parsed} parsed)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=50, help="Number of synthetic pages")
+    parser.add_argument("--urls", nargs="*", help="Benchmark these live article URLs instead")
+    parser.add_argument("--processes", default="", help="Comma separated process pool sizes to compare, e.g. 1,2,4")
+    parser.add_argument("--chunksize", type=int, default=4, help="Pages per process pool task")
+    args = parser.parse_args()
+
+    # Learn selector profiles in a scratch file, never in the live extraction_profiles.json;
+    # pool workers read the path from the environment
+    profile_path = os.path.join(tempfile.mkdtemp(prefix="benchmark-extractors-"), "extraction_profiles.json")
+    os.environ["EXTRACTION_PROFILE_FILE"] = profile_path
+    app.extract.extraction_profiles = ExtractionProfileCache(profile_path)
+
+    extractors = [("beautifulsoup/html.parser", lambda url, html: parse_with_soup(html, 'html.parser'))]
+    try:
+        import lxml  # noqa: F401
+        extractors.append(("beautifulsoup/lxml", lambda url, html: parse_with_soup(html, 'lxml')))
+    except ImportError:
+        print("⚠️  lxml not installed, skipping the lxml parser")
+    if NEWSPAPER_AVAILABLE:
+        extractors.insert(0, ("newspaper3k", parse_with_newspaper))
+
+    pages = load_pages(args)
+    if not pages:
+        print("✗ No pages to benchmark")
+        return False
+
+    print(f"\n=== Extractor benchmark ({len(pages)} pages, each downloaded once) ===")
+    print(f"{'extractor':<28} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'ok':>5}")
+    for name, extract in extractors:
+        timings = []
+        successes = 0
+        for url, html in pages:
+            start = time.perf_counter()
+            try:
+                _, text = extract(url, html)
+                successes += bool(text) and len(text.strip()) > 100
+            except Exception:
+                pass
+            timings.append(1000 * (time.perf_counter() - start))
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(0.95 * len(timings)))]
+        print(f"{name:<28} {statistics.mean(timings):9.2f} {statistics.median(timings):8.2f} "
+              f"{p95:8.2f} {successes:>5}")
+
+    if args.processes:
+        benchmark_pool(pages, [int(n) for n in args.processes.split(',')], args.chunksize)
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
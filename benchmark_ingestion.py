@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark ingest_news throughput and per-stage latency at different concurrency and batch settings.
+
+Each configuration runs in its own process against a recorded archive (or a
+synthetic one built on the fly) replayed offline, with fresh scratch state,
+so runs are comparable and peak RSS is measured per configuration.
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import itertools
+import subprocess
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_embedding import make_corpus
+
+STAGES = ["feed", "extract", "dedup", "misinfo", "embed", "store"]
+ARTICLES_PER_FEED = 10  # fetch_feed hands over at most 10 entries per feed
+
+RSS = '<?xml version="1.0"?><rss version="2.0"><channel><title>{title}</title>{items}</channel></rss>'
+ITEM = '<item><title>Story {n}</title><link>{link}</link><guid>{link}</guid></item>'
+
+def build_synthetic_archive(directory, n_articles, hosts=4):
+    """Record a synthetic corpus of n_articles distinct pages spread over several feeds and hosts"""
+    from app.replay import Archive
+    from benchmark_extractors import make_page
+
+    archive = Archive(directory)
+    texts = make_corpus(n_articles, words_per_article=600)
+    feed_urls = []
+    for feed_number, start in enumerate(range(0, n_articles, ARTICLES_PER_FEED)):
+        items = []
+        for n in range(start, min(start + ARTICLES_PER_FEED, n_articles)):
+            link = f"https://news{n % hosts}.bench.example/story/{n}"
+            archive.put(link, 200, {"Content-Type": "text/html; charset=utf-8"}, make_page(texts[n], n))
+            items.append(ITEM.format(n=n, link=link))
+        feed_url = f"https://feeds.bench.example/feed/{feed_number}.xml"
+        body = RSS.format(title=f"Bench Feed {feed_number}", items=''.join(items)).encode()
+        archive.put(feed_url, 200, {"Content-Type": "application/rss+xml"}, body)
+        feed_urls.append(feed_url)
+    archive.save()
+    archive.save_feeds(feed_urls)
+    return archive
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def run_one(args):
+    """Child process: one ingestion run with the given settings, printing a JSON result"""
+    from app.replay import use_scratch_state, Archive
+
+    fetch_workers, misinfo_workers = int(args.fetch_workers), int(args.misinfo_workers)
+    with tempfile.TemporaryDirectory(prefix="bench-state-") as state_dir:
+        use_scratch_state(state_dir)
+        os.environ["MISINFO_BACKEND"] = args.misinfo
+        os.environ["INGEST_REPLAY_DIR"] = args.archive
+        os.environ["INGEST_REPLAY_LATENCY"] = str(args.latency)
+
+        from app.ingest import ingest_news, get_ingest_stats
+
+        start = time.perf_counter()
+        count = ingest_news(max_articles=args.articles, batch_size=args.batch_size, fetch_workers=fetch_workers,
+                            misinfo_workers=misinfo_workers, feed_urls=Archive(args.archive).feeds)
+        elapsed = time.perf_counter() - start
+
+    result = {
+        "fetch_workers": fetch_workers,
+        "misinfo_workers": misinfo_workers,
+        "batch_size": args.batch_size,
+        "misinfo": args.misinfo,
+        "articles": count,
+        "seconds": round(elapsed, 3),
+        "articles_per_second": round(count / elapsed, 2) if elapsed else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": get_ingest_stats()
+    }
+    print("RESULT " + json.dumps(result))
+
+def run_config(args, fetch_workers, misinfo_workers, batch_size):
+    command = [sys.executable, os.path.abspath(__file__), "--run-one", "--archive", args.archive,
+               "--articles", str(args.articles), "--latency", str(args.latency),
+               "--fetch-workers", str(fetch_workers), "--misinfo-workers", str(misinfo_workers),
+               "--batch-size", str(batch_size), "--misinfo", args.misinfo]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    for line in completed.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    print(completed.stdout[-2000:], completed.stderr[-2000:])
+    raise RuntimeError(f"Benchmark run failed (exit code {completed.returncode})")
+
+def config_key(result):
+    return f"fw{result['fetch_workers']}-mw{result['misinfo_workers']}-bs{result['batch_size']}"
+
+def print_result(result):
+    print(f"\n{config_key(result)}: {result['articles']} articles in {result['seconds']}s, "
+          f"{result['articles_per_second']} articles/s, peak RSS {result['peak_rss_mb']} MB")
+    print(f"  {'stage':<8} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'total s':>8}")
+    for stage in STAGES:
+        timing = result["stages"].get(stage)
+        if timing:
+            print(f"  {stage:<8} {timing['count']:>6} {timing['p50_ms']:>8} {timing['p95_ms']:>8} "
+                  f"{timing['total_seconds']:>8}")
+
+def compare_to_baseline(results, baseline_path, tolerance):
+    """Print throughput change per configuration; returns False if any regressed beyond tolerance"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {config_key(result): result for result in json.load(f)["results"]}
+
+    ok = True
+    print(f"\n=== Compared to {baseline_path} ===")
+    for result in results:
+        previous = baseline.get(config_key(result))
+        if not previous or not previous["articles_per_second"]:
+            print(f"{config_key(result):<20} no baseline")
+            continue
+        change = result["articles_per_second"] / previous["articles_per_second"] - 1
+        regressed = change < -tolerance
+        ok = ok and not regressed
+        print(f"{config_key(result):<20} {previous['articles_per_second']:>8} -> {result['articles_per_second']:>8} "
+              f"articles/s ({change:+.1%}){'  ✗ REGRESSION' if regressed else ''}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=50, help="Articles to ingest per run")
+    parser.add_argument("--archive", help="Recorded archive to replay (default: a synthetic corpus)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds of injected latency per request")
+    parser.add_argument("--fetch-workers", default="4,16", help="Comma separated fetch worker counts")
+    parser.add_argument("--misinfo-workers", default="2", help="Comma separated misinformation worker counts")
+    parser.add_argument("--batch-sizes", default="16", help="Comma separated ingestion batch sizes")
+    parser.add_argument("--misinfo", choices=["local", "gemini"], default="local",
+                        help="Misinformation detector; gemini includes live LLM latency in the results")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against results previously written with --output")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed throughput drop before failing")
+    parser.add_argument("--batch-size", type=int, default=16, help=argparse.SUPPRESS)
+    parser.add_argument("--run-one", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(args)
+        return True
+
+    with tempfile.TemporaryDirectory(prefix="bench-archive-") as synthetic_dir:
+        if not args.archive:
+            build_synthetic_archive(synthetic_dir, args.articles)
+            args.archive = synthetic_dir
+            print(f"Built synthetic archive of {args.articles} articles")
+
+        configs = itertools.product([int(n) for n in args.fetch_workers.split(',')],
+                                    [int(n) for n in args.misinfo_workers.split(',')],
+                                    [int(n) for n in args.batch_sizes.split(',')])
+
+        print(f"\n=== Ingestion benchmark ({args.articles} articles, {args.latency}s latency per request, "
+              f"{args.misinfo} misinformation detector) ===")
+        results = []
+        for fetch_workers, misinfo_workers, batch_size in configs:
+            result = run_config(args, fetch_workers, misinfo_workers, batch_size)
+            print_result(result)
+            results.append(result)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"articles": args.articles, "latency": args.latency, "created_at": time.time(),
+                       "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        return compare_to_baseline(results, args.baseline, args.tolerance)
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -5,9 +5,10 @@ import hashlib
 import json
 from typing import Tuple, Optional
 import logging
-import google.generativeai as genai
 from dotenv import load_dotenv
 
+from utils.resources import get_gemini_model, GEMINI_MODEL_NAME
+
 # Load environment variables with explicit path
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
 
@@ -15,35 +16,7 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(os.path.abs
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configure Gemini API
-try:
-    # Try to get API key from environment or Streamlit secrets
-    api_key = os.getenv("GEMINI_API_KEY")
-    logger.info(f"API key from environment: {'Found' if api_key else 'Not found'}")
-
-    if not api_key:
-        try:
-            import streamlit as st
-            api_key = st.secrets.get("GEMINI_API_KEY")
-            logger.info(f"API key from Streamlit secrets: {'Found' if api_key else 'Not found'}")
-        except Exception as secrets_error:
-            logger.info(f"Could not access Streamlit secrets: {secrets_error}")
-
-    if api_key:
-        # Strip any whitespace and validate format
-        api_key = api_key.strip()
-        logger.info(f"Using API key (first 10 chars): {api_key[:10]}...")
-
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        logger.info("Successfully configured Gemini API")
-    else:
-        logger.warning("No Gemini API key found - using fallback methods only")
-        model = None
-except Exception as e:
-    logger.error(f"Error configuring Gemini API: {e}")
-    logger.error(f"Error type: {type(e).__name__}")
-    model = None
+# The Gemini model is configured on first use by the shared resource registry
 
 # Simple in-memory cache for fact-checking results
 fact_check_cache = {}
@@ -118,6 +91,7 @@ def local_fact_check_fallback(query: str, context: str) -> Tuple[str, str]:
 
 def gemini_fact_check(query: str, context: str) -> Tuple[str, str]:
     """Fact-checking using Gemini API"""
+    model = get_gemini_model()
     if model is None:
         return ("API_ERROR", "Gemini model not configured properly")
     
@@ -226,14 +200,16 @@ def fact_check(query: str, context: str) -> Tuple[str, str]:
     
     # Check cache first
     cache_key = get_cache_key(query, context)
-    if cache_key in fact_check_cache:
-        cached_result, timestamp = fact_check_cache[cache_key]
+    # search_news fact-checks its results from several threads at once
+    cached = fact_check_cache.get(cache_key)
+    if cached is not None:
+        cached_result, timestamp = cached
         if is_cache_valid(timestamp):
             logger.info("Using cached fact-check result")
             return cached_result
         else:
             # Remove expired cache entry
-            del fact_check_cache[cache_key]
+            fact_check_cache.pop(cache_key, None)
     
     # Perform fact-checking
     verdict, explanation = enhanced_fact_check(query, context)
@@ -289,8 +265,8 @@ def detailed_analysis(query: str, context: str) -> dict:
 def get_api_info() -> dict:
     """Get information about the API configuration"""
     return {
-        "api_configured": model is not None,
-        "model_name": "gemini-1.5-flash",
+        "api_configured": get_gemini_model() is not None,
+        "model_name": GEMINI_MODEL_NAME,
         "rate_limits": {
             "requests_per_minute": 15,
             "requests_per_day": 1500,
@@ -301,7 +277,7 @@ def get_api_info() -> dict:
 def get_cache_stats() -> dict:
     """Get cache statistics for monitoring"""
     total_entries = len(fact_check_cache)
-    valid_entries = sum(1 for _, (_, timestamp) in fact_check_cache.items() 
+    valid_entries = sum(1 for _, (_, timestamp) in list(fact_check_cache.items()) 
                        if is_cache_valid(timestamp))
     
     return {
@@ -313,11 +289,11 @@ def get_cache_stats() -> dict:
 
 def clear_expired_cache():
     """Manually clear expired cache entries"""
-    expired_keys = [key for key, (_, timestamp) in fact_check_cache.items() 
+    expired_keys = [key for key, (_, timestamp) in list(fact_check_cache.items()) 
                    if not is_cache_valid(timestamp)]
     
     for key in expired_keys:
-        del fact_check_cache[key]
+        fact_check_cache.pop(key, None)
     
     logger.info(f"Cleared {len(expired_keys)} expired cache entries")
     return len(expired_keys)
@@ -4,9 +4,10 @@ import time
 import hashlib
 import re
 from dotenv import load_dotenv
+
+from utils.resources import get_gemini_model, GEMINI_MODEL_NAME
 from typing import Tuple, List, Dict
 import logging
-import google.generativeai as genai
 
 # Load environment variables with explicit path
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
@@ -15,35 +16,10 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(os.path.abs
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configure Gemini API
-try:
-    # Try to get API key from environment or Streamlit secrets
-    api_key = os.getenv("GEMINI_API_KEY")
-    logger.info(f"API key from environment: {'Found' if api_key else 'Not found'}")
+# The Gemini model is configured on first use by the shared resource registry
 
-    if not api_key:
-        try:
-            import streamlit as st
-            api_key = st.secrets.get("GEMINI_API_KEY")
-            logger.info(f"API key from Streamlit secrets: {'Found' if api_key else 'Not found'}")
-        except Exception as secrets_error:
-            logger.info(f"Could not access Streamlit secrets: {secrets_error}")
-
-    if api_key:
-        # Strip any whitespace and validate format
-        api_key = api_key.strip()
-        logger.info(f"Using API key (first 10 chars): {api_key[:10]}...")
-
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        logger.info("Successfully configured Gemini API for misinformation detection")
-    else:
-        logger.warning("No Gemini API key found - using fallback methods only")
-        model = None
-except Exception as e:
-    logger.error(f"Error configuring Gemini API: {e}")
-    logger.error(f"Error type: {type(e).__name__}")
-    model = None
+# gemini, or local to always use the rule-based detector (offline replays, benchmarks and CI)
+MISINFO_BACKEND = os.getenv("MISINFO_BACKEND", "gemini")
 
 # Simple in-memory cache for misinformation detection results
 misinfo_cache = {}
@@ -191,6 +167,7 @@ def local_misinfo_detection_fallback(article_text: str) -> Tuple[str, str]:
 
 def gemini_misinfo_detection(article_text: str) -> Tuple[str, str]:
     """Misinformation detection using Gemini API"""
+    model = get_gemini_model()
     if model is None:
         return ("API_ERROR", "Gemini model not configured properly")
     
@@ -309,6 +286,9 @@ def enhanced_misinfo_detection(article_text: str) -> Tuple[str, str]:
     """
     Enhanced misinformation detection using both Gemini and fallback methods
     """
+    if MISINFO_BACKEND == "local":
+        return local_misinfo_detection_fallback(article_text)
+
     try:
         # First try Gemini API
         verdict, explanation = gemini_misinfo_detection(article_text)
@@ -432,8 +412,8 @@ def comprehensive_analysis(article_text: str) -> Dict:
 def get_api_info() -> Dict:
     """Get information about the API configuration"""
     return {
-        "api_configured": model is not None,
-        "model_name": "gemini-1.5-flash",
+        "api_configured": get_gemini_model() is not None,
+        "model_name": GEMINI_MODEL_NAME,
         "rate_limits": {
             "requests_per_minute": 15,
             "requests_per_day": 1500,
@@ -44,12 +44,15 @@ def test_app_modules():
 def test_ai_models():
     """Test AI model loading"""
     try:
-        from sentence_transformers import SentenceTransformer
-        
-        # Test loading a small model
+        from utils.resources import get_embedding_model, get_resource_stats
+
+        # The shared model is loaded once per process, and reused by ingestion and search
         print("Loading sentence transformer model...")
-        model = SentenceTransformer('all-MiniLM-L6-v2')
-        print("✓ Sentence transformer model loaded successfully")
+        model = get_embedding_model()
+        if model is None:
+            raise RuntimeError(get_resource_stats()["embedding_model"].get("error") or "sentence-transformers not installed")
+        load_seconds = get_resource_stats()["embedding_model"]["load_seconds"]
+        print(f"✓ Sentence transformer model loaded successfully ({load_seconds}s)")
         
         # Test encoding
         test_text = "This is a test sentence."
@@ -143,6 +146,11 @@ def main():
         print(f"{status}: {test_name}")
     
     print(f"\nOverall: {passed}/{total} tests passed")
+
+    from utils.resources import get_resource_stats
+    for name, stats in get_resource_stats().items():
+        if stats.get("available"):
+            print(f"Loaded {name} once in {stats['load_seconds']}s")
     
     if passed == total:
         print("🎉 All health checks passed! The application is ready to run.")
@@ -0,0 +1,150 @@
+import heapq
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+BM25_DB_FILE = os.getenv("BM25_DB_FILE", "bm25_index.db")
+
+# Standard Okapi BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+def tokenize(text):
+    """Lowercased word tokens; whole words only, so 'rain' does not match 'train'"""
+    return re.findall(r"\w+", (text or "").lower())
+
+class BM25Index:
+    """
+    Persistent inverted index over stored articles with BM25 scoring.
+
+    Postings (term, document, term frequency) live in SQLite keyed by term,
+    next to per-document lengths and running corpus totals, so a query reads
+    only the postings lists of its terms instead of scanning every article.
+    Articles are indexed as they are stored; re-adding a URL replaces its
+    postings.
+    """
+
+    def __init__(self, path=BM25_DB_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                length INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc_id);
+            CREATE TABLE IF NOT EXISTS totals (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                documents INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO totals (id, documents, length) VALUES (0, 0, 0);
+        """)
+        self._conn.commit()
+        self.queries = 0
+        self.postings_read = 0
+
+    def _remove(self, url):
+        row = self._conn.execute("SELECT doc_id, length FROM documents WHERE url = ?", (url,)).fetchone()
+        if row:
+            doc_id, length = row
+            self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+            self._conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+            self._conn.execute("UPDATE totals SET documents = documents - 1, length = length - ?", (length,))
+        return row is not None
+
+    def add_many(self, articles):
+        """Index articles (title and text) in one transaction, replacing earlier versions of their URLs"""
+        if not articles:
+            return
+        with self._lock, self._conn:
+            for art in articles:
+                self._remove(art['url'])
+                counts = Counter(tokenize(art.get('title')) + tokenize(art.get('text')))
+                length = sum(counts.values())
+                doc_id = self._conn.execute("INSERT INTO documents (url, length) VALUES (?, ?)",
+                                            (art['url'], length)).lastrowid
+                self._conn.execute("UPDATE totals SET documents = documents + 1, length = length + ?", (length,))
+                self._conn.executemany("INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                                       [(term, doc_id, tf) for term, tf in counts.items()])
+
+    def remove_many(self, urls):
+        """Drop articles from the index. Returns the number removed"""
+        with self._lock, self._conn:
+            return sum(self._remove(url) for url in urls)
+
+    def search(self, query, top_k=3):
+        """Return up to top_k (url, score) pairs, best first"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        with self._lock:
+            total_docs, total_length = self._conn.execute("SELECT documents, length FROM totals").fetchone()
+            if not total_docs:
+                return []
+            avg_length = total_length / total_docs
+
+            scores = Counter()
+            for term in terms:
+                postings = self._conn.execute(
+                    "SELECT p.doc_id, p.tf, d.length FROM postings p JOIN documents d ON d.doc_id = p.doc_id "
+                    "WHERE p.term = ?", (term,)).fetchall()
+                if not postings:
+                    continue
+                self.postings_read += len(postings)
+                df = len(postings)
+                idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf, length in postings:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+            self.queries += 1
+
+            best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+            urls = dict(self._conn.execute(
+                f"SELECT doc_id, url FROM documents WHERE doc_id IN ({','.join('?' * len(best))})",
+                [doc_id for doc_id, _ in best]).fetchall()) if best else {}
+        return [(urls[doc_id], score) for doc_id, score in best]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT documents FROM totals").fetchone()[0]
+
+    def urls(self):
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT url FROM documents")}
+
+    def get_stats(self):
+        """Get index size and query statistics for monitoring"""
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            terms = self._conn.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()[0]
+        return {
+            "documents": documents,
+            "terms": terms,
+            "queries": self.queries,
+            "avg_postings_per_query": round(self.postings_read / self.queries, 1) if self.queries else 0.0
+        }
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_bm25_index():
+    """Return the process-wide BM25 index, opening it on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = BM25Index()
+        return _index
@@ -0,0 +1,67 @@
+import os
+import re
+
+# all-MiniLM-L6-v2 truncates input at 256 word pieces, roughly 180-200 words
+CHUNK_WORDS = int(os.getenv("CHUNK_WORDS", "160"))
+CHUNK_OVERLAP_WORDS = int(os.getenv("CHUNK_OVERLAP_WORDS", "40"))
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])["\')\]]*\s+(?=["\'(\[]?[A-Z0-9])')
+
+def split_sentences(text):
+    """Split text into sentences on terminal punctuation followed by a capitalised word"""
+    sentences = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = ' '.join(paragraph.split())
+        if paragraph:
+            sentences.extend(s for s in _SENTENCE_END.split(paragraph) if s)
+    return sentences
+
+def _split_long(sentence, max_words):
+    words = sentence.split()
+    return [' '.join(words[i:i + max_words]) for i in range(0, len(words), max_words)]
+
+def chunk_text(text, max_words=CHUNK_WORDS, overlap_words=CHUNK_OVERLAP_WORDS):
+    """
+    Split text into passages of at most max_words words along sentence boundaries.
+
+    Each passage after the first starts with the trailing sentences (up to
+    overlap_words words) of the previous one, so a fact spanning a boundary
+    appears whole in at least one passage.
+    """
+    sentences = []
+    for sentence in split_sentences(text or ""):
+        sentences.extend(_split_long(sentence, max_words) if len(sentence.split()) > max_words else [sentence])
+
+    passages = []
+    current, current_words = [], 0
+    for sentence in sentences:
+        words = len(sentence.split())
+        if current and current_words + words > max_words:
+            passages.append(' '.join(current))
+            # Carry the tail of the passage over as overlap
+            overlap, overlap_count = [], 0
+            for previous in reversed(current):
+                previous_words = len(previous.split())
+                if overlap_count + previous_words > overlap_words or overlap_count + previous_words + words > max_words:
+                    break
+                overlap.insert(0, previous)
+                overlap_count += previous_words
+            current, current_words = overlap, overlap_count
+        current.append(sentence)
+        current_words += words
+
+    if current:
+        passages.append(' '.join(current))
+    return passages
+
+def passage_id(url, index):
+    return f"{url}#chunk-{index}"
+
+def chunk_article(article, max_words=CHUNK_WORDS, overlap_words=CHUNK_OVERLAP_WORDS):
+    """Split an article into passage dicts carrying the parent URL and chunk index"""
+    return [{
+        "id": passage_id(article['url'], i),
+        "url": article['url'],
+        "chunk_index": i,
+        "text": text
+    } for i, text in enumerate(chunk_text(article['text'], max_words, overlap_words))]
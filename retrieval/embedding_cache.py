@@ -0,0 +1,202 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+
+def normalize_text(text):
+    """Unicode- and whitespace-normalised text, so trivially different copies share an entry"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+def cache_key(text, model_name):
+    return hashlib.sha1(f"{model_name}\0{normalize_text(text)}".encode('utf-8')).hexdigest()
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by a hash of the normalised text and model name.
+
+    Vectors live in a memory-mapped float16 array of max_entries slots; a
+    SQLite index maps each key to its slot and last use. When every slot is
+    taken, the least recently used entries are overwritten.
+    """
+
+    def __init__(self, directory=EMBEDDING_CACHE_DIR, max_entries=EMBEDDING_CACHE_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                slot INTEGER NOT NULL UNIQUE,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER);
+        """)
+        self._vectors = None
+        self.dim = None
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        if row:
+            self._open_vectors(row[0])
+        self.hits = 0
+        self.misses = 0
+
+    def _vectors_path(self):
+        return os.path.join(self.directory, "vectors.f16")
+
+    def _open_vectors(self, dim):
+        path = self._vectors_path()
+        expected_size = self.max_entries * dim * 2
+        mode = 'r+' if os.path.exists(path) and os.path.getsize(path) == expected_size else 'w+'
+        if mode == 'w+':
+            # New file, or one sized for another model or capacity: the index no longer applies
+            self._conn.execute("DELETE FROM entries")
+        self._vectors = np.memmap(path, dtype=np.float16, mode=mode, shape=(self.max_entries, dim))
+        self.dim = dim
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('dim', ?)", (dim,))
+
+    def _slots(self, keys):
+        """Map the cached keys among keys to their slots"""
+        found = {}
+        keys = list(keys)
+        # Stay below SQLite's limit on bound parameters
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            found.update(self._conn.execute(
+                f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", chunk).fetchall())
+        return found
+
+    def get_many(self, keys):
+        """Return cached float32 vectors for the keys (None for misses), marking hits as used"""
+        found = {}
+        with self._lock:
+            if self._vectors is not None and keys:
+                found = self._slots(keys)
+                if found:
+                    now = time.time()
+                    with self._conn:
+                        self._conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                                               [(now, key) for key in found])
+            vectors = [np.asarray(self._vectors[found[key]], dtype=np.float32) if key in found else None
+                       for key in keys]
+            hits = sum(1 for vector in vectors if vector is not None)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return vectors
+
+    def put_many(self, keys, vectors):
+        """Store vectors under their keys, evicting least recently used entries when full"""
+        if not keys:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self._vectors is None:
+                self._open_vectors(vectors.shape[1])
+            elif vectors.shape[1] != self.dim:
+                print(f"Embedding cache dimension {self.dim} does not match {vectors.shape[1]}, skipping")
+                return
+
+            # Keep the last vector for keys repeated within the batch
+            unique = dict(zip(keys, vectors))
+            with self._conn:
+                # Slots are allocated and written under SQLite's write lock, so another
+                # process sharing the cache cannot pick the same slots in between
+                self._conn.execute("BEGIN IMMEDIATE")
+                existing = self._slots(unique)
+                new_keys = [key for key in unique if key not in existing][:self.max_entries - len(existing)]
+                now = time.time()
+                # Rewritten entries count as used, so they are not evicted to make room for this batch
+                self._conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                                       [(now, key) for key in existing])
+
+                used = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                free = self._free_slots(min(len(new_keys), self.max_entries - used))
+                evict = len(new_keys) - len(free)
+                if evict > 0:
+                    evicted = self._conn.execute(
+                        "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (evict,)).fetchall()
+                    self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in evicted])
+                    free.extend(slot for _, slot in evicted)
+
+                rows = []
+                for key, slot in zip(new_keys, free):
+                    self._vectors[slot] = unique[key]
+                    rows.append((key, slot, now))
+                for key, slot in existing.items():
+                    self._vectors[slot] = unique[key]
+                self._vectors.flush()
+                self._conn.executemany("INSERT INTO entries (key, slot, last_used) VALUES (?, ?, ?)", rows)
+
+    def _free_slots(self, count):
+        """Up to count slot numbers not referenced by the index"""
+        if count <= 0:
+            return []
+        taken = {row[0] for row in self._conn.execute("SELECT slot FROM entries")}
+        free = []
+        for slot in range(self.max_entries):
+            if slot not in taken:
+                free.append(slot)
+                if len(free) == count:
+                    break
+        return free
+
+    def encode(self, model, texts, model_name, batch_size=32):
+        """
+        Embed texts, calling model.encode() only for texts not cached yet.
+
+        Returns float32 vectors in input order; identical texts in one call
+        are encoded once.
+        """
+        keys = [cache_key(text, model_name) for text in texts]
+        vectors = self.get_many(keys)
+
+        missing = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None and key not in missing:
+                missing[key] = text
+        if missing:
+            encoded = model.encode(list(missing.values()), batch_size=batch_size)
+            encoded_by_key = dict(zip(missing, encoded))
+            self.put_many(list(encoded_by_key), list(encoded_by_key.values()))
+            vectors = [vector if vector is not None else np.asarray(encoded_by_key[key], dtype=np.float32)
+                       for key, vector in zip(keys, vectors)]
+        return vectors
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get_stats(self):
+        """Get hit rate and fill level for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.count(),
+            "max_entries": self.max_entries,
+            "dim": self.dim,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_embedding_cache():
+    """Return the process-wide embedding cache, opening it on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
@@ -0,0 +1,235 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+FALLBACK_DB_FILE = os.getenv("FALLBACK_DB_FILE", "news_articles.db")
+LEGACY_JSON_FILE = "news_articles.json"
+
+ARTICLE_FIELDS = ["url", "link", "title", "text", "source", "misinfo_verdict", "misinfo_explanation", "timestamp",
+                  "content_hash", "version", "updated_at"]
+
+class FallbackStore:
+    """
+    SQLite article store used when ChromaDB / sentence-transformers are missing.
+
+    Runs in WAL mode with the URL as primary key, so writes are appends to the
+    log instead of rewriting the whole store. Every insert or update gets an
+    increasing sequence number, which lets readers fetch only rows written
+    since their last read.
+    """
+
+    def __init__(self, path=FALLBACK_DB_FILE, legacy_json=LEGACY_JSON_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                url TEXT PRIMARY KEY,
+                link TEXT,
+                seq INTEGER NOT NULL,
+                title TEXT,
+                text TEXT,
+                source TEXT,
+                misinfo_verdict TEXT,
+                misinfo_explanation TEXT,
+                timestamp REAL,
+                content_hash TEXT,
+                version INTEGER NOT NULL DEFAULT 1,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_seq ON articles(seq);
+        """)
+        self._conn.commit()
+        self._import_legacy_json(legacy_json)
+
+    def _import_legacy_json(self, legacy_json):
+        """One-time migration of the old pretty-printed JSON store"""
+        if not legacy_json or not os.path.exists(legacy_json) or self.count():
+            return
+        try:
+            with open(legacy_json, 'r', encoding='utf-8') as f:
+                articles = json.load(f)
+            added = self.add_many(articles)
+            print(f"Imported {added} articles from {legacy_json} into {self.path}")
+        except Exception as e:
+            print(f"Error importing legacy fallback storage: {e}")
+
+    def _next_seq(self):
+        row = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM articles").fetchone()
+        return row[0] + 1
+
+    def add_many(self, articles):
+        """Insert articles in a single transaction, ignoring URLs already stored. Returns the number added"""
+        if not articles:
+            return 0
+        with self._lock:
+            seq = self._next_seq()
+            added = 0
+            with self._conn:
+                for article in articles:
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO articles (url, seq, title, text, source, misinfo_verdict, "
+                        "misinfo_explanation, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (article['url'], seq, article.get('title'), article.get('text'), article.get('source'),
+                         article.get('misinfo_verdict'), article.get('misinfo_explanation'),
+                         article.get('timestamp') or time.time())
+                    )
+                    if cursor.rowcount:
+                        added += 1
+                        seq += 1
+            return added
+
+    def upsert_many(self, articles):
+        """
+        Insert new articles and replace changed ones in a single transaction.
+
+        An article whose content_hash matches the stored row is left alone;
+        a changed one is rewritten with its version incremented, a new
+        updated_at and a new sequence number. Returns (added, updated).
+        """
+        if not articles:
+            return 0, 0
+        with self._lock:
+            seq = self._next_seq()
+            added = updated = 0
+            now = time.time()
+            with self._conn:
+                for article in articles:
+                    row = self._conn.execute(
+                        "SELECT content_hash, version, timestamp FROM articles WHERE url = ?", (article['url'],)).fetchone()
+                    if row and row['content_hash'] and row['content_hash'] == article.get('content_hash'):
+                        continue
+                    version = (row['version'] or 1) + 1 if row else 1
+                    # timestamp stays the time the article was first stored
+                    timestamp = row['timestamp'] if row and row['timestamp'] else article.get('timestamp') or now
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO articles (url, link, seq, title, text, source, misinfo_verdict, "
+                        "misinfo_explanation, timestamp, content_hash, version, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (article['url'], article.get('link'), seq, article.get('title'), article.get('text'), article.get('source'),
+                         article.get('misinfo_verdict'), article.get('misinfo_explanation'),
+                         timestamp, article.get('content_hash'), version, now)
+                    )
+                    seq += 1
+                    if row:
+                        updated += 1
+                    else:
+                        added += 1
+            return added, updated
+
+    def versions(self, urls):
+        """Map each stored URL among urls to its content hash, version and first-stored timestamp"""
+        urls = list(urls)
+        found = {}
+        with self._lock:
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT url, content_hash, version, timestamp FROM articles WHERE url IN ({','.join('?' * len(chunk))})",
+                    chunk).fetchall()
+                found.update({row['url']: {"content_hash": row['content_hash'], "version": row['version'],
+                                           "timestamp": row['timestamp']} for row in rows})
+        return found
+
+    def expired_urls(self, cutoff=None, max_per_source=None):
+        """URLs first stored before cutoff, plus those beyond the newest max_per_source of each source"""
+        with self._lock:
+            urls = set()
+            if cutoff:
+                urls.update(row[0] for row in self._conn.execute(
+                    "SELECT url FROM articles WHERE timestamp < ?", (cutoff,)))
+            if max_per_source:
+                urls.update(row[0] for row in self._conn.execute(
+                    "SELECT url FROM (SELECT url, ROW_NUMBER() OVER "
+                    "(PARTITION BY source ORDER BY timestamp DESC, seq DESC) AS rank FROM articles) "
+                    "WHERE rank > ?", (max_per_source,)))
+            return sorted(urls)
+
+    def delete_many(self, urls):
+        """Delete articles by URL in one transaction. Returns the number deleted"""
+        urls = list(urls)
+        deleted = 0
+        with self._lock:
+            with self._conn:
+                for i in range(0, len(urls), 500):
+                    chunk = urls[i:i + 500]
+                    deleted += self._conn.execute(
+                        f"DELETE FROM articles WHERE url IN ({','.join('?' * len(chunk))})", chunk).rowcount
+        return deleted
+
+    def disk_bytes(self):
+        return sum(os.path.getsize(p) for p in (self.path, f"{self.path}-wal") if os.path.exists(p))
+
+    def vacuum(self):
+        """Checkpoint the WAL and rebuild the database file. Returns the bytes reclaimed"""
+        before = self.disk_bytes()
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+        return max(0, before - self.disk_bytes())
+
+    def contains(self, url):
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM articles WHERE url = ?", (url,)).fetchone()
+            return row is not None
+
+    def urls(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT url FROM articles")]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def last_seq(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM articles").fetchone()[0]
+
+    def read_since(self, seq=0):
+        """Return (last_seq, articles) for every article written after seq, in write order"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT seq, {', '.join(ARTICLE_FIELDS)} FROM articles WHERE seq > ? ORDER BY seq", (seq,)
+            ).fetchall()
+        last = rows[-1]['seq'] if rows else seq
+        return last, [{field: row[field] for field in ARTICLE_FIELDS} for row in rows]
+
+    def get_all(self):
+        return self.read_since(0)[1]
+
+    def get_many(self, urls):
+        """Return the stored articles among urls, in the order given"""
+        urls = list(urls)
+        found = {}
+        with self._lock:
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(ARTICLE_FIELDS)} FROM articles WHERE url IN ({','.join('?' * len(chunk))})",
+                    chunk).fetchall()
+                found.update((row['url'], {field: row[field] for field in ARTICLE_FIELDS}) for row in rows)
+        return [found[url] for url in urls if url in found]
+
+    def get_stats(self):
+        """Get store statistics for monitoring"""
+        return {
+            "articles": self.count(),
+            "last_seq": self.last_seq(),
+            "disk_bytes": self.disk_bytes()
+        }
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_fallback_store():
+    """Return the process-wide fallback store, opening it on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FallbackStore()
+        return _store
@@ -0,0 +1,453 @@
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+NUMPY_INDEX_DIR = os.getenv("NUMPY_INDEX_DIR", "vector_index")
+NUMPY_INDEX_DTYPE = os.getenv("NUMPY_INDEX_DTYPE", "float16")  # float16 or float32
+# IVF mode: vectors are clustered into this many lists and a query only scans
+# the NUMPY_INDEX_NPROBE lists closest to it (0 keeps the search exact)
+NUMPY_INDEX_IVF_LISTS = int(os.getenv("NUMPY_INDEX_IVF_LISTS", "0"))
+NUMPY_INDEX_NPROBE = int(os.getenv("NUMPY_INDEX_NPROBE", "8"))
+
+INITIAL_CAPACITY = 1024
+# Rows scored per matrix product, bounding the float32 copy of a float16 block
+SEARCH_BLOCK_ROWS = 65536
+# IVF lists are trained once this many vectors per list are stored, and
+# retrained whenever the index has grown IVF_RETRAIN_GROWTH times since
+IVF_MIN_ROWS_PER_LIST = 40
+IVF_RETRAIN_GROWTH = 4
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 20000
+
+# Metadata keys kept in their own indexed columns; other keys are filtered through json_extract
+INDEXED_KEYS = {"url": "url", "chunk_index": "chunk_index"}
+
+def normalize(vectors):
+    """Rows scaled to unit length, so a dot product is the cosine similarity"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def _where_sql(where):
+    """SQL condition and parameters for a Chroma-style where filter (equality, $in, $and)"""
+    if not where:
+        return "1", []
+    if "$and" in where:
+        parts = [_where_sql(condition) for condition in where["$and"]]
+        return " AND ".join(f"({sql})" for sql, _ in parts), [p for _, params in parts for p in params]
+
+    conditions, params = [], []
+    for key, condition in where.items():
+        if key in INDEXED_KEYS:
+            column, column_params = INDEXED_KEYS[key], []
+        else:
+            column, column_params = "json_extract(metadata, ?)", [f"$.{key}"]
+        if isinstance(condition, dict) and "$in" in condition:
+            values = list(condition["$in"])
+            if not values:
+                conditions.append("0")
+                continue
+            conditions.append(f"{column} IN ({','.join('?' * len(values))})")
+            params.extend(column_params + values)
+        else:
+            value = condition.get("$eq") if isinstance(condition, dict) else condition
+            conditions.append(f"{column} = ?")
+            params.extend(column_params + [value])
+    return " AND ".join(conditions), params
+
+class NumpyVectorIndex:
+    """
+    Built-in vector store for deployments without chromadb.
+
+    Unit-length passage vectors are appended to a memory-mapped float16 (or
+    float32) matrix, so opening the index maps the file instead of loading
+    it. Ids, documents and metadata live in SQLite next to it. Search is an
+    exact, blocked dot product over all rows, or with IVF lists only over
+    the lists closest to the query. Deleted or replaced rows are marked in a
+    tombstone bitmap and skipped until compact() rewrites the matrix.
+    Writers, also in other processes, take SQLite's write lock before
+    touching the files, so they never append to the same rows.
+
+    The methods mirror the subset of the Chroma collection API used here
+    (upsert, query, get, delete, count), so callers do not need to know
+    which backend they have.
+    """
+
+    def __init__(self, directory=NUMPY_INDEX_DIR, dtype=NUMPY_INDEX_DTYPE, ivf_lists=NUMPY_INDEX_IVF_LISTS,
+                 nprobe=NUMPY_INDEX_NPROBE):
+        self.directory = directory
+        self.ivf_lists = ivf_lists
+        self.nprobe = max(1, nprobe)
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS passages (
+                row INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                url TEXT,
+                chunk_index INTEGER,
+                document TEXT,
+                metadata TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_passages_url ON passages(url);
+            CREATE INDEX IF NOT EXISTS idx_passages_chunk ON passages(chunk_index);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+        self._conn.commit()
+        self.dtype = np.dtype(self._meta("dtype") or dtype)
+        self._vectors = None
+        self._tombstones = None
+        self._assignments = None
+        self._centroids = None
+        self._layout = None
+        self.queries = 0
+        self.rows_scanned = 0
+        self._refresh()
+
+    # --- files and metadata ---
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _meta(self, name, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, **values):
+        self._conn.executemany("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                               [(name, str(value)) for name, value in values.items()])
+
+    @property
+    def dim(self):
+        return int(self._meta("dim", 0))
+
+    @property
+    def rows(self):
+        """Rows appended so far, tombstoned ones included"""
+        return int(self._meta("rows", 0))
+
+    def _capacity(self):
+        return int(self._meta("capacity", 0))
+
+    def _map(self, name, dtype, shape):
+        path = self._path(name)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if not os.path.exists(path) or os.path.getsize(path) < size:
+            with open(path, 'ab') as f:
+                f.truncate(size)
+        return np.memmap(path, dtype=dtype, mode='r+', shape=shape)
+
+    def _rewrite(self, name, dtype, shape, data):
+        """Replace a file by a new one of the given shape that starts with data"""
+        tmp_path = self._path(f"{name}.tmp")
+        array = np.memmap(tmp_path, dtype=dtype, mode='w+', shape=shape)
+        array[:len(data)] = data
+        array.flush()
+        del array
+        # Processes still mapping the old file keep reading it until they remap
+        os.replace(tmp_path, self._path(name))
+
+    def _refresh(self):
+        """(Re)map the files when this or another process grew, compacted or retrained the index"""
+        layout = self._meta("layout")
+        if layout == self._layout and (self._vectors is not None or not self.dim):
+            return
+        capacity, dim = self._capacity(), self.dim
+        if capacity and dim:
+            self._vectors = self._map("vectors.bin", self.dtype, (capacity, dim))
+            self._tombstones = self._map("tombstones.bits", np.uint8, ((capacity + 7) // 8,))
+            if os.path.exists(self._path("centroids.npy")):
+                self._centroids = np.load(self._path("centroids.npy"))
+                self._assignments = self._map("lists.i32", np.int32, (capacity,))
+            else:
+                self._centroids = self._assignments = None
+        self._layout = layout
+
+    def _bump_layout(self):
+        layout = int(self._meta("layout", 0)) + 1
+        self._set_meta(layout=layout)
+
+    def _ensure_capacity(self, rows, dim):
+        """Grow the files to hold rows; called inside the caller's write transaction"""
+        capacity = self._capacity()
+        if rows <= capacity:
+            return
+        new_capacity = max(INITIAL_CAPACITY, capacity)
+        while new_capacity < rows:
+            new_capacity *= 2
+        # Flush and drop the old maps before the files grow
+        for array in (self._vectors, self._tombstones, self._assignments):
+            if array is not None:
+                array.flush()
+        self._vectors = self._tombstones = self._assignments = None
+        self._set_meta(capacity=new_capacity, dim=dim, dtype=self.dtype.name)
+        self._bump_layout()
+        self._layout = None
+        self._refresh()
+
+    # --- tombstones ---
+
+    def _live_mask(self, rows):
+        return ~np.unpackbits(self._tombstones, count=rows).astype(bool)
+
+    def _tombstone(self, rows):
+        for row in rows:
+            self._tombstones[row // 8] |= np.uint8(1 << (7 - row % 8))
+        self._tombstones.flush()
+
+    # --- writes ---
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        """Add passages, replacing any with the same ids"""
+        if not ids:
+            return
+        vectors = normalize(embeddings)
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock, self._conn:
+            # Rows are allocated, written and committed under SQLite's write lock, so
+            # another process sharing the index cannot append to the same rows in between
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._refresh()
+            if self.dim and vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+
+            # Replaced passages keep their row until compaction, hidden by a tombstone
+            replaced = self._rows_where("id IN ({})".format(','.join('?' * len(ids))), list(ids))
+            start = self.rows
+            self._ensure_capacity(start + len(ids), vectors.shape[1])
+            self._vectors[start:start + len(ids)] = vectors.astype(self.dtype)
+            self._vectors.flush()
+            if self._centroids is not None:
+                self._assignments[start:start + len(ids)] = np.argmax(vectors @ self._centroids.T, axis=1)
+                self._assignments.flush()
+
+            if replaced:
+                self._delete_rows(replaced)
+            self._conn.executemany(
+                "INSERT INTO passages (row, id, url, chunk_index, document, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                [(start + i, id_, meta.get('url'), meta.get('chunk_index'), doc, json.dumps(meta))
+                 for i, (id_, doc, meta) in enumerate(zip(ids, documents, metadatas))])
+            self._set_meta(rows=start + len(ids))
+            if replaced:
+                self._tombstone(replaced)
+
+        if self.ivf_lists:
+            with self._lock:
+                live = self.count()
+                trained_rows = int(self._meta("trained_rows", 0))
+                if live >= self.ivf_lists * IVF_MIN_ROWS_PER_LIST and (
+                        self._centroids is None or live >= IVF_RETRAIN_GROWTH * trained_rows):
+                    self.train()
+
+    add = upsert
+
+    def delete(self, ids=None, where=None):
+        """Tombstone passages by id and/or metadata filter. Returns the number deleted"""
+        sql, params = _where_sql(where)
+        if ids is not None:
+            ids = list(ids)
+            sql += f" AND id IN ({','.join('?' * len(ids))})" if ids else " AND 0"
+            params += ids
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._refresh()
+            rows = self._rows_where(sql, params)
+            if rows:
+                self._delete_rows(rows)
+                self._tombstone(rows)
+            return len(rows)
+
+    def _rows_where(self, sql, params):
+        return [row for row, in self._conn.execute(f"SELECT row FROM passages WHERE {sql}", params)]
+
+    def _delete_rows(self, rows):
+        for i in range(0, len(rows), 500):
+            chunk = rows[i:i + 500]
+            self._conn.execute(f"DELETE FROM passages WHERE row IN ({','.join('?' * len(chunk))})", chunk)
+
+    # --- reads ---
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas")):
+        """Passages by id and/or metadata filter, in Chroma's get() result format"""
+        sql, params = _where_sql(where)
+        if ids is not None:
+            ids = list(ids)
+            sql += f" AND id IN ({','.join('?' * len(ids))})" if ids else " AND 0"
+            params += ids
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, document, metadata FROM passages WHERE {sql} ORDER BY row", params).fetchall()
+        result = {"ids": [id_ for id_, _, _ in rows]}
+        if "documents" in include:
+            result["documents"] = [doc for _, doc, _ in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [json.loads(meta) for _, _, meta in rows]
+        return result
+
+    def query(self, query_embeddings, n_results=10, include=("documents", "metadatas", "distances")):
+        """Nearest passages by cosine similarity, in Chroma's query() result format"""
+        queries = normalize(query_embeddings)
+        with self._lock:
+            self._refresh()
+            rows = self.rows
+            if not rows or self._vectors is None:
+                return {key: [[] for _ in queries] for key in ("ids", "documents", "metadatas", "distances")}
+            live = self._live_mask(rows)
+            if self._centroids is not None:
+                hits = [self._search_ivf(query, live, rows, n_results) for query in queries]
+            else:
+                hits = self._search_exact(queries, live, rows, n_results)
+            self.queries += len(queries)
+
+            result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+            for top_rows, scores in hits:
+                found = {row: (id_, doc, meta) for row, id_, doc, meta in self._conn.execute(
+                    f"SELECT row, id, document, metadata FROM passages WHERE row IN ({','.join('?' * len(top_rows))})",
+                    [int(row) for row in top_rows])} if len(top_rows) else {}
+                ranked = [(found[row], score) for row, score in zip(top_rows.tolist(), scores.tolist()) if row in found]
+                result["ids"].append([id_ for (id_, _, _), _ in ranked])
+                result["documents"].append([doc for (_, doc, _), _ in ranked])
+                result["metadatas"].append([json.loads(meta) for (_, _, meta), _ in ranked])
+                result["distances"].append([1.0 - score for _, score in ranked])
+        return result
+
+    def _top(self, scores, n):
+        n = min(n, len(scores))
+        if n <= 0:
+            return np.array([], dtype=np.int64)
+        top = np.argpartition(-scores, n - 1)[:n] if n < len(scores) else np.arange(len(scores))
+        return top[np.argsort(-scores[top])]
+
+    def _search_exact(self, queries, live, rows, n_results):
+        """Blocked matrix product of every row with all queries at once"""
+        scores = np.empty((rows, len(queries)), dtype=np.float32)
+        for start in range(0, rows, SEARCH_BLOCK_ROWS):
+            block = np.asarray(self._vectors[start:min(start + SEARCH_BLOCK_ROWS, rows)], dtype=np.float32)
+            scores[start:start + len(block)] = block @ queries.T
+        scores[~live] = -np.inf
+        self.rows_scanned += rows * len(queries)
+        hits = []
+        for column in scores.T:
+            top = self._top(column, min(n_results, int(live.sum())))
+            hits.append((top, column[top]))
+        return hits
+
+    def _search_ivf(self, query, live, rows, n_results):
+        """Score only the rows in the lists whose centroids are closest to the query"""
+        probe = np.argsort(-(self._centroids @ query))[:self.nprobe]
+        candidates = np.flatnonzero(np.isin(self._assignments[:rows], probe) & live)
+        self.rows_scanned += len(candidates)
+        if not len(candidates):
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        scores = np.asarray(self._vectors[candidates], dtype=np.float32) @ query
+        top = self._top(scores, n_results)
+        return candidates[top], scores[top]
+
+    # --- maintenance ---
+
+    def train(self):
+        """(Re)build the IVF lists with spherical k-means over a sample of the live vectors"""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._refresh()
+            rows = self.rows
+            live_rows = np.flatnonzero(self._live_mask(rows)) if rows else np.array([], dtype=np.int64)
+            lists = min(self.ivf_lists, len(live_rows))
+            if not lists:
+                return False
+            rng = np.random.default_rng(0)
+            sample_rows = np.sort(rng.choice(live_rows, min(len(live_rows), KMEANS_SAMPLE), replace=False))
+            sample = np.asarray(self._vectors[sample_rows], dtype=np.float32)
+            centroids = sample[rng.choice(len(sample), lists, replace=False)]
+            for _ in range(KMEANS_ITERATIONS):
+                nearest = np.argmax(sample @ centroids.T, axis=1)
+                for i in range(lists):
+                    members = sample[nearest == i]
+                    if len(members):
+                        centroids[i] = members.sum(axis=0)
+                centroids = normalize(centroids)
+
+            np.save(self._path("centroids.npy"), centroids)
+            assignments = self._map("lists.i32", np.int32, (self._capacity(),))
+            for start in range(0, rows, SEARCH_BLOCK_ROWS):
+                block = np.asarray(self._vectors[start:min(start + SEARCH_BLOCK_ROWS, rows)], dtype=np.float32)
+                assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+            assignments.flush()
+            self._set_meta(trained_rows=len(live_rows))
+            self._bump_layout()
+            self._refresh()
+            print(f"Trained {lists} IVF lists over {len(live_rows)} vectors")
+            return True
+
+    def compact(self):
+        """
+        Rewrite the matrix without tombstoned rows, shrinking the files to the
+        smallest power-of-two capacity that holds the live rows. Returns the
+        number of rows reclaimed.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._refresh()
+            rows = self.rows
+            if not rows:
+                return 0
+            live_rows = np.flatnonzero(self._live_mask(rows))
+            reclaimed = rows - len(live_rows)
+            if not reclaimed:
+                return 0
+
+            capacity = INITIAL_CAPACITY
+            while capacity < len(live_rows):
+                capacity *= 2
+            live_vectors = np.asarray(self._vectors[live_rows])
+            live_assignments = np.asarray(self._assignments[live_rows]) if self._assignments is not None else None
+            self._vectors = self._tombstones = self._assignments = None
+            self._rewrite("vectors.bin", self.dtype, (capacity, self.dim), live_vectors)
+            self._rewrite("tombstones.bits", np.uint8, ((capacity + 7) // 8,), [])
+            if live_assignments is not None:
+                self._rewrite("lists.i32", np.int32, (capacity,), live_assignments)
+            # Renumber through negative rows so no two passages ever share a row
+            self._conn.executemany("UPDATE passages SET row = ? WHERE row = ?",
+                                   [(-1 - new, int(old)) for new, old in enumerate(live_rows)])
+            self._conn.execute("UPDATE passages SET row = -1 - row WHERE row < 0")
+            self._set_meta(rows=len(live_rows), capacity=capacity)
+            self._bump_layout()
+            self._layout = None
+            self._refresh()
+            return reclaimed
+
+    def disk_bytes(self):
+        """Size of the matrix, tombstone and IVF files on disk"""
+        names = ("vectors.bin", "tombstones.bits", "lists.i32", "centroids.npy")
+        return sum(os.path.getsize(self._path(name)) for name in names if os.path.exists(self._path(name)))
+
+    def get_stats(self):
+        """Get size, tombstone and search statistics for monitoring"""
+        with self._lock:
+            self._refresh()
+            rows = self.rows
+            live = self.count()
+            return {
+                "rows": rows,
+                "live": live,
+                "tombstoned": rows - live,
+                "dim": self.dim,
+                "dtype": self.dtype.name,
+                "disk_bytes": self.disk_bytes(),
+                "ivf_lists": len(self._centroids) if self._centroids is not None else 0,
+                "queries": self.queries,
+                "avg_rows_scanned": round(self.rows_scanned / self.queries, 1) if self.queries else 0.0
+            }
@@ -0,0 +1,157 @@
+"""
+Retention policy and compaction of the news index.
+
+Articles older than RETENTION_MAX_AGE_DAYS, and articles beyond the newest
+RETENTION_MAX_PER_SOURCE of each source, are evicted from the active store
+in bulk: every passage and its metadata in the vector store, or the rows of
+the fallback store followed by a VACUUM to give the space back. Age is measured
+from when an article was first stored. A background thread can run
+compaction every RETENTION_INTERVAL seconds.
+
+Run with:  python -m retrieval.retention [--max-age-days N] [--max-per-source N]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval.store import VECTOR_STORE_AVAILABLE, get_collection, bump_collection_version
+from retrieval.fallback_store import get_fallback_store
+
+RETENTION_MAX_AGE_DAYS = float(os.getenv("RETENTION_MAX_AGE_DAYS", "30"))   # 0 keeps articles forever
+RETENTION_MAX_PER_SOURCE = int(os.getenv("RETENTION_MAX_PER_SOURCE", "0"))  # 0 means no per-source cap
+RETENTION_INTERVAL = int(os.getenv("RETENTION_INTERVAL", "3600"))
+DELETE_BATCH_SIZE = 256
+
+# Report of the most recent compaction, see get_retention_stats()
+last_report = None
+
+def select_expired(articles, cutoff=None, max_per_source=None):
+    """
+    URLs to evict from (url, source, timestamp) triples: stored before cutoff,
+    or beyond the newest max_per_source of their source. Articles without a
+    timestamp are kept.
+    """
+    expired = set()
+    by_source = {}
+    for url, source, timestamp in articles:
+        if timestamp is None:
+            continue
+        if cutoff and timestamp < cutoff:
+            expired.add(url)
+        by_source.setdefault(source, []).append((timestamp, url))
+
+    if max_per_source:
+        for items in by_source.values():
+            items.sort(reverse=True)
+            expired.update(url for _, url in items[max_per_source:])
+    return sorted(expired)
+
+def compact_vector_store(cutoff, max_per_source):
+    """Evict expired articles from the vector store. Returns (evicted_urls, passages_deleted, bytes_reclaimed)"""
+    collection = get_collection()
+    # The first passage of every article carries its metadata
+    metadatas = collection.get(where={"chunk_index": 0}, include=["metadatas"])['metadatas']
+    expired = select_expired([(meta['url'], meta.get('source'), meta.get('timestamp')) for meta in metadatas],
+                             cutoff, max_per_source)
+    if not expired:
+        return [], 0, 0
+
+    before = collection.count()
+    bytes_reclaimed = 0
+    for i in range(0, len(expired), DELETE_BATCH_SIZE):
+        collection.delete(where={"url": {"$in": expired[i:i + DELETE_BATCH_SIZE]}})
+    if hasattr(collection, "compact"):
+        # The NumPy index only hides deleted rows until its matrix is rewritten
+        size = collection.disk_bytes()
+        collection.compact()
+        bytes_reclaimed = max(size - collection.disk_bytes(), 0)
+    bump_collection_version()
+    return expired, before - collection.count(), bytes_reclaimed
+
+def compact_fallback(cutoff, max_per_source):
+    """Evict expired articles from the fallback store and VACUUM it. Returns (evicted_urls, bytes_reclaimed)"""
+    store = get_fallback_store()
+    expired = store.expired_urls(cutoff, max_per_source)
+    if not expired:
+        return [], 0
+    store.delete_many(expired)
+    return expired, store.vacuum()
+
+def compact(max_age_days=RETENTION_MAX_AGE_DAYS, max_per_source=RETENTION_MAX_PER_SOURCE, on_evicted=None):
+    """
+    Enforce the retention policy once on the active store.
+
+    on_evicted(urls) is called with the evicted URLs so derived indexes
+    (seen URLs, near-duplicate signatures) can drop them. Returns a report dict.
+    """
+    global last_report
+    start = time.perf_counter()
+    cutoff = time.time() - max_age_days * 86400 if max_age_days else None
+    report = {"evicted": 0, "passages_deleted": 0, "bytes_reclaimed": 0}
+
+    if not cutoff and not max_per_source:
+        report["seconds"] = 0.0
+        return report
+
+    try:
+        if VECTOR_STORE_AVAILABLE:
+            evicted, report["passages_deleted"], report["bytes_reclaimed"] = compact_vector_store(cutoff, max_per_source)
+        else:
+            evicted, report["bytes_reclaimed"] = compact_fallback(cutoff, max_per_source)
+        report["evicted"] = len(evicted)
+        if evicted and on_evicted:
+            on_evicted(evicted)
+    except Exception as e:
+        print(f"Compaction failed: {e}")
+        report["error"] = str(e)
+
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    report["finished_at"] = time.time()
+    last_report = report
+    print(f"Compaction evicted {report['evicted']} articles in {report['seconds']}s "
+          f"({report['passages_deleted']} passages, {report['bytes_reclaimed']} bytes reclaimed)")
+    return report
+
+class CompactionThread(threading.Thread):
+    """Runs compact() every interval seconds until stop() is called"""
+
+    def __init__(self, interval=RETENTION_INTERVAL, on_evicted=None, **policy):
+        super().__init__(name="compaction", daemon=True)
+        self.interval = interval
+        self.on_evicted = on_evicted
+        self.policy = policy
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            compact(on_evicted=self.on_evicted, **self.policy)
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+def get_retention_stats():
+    """Get the retention policy and the report of the last compaction"""
+    return {
+        "max_age_days": RETENTION_MAX_AGE_DAYS,
+        "max_per_source": RETENTION_MAX_PER_SOURCE,
+        "interval": RETENTION_INTERVAL,
+        "last_report": last_report
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Evict expired articles from the news index")
+    parser.add_argument("--max-age-days", type=float, default=RETENTION_MAX_AGE_DAYS)
+    parser.add_argument("--max-per-source", type=int, default=RETENTION_MAX_PER_SOURCE)
+    args = parser.parse_args()
+
+    from app.ingest import forget_articles
+    compact(args.max_age_days, args.max_per_source, on_evicted=forget_articles)
+
+if __name__ == "__main__":
+    main()
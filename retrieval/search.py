@@ -1,111 +1,367 @@
-import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from fact_checking.check import fact_check
 from scoring.credibility import get_source_credibility
+from retrieval.fallback_store import get_fallback_store
+from retrieval.chunking import chunk_text
+from retrieval.bm25 import get_bm25_index, tokenize
+
+from retrieval.store import VECTOR_STORE_AVAILABLE, get_collection
+
+# The embedding model is shared with ingestion and loaded on first use
+from utils.resources import SENTENCE_TRANSFORMERS_AVAILABLE, get_embedding_model
 
-# Try to import heavy dependencies, fallback if not available
-try:
-    from sentence_transformers import SentenceTransformer
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-except ImportError:
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
-    model = None
+if not SENTENCE_TRANSFORMERS_AVAILABLE:
     print("Warning: sentence-transformers not available, using keyword-based search")
 
-try:
-    import chromadb
-    CHROMADB_AVAILABLE = True
-    chroma_client = chromadb.Client()
-    collection = chroma_client.get_or_create_collection("news")
-except ImportError:
-    CHROMADB_AVAILABLE = False
-    collection = None
-    print("Warning: chromadb not available, using fallback storage")
+# Passage hits fetched per requested article, so enough distinct articles remain after grouping
+PASSAGE_OVERSAMPLE = 4
+# Best passages of an article joined into the context sent to the fact-checker
+CONTEXT_PASSAGES = 2
+
+# hybrid: dense and BM25 candidates merged by reciprocal rank fusion; dense or keyword: one of them
+SEARCH_MODE = os.getenv("SEARCH_MODE", "hybrid")
+# Articles taken from each candidate generator before fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+# Reciprocal rank fusion constant; larger values flatten the advantage of top ranks
+RRF_K = 60
+# Results fact-checked concurrently; bounded to stay within the Gemini rate limit
+FACT_CHECK_WORKERS = int(os.getenv("FACT_CHECK_WORKERS", "3"))
+# Fact-check verdict of a streamed result whose check has not finished yet
+PENDING = "Pending"
+
+# Candidate generators of a hybrid search run side by side
+_search_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search")
+# Separate pool, so fact checks never wait behind candidate generation of another search
+_fact_check_executor = ThreadPoolExecutor(max_workers=max(1, FACT_CHECK_WORKERS), thread_name_prefix="fact-check")
 
-FALLBACK_STORAGE_FILE = "news_articles.json"
+# Per-stage latency of the most recent search, see get_search_stats()
+last_search_timings = {}
+_keyword_index_synced = False
+_keyword_index_lock = threading.Lock()
 
 def load_fallback_storage():
-    """Load articles from fallback JSON storage"""
-    if os.path.exists(FALLBACK_STORAGE_FILE):
-        try:
-            with open(FALLBACK_STORAGE_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading fallback storage: {e}")
-    return []
-
-def keyword_search(query, articles, top_k=3):
-    """Simple keyword-based search as fallback"""
-    query_words = query.lower().split()
-    scored_articles = []
-
-    for article in articles:
-        text = (article.get('title', '') + ' ' + article.get('text', '')).lower()
-        score = sum(1 for word in query_words if word in text)
-        if score > 0:
-            scored_articles.append((score, article))
-
-    # Sort by score and return top_k
-    scored_articles.sort(key=lambda x: x[0], reverse=True)
-    return [article for score, article in scored_articles[:top_k]]
-
-def search_news(query, top_k=3):
-    """Search news articles using available storage method"""
-    output = []
-
-    if CHROMADB_AVAILABLE and SENTENCE_TRANSFORMERS_AVAILABLE:
-        # Use ChromaDB with embeddings
-        try:
-            query_emb = model.encode(query)
-            results = collection.query(query_embeddings=[query_emb.tolist()], n_results=top_k)
-
-            for doc, meta in zip(results['documents'][0], results['metadatas'][0]):
-                credibility = get_source_credibility(meta['source'])
-                fact, evidence = fact_check(query, doc)
-                output.append({
-                    'source': meta['source'],
-                    'credibility': credibility,
-                    'fact_check': fact,
-                    'evidence': evidence,
-                    'context': doc,
-                    'misinfo_verdict': meta.get('misinfo_verdict', 'Unknown'),
-                    'misinfo_explanation': meta.get('misinfo_explanation', '')
-                })
-        except Exception as e:
-            print(f"ChromaDB search failed: {e}")
-            # Fall back to keyword search
-            return search_news_fallback(query, top_k)
+    """Load every article of the fallback store (diagnostics only; searches read just their hits)"""
+    try:
+        return get_fallback_store().get_all()
+    except Exception as e:
+        print(f"Error loading fallback storage: {e}")
+        return []
+
+def keyword_search(query, top_k=3):
+    """BM25 search over the keyword index, returning the best articles of the fallback store"""
+    return get_fallback_store().get_many(url for url, _ in get_bm25_index().search(query, top_k))
+
+def keyword_passages(query, text, limit=CONTEXT_PASSAGES):
+    """The passages of an article text that match the most query words, best first"""
+    query_words = set(tokenize(query))
+    scored = []
+    for i, passage in enumerate(chunk_text(text)):
+        words = set(tokenize(passage))
+        scored.append((len(query_words & words), -i, passage))
+    scored.sort(reverse=True)
+    return [passage for _, _, passage in scored[:limit]]
+
+def group_passages(documents, metadatas, top_k, max_passages=CONTEXT_PASSAGES):
+    """
+    Deduplicate ranked passage hits back to articles.
+
+    Returns up to top_k (metadata, passages) pairs in order of each article's
+    best passage, keeping at most max_passages passages per article.
+    """
+    grouped = {}
+    for doc, meta in zip(documents, metadatas):
+        url = meta.get('url') or doc
+        if url not in grouped:
+            if len(grouped) >= top_k:
+                continue
+            grouped[url] = (meta, [])
+        if len(grouped[url][1]) < max_passages:
+            grouped[url][1].append(doc)
+    return list(grouped.values())
+
+def hit_result(meta, context):
+    """Assemble the result dict of a hit whose fact check is still pending"""
+    return {
+        'source': meta.get('source', 'Unknown'),
+        # The link the article was published under; url is its canonical form
+        'url': meta.get('link') or meta.get('url'),
+        'credibility': get_source_credibility(meta.get('source', 'Unknown')),
+        'fact_check': PENDING,
+        'evidence': '',
+        'context': context,
+        'misinfo_verdict': meta.get('misinfo_verdict', 'Unknown'),
+        'misinfo_explanation': meta.get('misinfo_explanation', '')
+    }
+
+def build_result(query, meta, context):
+    """Fact-check a hit against its context and assemble the result dict"""
+    result = hit_result(meta, context)
+    result['fact_check'], result['evidence'] = fact_check(query, context)
+    return result
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, round(1000 * (time.perf_counter() - start), 1)
+
+def build_results(query, hits):
+    """
+    Fact-check (metadata, context) hits concurrently, returning their results
+    in hit order. Each result carries its own fact_check_ms, and the list of
+    them is returned alongside, so the slowest check is easy to spot.
+    """
+    futures = [_fact_check_executor.submit(_timed, build_result, query, meta, context) for meta, context in hits]
+    output, per_result_ms = [], []
+    for future in futures:
+        result, elapsed_ms = future.result()
+        result['fact_check_ms'] = elapsed_ms
+        output.append(result)
+        per_result_ms.append(elapsed_ms)
+    return output, per_result_ms
+
+def dense_candidates(query, depth, group_by_article=True):
+    """Ranked (url, metadata, passages) hits of the embedding search over passages"""
+    query_emb = get_embedding_model().encode(query)
+    n_results = depth * PASSAGE_OVERSAMPLE if group_by_article else depth
+    results = get_collection().query(query_embeddings=[query_emb.tolist()], n_results=n_results)
+
+    documents, metadatas = results['documents'][0], results['metadatas'][0]
+    if group_by_article:
+        hits = group_passages(documents, metadatas, depth)
+    else:
+        hits = [(meta, [doc]) for doc, meta in zip(documents, metadatas)]
+    return [(meta.get('url'), meta, passages) for meta, passages in hits]
+
+def stored_articles_missing_from(index):
+    """Yield batches of stored articles the BM25 index lacks, reading only the missing ones"""
+    if VECTOR_STORE_AVAILABLE:
+        collection = get_collection()
+        first_passages = collection.get(where={"chunk_index": 0}, include=["metadatas"])['metadatas']
+        if index.count() >= len(first_passages):
+            return
+        indexed = index.urls()
+        missing = [meta['url'] for meta in first_passages if meta['url'] not in indexed]
+        for i in range(0, len(missing), 256):
+            passages = collection.get(where={"url": {"$in": missing[i:i + 256]}}, include=["documents", "metadatas"])
+            articles = {}
+            for doc, meta in sorted(zip(passages['documents'], passages['metadatas']),
+                                    key=lambda hit: hit[1]['chunk_index']):
+                article = articles.setdefault(meta['url'], {"url": meta['url'], "title": meta.get('title'),
+                                                            "text": ""})
+                article['text'] += ' ' + doc
+            yield list(articles.values())
     else:
+        store = get_fallback_store()
+        if index.count() >= store.count():
+            return
+        indexed = index.urls()
+        missing = [url for url in store.urls() if url not in indexed]
+        for i in range(0, len(missing), 256):
+            yield store.get_many(missing[i:i + 256])
+
+def sync_keyword_index():
+    """Once per process, add stored articles the BM25 index lacks, e.g. ones stored before it existed"""
+    global _keyword_index_synced
+    with _keyword_index_lock:
+        if _keyword_index_synced:
+            return
+        index = get_bm25_index()
+        added = 0
+        for articles in stored_articles_missing_from(index):
+            index.add_many(articles)
+            added += len(articles)
+        if added:
+            print(f"Added {added} stored articles to the keyword index")
+        _keyword_index_synced = True
+
+def sparse_candidates(query, depth):
+    """Ranked URLs of the BM25 keyword search"""
+    sync_keyword_index()
+    return [url for url, _ in get_bm25_index().search(query, depth)]
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Merge ranked lists of URLs: each list adds 1 / (k + rank) to a URL's score. Returns URLs, best first"""
+    scores = {}
+    for ranking in rankings:
+        for rank, url in enumerate(ranking, start=1):
+            scores[url] = scores.get(url, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+def stored_passages(query, urls):
+    """Metadata and best matching passages of stored articles, for hits only the keyword search found"""
+    if not urls:
+        return {}
+    results = get_collection().get(where={"url": {"$in": urls}}, include=["documents", "metadatas"])
+    articles = {}
+    for doc, meta in zip(results['documents'], results['metadatas']):
+        articles.setdefault(meta['url'], (meta, []))[1].append(doc)
+    query_words = set(tokenize(query))
+    return {url: (meta, sorted(docs, key=lambda doc: len(query_words & set(tokenize(doc))),
+                               reverse=True)[:CONTEXT_PASSAGES])
+            for url, (meta, docs) in articles.items()}
+
+def hybrid_search(query, top_k=3, depth=HYBRID_CANDIDATES):
+    """
+    Dense and BM25 candidates generated concurrently and merged with
+    reciprocal rank fusion. Returns ((metadata, passages) hits, timings in ms).
+    When one of the searches fails the other ranking is used alone; when
+    both fail the error of the dense search is raised.
+    """
+    depth = max(depth, top_k)
+    dense_future = _search_executor.submit(_timed, dense_candidates, query, depth)
+    sparse_future = _search_executor.submit(_timed, sparse_candidates, query, depth)
+
+    timings = {}
+    dense_error = None
+    try:
+        dense, timings['dense_ms'] = dense_future.result()
+    except Exception as e:
+        dense_error, dense = e, []
+    try:
+        sparse, timings['sparse_ms'] = sparse_future.result()
+    except Exception as e:
+        if dense_error is not None:
+            raise dense_error
+        print(f"Keyword search failed, using dense ranking only: {e}")
+        sparse = []
+    if dense_error is not None:
+        print(f"Dense search failed, using keyword ranking only: {dense_error}")
+
+    start = time.perf_counter()
+    fused = reciprocal_rank_fusion([[url for url, _, _ in dense], sparse])[:top_k]
+    dense_hits = {url: (meta, passages) for url, meta, passages in dense}
+    dense_hits.update(stored_passages(query, [url for url in fused if url not in dense_hits]))
+    timings['fusion_ms'] = round(1000 * (time.perf_counter() - start), 1)
+    return [dense_hits[url] for url in fused if url in dense_hits], timings
+
+def search_hits(query, top_k=3, group_by_article=True, mode=SEARCH_MODE):
+    """
+    Retrieve the top_k (metadata, context) hits of a query without
+    fact-checking them. Returns (hits, timings in ms).
+
+    Articles are indexed as passages. With group_by_article (the default)
+    passage hits are deduplicated back to top_k articles and each article's
+    best passages form the context sent to the fact-checker; otherwise the
+    top_k passages are returned as individual hits. In hybrid mode (grouped
+    by article only) the embedding and BM25 rankings are fused. Keyword mode
+    uses the BM25 index over the stored passages. Without a vector store, or
+    when reading it fails, the fallback store is searched instead.
+    """
+    if not VECTOR_STORE_AVAILABLE:
         # Use fallback keyword search
-        return search_news_fallback(query, top_k)
+        return fallback_hits(query, top_k, group_by_article)
 
-    return output
+    try:
+        if mode == "keyword":
+            return keyword_hits(query, top_k, group_by_article)
+        if mode == "hybrid" and group_by_article:
+            hits, timings = hybrid_search(query, top_k)
+        else:
+            dense, dense_ms = _timed(dense_candidates, query, top_k, group_by_article)
+            hits, timings = [(meta, passages) for _, meta, passages in dense], {"dense_ms": dense_ms}
+        return [(meta, '\n\n'.join(passages)) for meta, passages in hits], dict(timings, mode=mode)
+    except Exception as e:
+        print(f"Vector store search failed, using fallback storage: {e}")
+        return fallback_hits(query, top_k, group_by_article)
 
-def search_news_fallback(query, top_k=3):
-    """Fallback search using keyword matching"""
-    articles = load_fallback_storage()
+def keyword_hits(query, top_k=3, group_by_article=True):
+    """BM25 hits over the articles of the vector store, with their best matching stored passages"""
+    urls, sparse_ms = _timed(sparse_candidates, query, top_k)
+    articles, passages_ms = _timed(stored_passages, query, urls)
+    hits = []
+    for url in urls:
+        if url not in articles:
+            continue
+        meta, passages = articles[url]
+        if group_by_article:
+            hits.append((meta, '\n\n'.join(passages)))
+        else:
+            hits.extend((meta, passage) for passage in passages)
+    return hits[:top_k], {"sparse_ms": sparse_ms, "passages_ms": passages_ms, "mode": "keyword"}
 
-    if not articles:
+def fallback_hits(query, top_k=3, group_by_article=True):
+    """Keyword hits over the fallback store, keeping only the best matching passages of each article"""
+    if not VECTOR_STORE_AVAILABLE:
+        # With a vector store the sync reads it, and this may be the fallback for its failure
+        sync_keyword_index()
+    if not get_bm25_index().count():
         print("No articles found in fallback storage")
-        return []
+        return [], {"mode": "keyword"}
 
     # Use keyword search
-    relevant_articles = keyword_search(query, articles, top_k)
+    relevant_articles, sparse_ms = _timed(keyword_search, query, top_k)
 
-    output = []
+    hits = []
     for article in relevant_articles:
-        credibility = get_source_credibility(article.get('source', 'Unknown'))
-        fact, evidence = fact_check(query, article.get('text', ''))
-
-        output.append({
-            'source': article.get('source', 'Unknown'),
-            'credibility': credibility,
-            'fact_check': fact,
-            'evidence': evidence,
-            'context': article.get('text', '')[:500] + '...',  # Truncate for display
-            'misinfo_verdict': article.get('misinfo_verdict', 'Unknown'),
-            'misinfo_explanation': article.get('misinfo_explanation', '')
-        })
+        passages = keyword_passages(query, article.get('text', ''))
+        if group_by_article:
+            hits.append((article, '\n\n'.join(passages)))
+        else:
+            hits.extend((article, passage) for passage in passages)
+    return hits[:top_k], {"sparse_ms": sparse_ms, "mode": "keyword"}
 
+def search_news(query, top_k=3, group_by_article=True, mode=SEARCH_MODE):
+    """
+    Search news articles using available storage method.
+
+    Retrieves hits as described in search_hits() and fact-checks them
+    concurrently, returning the results in rank order once every check is
+    done. Stage latencies are kept for get_search_stats().
+    """
+    global last_search_timings
+    start = time.perf_counter()
+    hits, timings = search_hits(query, top_k, group_by_article, mode)
+
+    (output, timings['fact_checks_ms']), timings['fact_check_ms'] = _timed(build_results, query, hits)
+    timings['total_ms'] = round(1000 * (time.perf_counter() - start), 1)
+    last_search_timings = timings
     return output
+
+def search_news_stream(query, top_k=3, group_by_article=True, mode=SEARCH_MODE):
+    """
+    Streaming variant of search_news, yielding (rank, result) pairs.
+
+    As soon as retrieval finishes every hit is yielded with its fact_check
+    still PENDING, so source, credibility, context and the stored misinfo
+    verdict can be shown right away. Each hit is yielded again, complete,
+    as its fact check finishes, in completion order.
+    """
+    global last_search_timings
+    start = time.perf_counter()
+    hits, timings = search_hits(query, top_k, group_by_article, mode)
+    timings['retrieval_ms'] = round(1000 * (time.perf_counter() - start), 1)
+
+    # Start the checks before handing out the pending results, so they run while those render
+    checks_start = time.perf_counter()
+    futures = {_fact_check_executor.submit(_timed, build_result, query, meta, context): rank
+               for rank, (meta, context) in enumerate(hits)}
+    for rank, (meta, context) in enumerate(hits):
+        yield rank, hit_result(meta, context)
+
+    per_result_ms = [None] * len(hits)
+    try:
+        for future in as_completed(futures):
+            result, elapsed_ms = future.result()
+            result['fact_check_ms'] = per_result_ms[futures[future]] = elapsed_ms
+            yield futures[future], result
+    finally:
+        # The caller stopped early: drop the checks that have not started
+        for future in futures:
+            future.cancel()
+
+    timings['fact_checks_ms'] = per_result_ms
+    timings['fact_check_ms'] = round(1000 * (time.perf_counter() - checks_start), 1)
+    timings['total_ms'] = round(1000 * (time.perf_counter() - start), 1)
+    last_search_timings = timings
+
+def search_news_fallback(query, top_k=3, group_by_article=True):
+    """Fallback search using keyword matching, fact-checking only the best matching passages"""
+    return search_news(query, top_k, group_by_article, mode="keyword")
+
+def get_search_stats():
+    """Get per-stage latency of the last search and keyword index statistics for monitoring"""
+    return {"last_search": dict(last_search_timings), "keyword_index": get_bm25_index().get_stats()}
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+
+from utils.resources import SENTENCE_TRANSFORMERS_AVAILABLE
+
+try:
+    import chromadb
+    CHROMADB_AVAILABLE = True
+except ImportError:
+    CHROMADB_AVAILABLE = False
+
+CHROMA_PATH = os.getenv("CHROMA_PATH", "chroma_db")
+COLLECTION_NAME = os.getenv("CHROMA_COLLECTION", "news")
+VERSION_FILE = "collection_version"
+
+# chromadb, or the built-in NumPy index (retrieval/numpy_index.py) when chromadb is missing
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chromadb" if CHROMADB_AVAILABLE else "numpy")
+# Dense retrieval needs embeddings and a vector store; otherwise articles go to the fallback store
+VECTOR_STORE_AVAILABLE = SENTENCE_TRANSFORMERS_AVAILABLE and (VECTOR_BACKEND == "numpy" or CHROMADB_AVAILABLE)
+
+if not VECTOR_STORE_AVAILABLE:
+    print("Warning: no vector store available, using fallback storage")
+elif VECTOR_BACKEND == "numpy":
+    print("chromadb not installed, using the built-in NumPy vector index")
+
+_client = None
+_collection = None
+_store_lock = threading.Lock()
+_version_lock = threading.Lock()
+
+def _open_client(path):
+    if hasattr(chromadb, "PersistentClient"):
+        return chromadb.PersistentClient(path=path)
+    # chromadb < 0.4 persists through duckdb+parquet settings
+    from chromadb.config import Settings
+    return chromadb.Client(Settings(chroma_db_impl="duckdb+parquet", persist_directory=path))
+
+def get_collection():
+    """
+    Return the process-wide persistent news collection, opening it on first use.
+
+    The collection lives on disk under CHROMA_PATH, so ingestion and search
+    share one index and a restart starts warm instead of re-embedding every
+    article. With the numpy backend this is a NumpyVectorIndex, which offers
+    the same methods. Returns None when no vector store is available.
+    """
+    global _client, _collection
+    if not VECTOR_STORE_AVAILABLE:
+        return None
+    with _store_lock:
+        if _collection is None:
+            if VECTOR_BACKEND == "numpy":
+                from retrieval.numpy_index import NumpyVectorIndex
+                _collection = NumpyVectorIndex()
+                print(f"Opened vector index {_collection.directory} ({_collection.count()} passages)")
+            else:
+                os.makedirs(CHROMA_PATH, exist_ok=True)
+                _client = _open_client(CHROMA_PATH)
+                _collection = _client.get_or_create_collection(COLLECTION_NAME)
+                print(f"Opened vector store {CHROMA_PATH}/{COLLECTION_NAME} ({_collection.count()} passages)")
+        return _collection
+
+def _version_path():
+    return os.path.join(CHROMA_PATH, VERSION_FILE)
+
+def collection_version():
+    """
+    Version of the collection's contents, changed by every write.
+
+    Shared through a file next to the collection, so a search process sees
+    writes made by a separate ingestion process; callers caching anything
+    derived from the collection compare versions to invalidate. 0 means the
+    collection has never been written.
+    """
+    try:
+        with open(_version_path(), 'r', encoding='utf-8') as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+def bump_collection_version():
+    """Record a write to the collection, returning the new version"""
+    with _version_lock:
+        # Nanosecond timestamps stay unique across processes writing the same store
+        version = max(time.time_ns(), collection_version() + 1)
+        tmp_path = f"{_version_path()}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(CHROMA_PATH, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(str(version))
+            os.replace(tmp_path, _version_path())
+        except Exception as e:
+            print(f"Error saving collection version: {e}")
+        return version
+
+def get_store_stats():
+    """Get vector store statistics for monitoring"""
+    collection = get_collection()
+    if collection is None:
+        from retrieval.fallback_store import get_fallback_store
+        return dict(get_fallback_store().get_stats(), backend="fallback")
+    return {
+        "backend": VECTOR_BACKEND,
+        "path": CHROMA_PATH,
+        "collection": COLLECTION_NAME,
+        "passages": collection.count(),
+        "version": collection_version()
+    }
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent BM25 keyword index
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from retrieval.bm25 import BM25Index
+
+ARTICLES = [
+    {"url": "https://a.example/rain", "title": "Heavy rain floods the city", "text": "Rain fell all night and streets flooded."},
+    {"url": "https://b.example/train", "title": "Train strike", "text": "Train drivers walked out over pay."},
+    {"url": "https://c.example/budget", "title": "Budget vote", "text": "Parliament passed the budget after a long debate."},
+]
+
+def test_bm25_ranks_and_matches_whole_words(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25.db"))
+    index.add_many(ARTICLES)
+    assert index.count() == 3
+    # 'rain' must not match 'train'
+    assert [url for url, _ in index.search("rain flooded streets", top_k=3)] == ["https://a.example/rain"]
+    assert index.search("budget", top_k=1)[0][0] == "https://c.example/budget"
+    assert index.search("") == []
+
+def test_bm25_readd_and_remove(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25.db"))
+    index.add_many(ARTICLES)
+    index.add_many([{"url": "https://a.example/rain", "title": "Sunny", "text": "Clear skies today."}])
+    assert index.count() == 3
+    assert index.search("rain") == []
+    assert index.remove_many(["https://b.example/train", "https://missing.example"]) == 1
+    assert index.urls() == {"https://a.example/rain", "https://c.example/budget"}
+
+def test_bm25_persists(tmp_path):
+    path = str(tmp_path / "bm25.db")
+    BM25Index(path).add_many(ARTICLES)
+    assert BM25Index(path).search("parliament", top_k=3)[0][0] == "https://c.example/budget"
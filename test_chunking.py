@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests for splitting articles into overlapping passages
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from retrieval.chunking import chunk_text, chunk_article, split_sentences
+
+def test_passages_respect_limit_and_overlap():
+    text = " ".join(f"Sentence number {i} has six words." for i in range(40))
+    passages = chunk_text(text, max_words=30, overlap_words=12)
+    assert len(passages) > 1
+    for passage in passages:
+        assert len(passage.split()) <= 30
+    for previous, passage in zip(passages, passages[1:]):
+        # Each passage starts with up to overlap_words words from the end of the one before
+        overlap = previous[previous.index(passage.split(". ")[0]):]
+        assert passage.startswith(overlap)
+        assert 0 < len(overlap.split()) <= 12
+    # No sentence is lost
+    assert all(f"Sentence number {i} " in " ".join(passages) for i in range(40))
+
+def test_long_sentences_are_split():
+    passages = chunk_text(" ".join(["word"] * 95), max_words=40, overlap_words=10)
+    assert [len(p.split()) for p in passages] == [40, 40, 15]
+
+def test_empty_text():
+    assert chunk_text("") == []
+    assert chunk_text(None) == []
+
+def test_sentences_split_on_paragraphs_and_punctuation():
+    text = "First sentence here. Second one?\n\nNew paragraph (with brackets). \"Quoted\" start."
+    assert split_sentences(text) == ["First sentence here.", "Second one?", "New paragraph (with brackets).",
+                                     "\"Quoted\" start."]
+
+def test_chunk_article_keys_passages_by_url():
+    article = {"url": "https://news.example/story", "text": "One. Two. Three."}
+    passages = chunk_article(article, max_words=2, overlap_words=0)
+    assert [p["id"] for p in passages] == [f"https://news.example/story#chunk-{i}" for i in range(len(passages))]
+    assert {p["url"] for p in passages} == {"https://news.example/story"}
+    assert [p["chunk_index"] for p in passages] == list(range(len(passages)))
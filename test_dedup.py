@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for MinHash/LSH near-duplicate detection
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.dedup import minhash_signature, estimate_similarity, NearDuplicateIndex
+
+TEXT = " ".join(f"token{i}" for i in range(200))
+
+def test_minhash_similarity():
+    copy = TEXT + " with a short note appended"
+    other = " ".join(f"other{i}" for i in range(200))
+    assert minhash_signature("") is None
+    assert minhash_signature(TEXT) == minhash_signature(TEXT)
+    assert estimate_similarity(minhash_signature(TEXT), minhash_signature(TEXT)) == 1.0
+    assert estimate_similarity(minhash_signature(TEXT), minhash_signature(copy)) >= 0.8
+    assert estimate_similarity(minhash_signature(TEXT), minhash_signature(other)) < 0.2
+
+def test_index_finds_copies(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "dedup.db"))
+    assert index.check({"url": "https://a.example/story", "text": TEXT}) is None
+    match = index.check({"url": "https://b.example/copy", "text": TEXT + " via wire"})
+    assert match is not None and match[0] == "https://a.example/story"
+    assert index.check({"url": "https://c.example/other", "text": TEXT[::-1]}) is None
+    stats = index.get_stats()
+    assert (stats["checked"], stats["duplicates_found"]) == (3, 1)
+
+def test_signatures_reload_only_for_stored_articles(tmp_path):
+    path = str(tmp_path / "dedup.db")
+    index = NearDuplicateIndex(path)
+    stored = {"url": "https://a.example/story", "text": TEXT}
+    lost = {"url": "https://b.example/other", "text": " ".join(f"other{i}" for i in range(200))}
+    index.check(stored)
+    index.check(lost)
+    index.save([stored, lost])
+
+    reopened = NearDuplicateIndex(path, loader=lambda: ["https://a.example/story"])
+    assert reopened.check({"url": "https://c.example/copy", "text": TEXT})[0] == "https://a.example/story"
+    assert reopened.check({"url": "https://d.example/copy", "text": lost["text"]}) is None
+
+def test_duplicate_links_and_forget(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "dedup.db"))
+    index.link_duplicate("https://b.example/copy", "https://a.example/story", "B News", 0.9)
+    assert index.get_duplicates("https://a.example/story") == [
+        {"url": "https://b.example/copy", "source": "B News", "similarity": 0.9}]
+    assert index.linked_urls(canonical_urls={"https://x.example"}) == []
+    index.forget(["https://a.example/story"])
+    assert index.get_duplicates("https://a.example/story") == []
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the on-disk embedding cache
+"""
+
+import sys
+import os
+import sqlite3
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from retrieval.embedding_cache import EmbeddingCache, cache_key
+
+def vector(n, dim=4):
+    return np.full(dim, n, dtype=np.float32)
+
+class CountingModel:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=32):
+        self.encoded.extend(texts)
+        return [vector(len(text)) for text in texts]
+
+def test_encode_only_misses(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache"), max_entries=16)
+    model = CountingModel()
+    first = cache.encode(model, ["a", "bb", "a"], "model")
+    assert model.encoded == ["a", "bb"]
+    second = cache.encode(model, ["  bb ", "ccc"], "model")
+    assert model.encoded == ["a", "bb", "ccc"]
+    assert [v[0] for v in first + second] == [1, 2, 1, 2, 3]
+    # Another model name is another key
+    cache.encode(model, ["a"], "other-model")
+    assert model.encoded[-1] == "a"
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache"), max_entries=4)
+    cache.put_many(["a", "b", "c", "d"], [vector(i) for i in range(4)])
+    cache.get_many(["a"])
+    cache.put_many(["e", "f"], [vector(4), vector(5)])
+    found = cache.get_many(["a", "b", "c", "d", "e", "f"])
+    assert [v is not None for v in found] == [True, False, False, True, True, True]
+    assert cache.count() == 4
+
+def test_rewritten_entries_are_not_evicted(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache"), max_entries=3)
+    cache.put_many(["a", "b", "c"], [vector(1), vector(2), vector(3)])
+    # "a" is the oldest entry but is part of the batch, so "b" makes room
+    cache.put_many(["a", "d"], [vector(10), vector(4)])
+    assert [None if v is None else v[0] for v in cache.get_many(["a", "b", "c", "d"])] == [10, None, 3, 4]
+
+def test_reopen_keeps_entries(tmp_path):
+    EmbeddingCache(str(tmp_path / "cache"), max_entries=8).put_many([cache_key("text", "m")], [vector(7)])
+    reopened = EmbeddingCache(str(tmp_path / "cache"), max_entries=8)
+    assert reopened.get_many([cache_key("text", "m")])[0][0] == 7
+
+def test_slots_are_allocated_under_the_write_lock(tmp_path):
+    directory = str(tmp_path / "cache")
+    cache = EmbeddingCache(directory, max_entries=8)
+    cache.put_many(["a"], [vector(1)])
+
+    # Another process holds the write lock and takes the next free slot meanwhile
+    other = sqlite3.connect(os.path.join(directory, "index.db"), isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    writer = threading.Thread(target=cache.put_many, args=(["b"], [vector(2)]))
+    writer.start()
+    time.sleep(0.2)
+    other.execute("INSERT INTO entries (key, slot, last_used) VALUES ('x', 1, 0)")
+    other.execute("COMMIT")
+    writer.join()
+
+    slots = dict(cache._conn.execute("SELECT key, slot FROM entries").fetchall())
+    assert slots["x"] == 1
+    assert slots["b"] not in (0, 1)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for parsing downloaded pages in worker processes
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from app import extract
+from app.extract import ExtractionPool, ExtractionProfileCache
+
+def page(n):
+    text = " ".join(f"story{n} word{n}x{i}" for i in range(100))
+    return f"<html><body><h1>Story {n}</h1><article><p>{text}</p></article></body></html>".encode()
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    # Profiles learned by the workers are merged here instead of the live profile file
+    monkeypatch.setattr(extract, "extraction_profiles", ExtractionProfileCache(str(tmp_path / "profiles.json")))
+    pool = ExtractionPool(processes=2, chunksize=3)
+    yield pool
+    pool.shutdown()
+
+def test_every_page_is_parsed(pool):
+    pages = [(n, f"https://news.example/{n}", page(n) if n % 5 else None) for n in range(20)]
+    results = dict(pool.imap(pages))
+    assert sorted(results) == list(range(20))
+    assert all(results[n] is None for n in range(0, 20, 5))
+    assert all(results[n]["text"].startswith(f"story{n} ") for n in range(20) if n % 5)
+
+def test_pages_are_read_only_on_demand(pool):
+    pulled = []
+
+    def pages():
+        for n in range(100):
+            pulled.append(n)
+            yield n, f"https://news.example/{n}", page(n)
+
+    results = pool.imap(pages())
+    assert not pulled
+    taken = [next(results) for _ in range(5)]
+    results.close()
+    assert len(taken) == 5
+    assert len(pulled) <= 5 + pool.read_ahead
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite fallback article store
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from retrieval.fallback_store import FallbackStore
+
+def article(url, text, content_hash, **fields):
+    return dict({"url": url, "link": url + "?utm_source=rss", "title": f"Title {text}", "text": text,
+                 "source": "Example", "content_hash": content_hash}, **fields)
+
+@pytest.fixture
+def store(tmp_path):
+    return FallbackStore(str(tmp_path / "articles.db"), legacy_json=str(tmp_path / "articles.json"))
+
+def test_upsert_versions_changed_articles(store):
+    assert store.upsert_many([article("https://a.example", "first", "h1", timestamp=100.0),
+                              article("https://b.example", "other", "h2")]) == (2, 0)
+    seq, _ = store.read_since(0)
+
+    # Same content is left alone
+    assert store.upsert_many([article("https://a.example", "first", "h1")]) == (0, 0)
+    assert store.read_since(seq) == (seq, [])
+
+    assert store.upsert_many([article("https://a.example", "second", "h3", timestamp=200.0)]) == (0, 1)
+    _, changed = store.read_since(seq)
+    assert [(a["url"], a["text"], a["version"]) for a in changed] == [("https://a.example", "second", 2)]
+    # The article keeps the time it was first stored
+    assert changed[0]["timestamp"] == 100.0
+    assert changed[0]["link"] == "https://a.example?utm_source=rss"
+    assert store.versions(["https://a.example", "https://missing.example"]) == {
+        "https://a.example": {"content_hash": "h3", "version": 2, "timestamp": 100.0}}
+
+def test_get_many_keeps_order(store):
+    store.upsert_many([article(f"https://{n}.example", n, n) for n in "abc"])
+    assert [a["url"] for a in store.get_many(["https://c.example", "https://x.example", "https://a.example"])] == [
+        "https://c.example", "https://a.example"]
+
+def test_expired_and_delete(store):
+    store.upsert_many([article("https://old.example", "old", "h1", timestamp=100.0),
+                       article("https://new.example", "new", "h2", timestamp=300.0),
+                       article("https://newer.example", "newer", "h3", timestamp=400.0)])
+    assert store.expired_urls(cutoff=200.0) == ["https://old.example"]
+    assert store.expired_urls(max_per_source=2) == ["https://old.example"]
+    assert store.delete_many(["https://old.example", "https://missing.example"]) == 1
+    assert store.count() == 2
+
+def test_legacy_json_is_imported_once(tmp_path):
+    legacy = tmp_path / "articles.json"
+    legacy.write_text(json.dumps([{"url": "https://a.example", "title": "A", "text": "text", "source": "Example"}]))
+    path = str(tmp_path / "articles.db")
+    assert FallbackStore(path, legacy_json=str(legacy)).count() == 1
+    legacy.write_text(json.dumps([{"url": "https://b.example", "title": "B", "text": "text", "source": "Example"}]))
+    assert FallbackStore(path, legacy_json=str(legacy)).urls() == ["https://a.example"]
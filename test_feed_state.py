@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for conditional feed polling and the per-feed entry state
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from app import ingest
+from app.feed_state import FeedStateStore
+
+FEED_URL = "https://news.example/rss"
+
+def rss(*items):
+    """An RSS document with (guid, pubDate) items"""
+    entries = "".join(f"<item><title>Story {guid}</title><link>https://news.example/{guid}</link>"
+                      f"<guid>{guid}</guid><pubDate>{published}</pubDate></item>" for guid, published in items)
+    return f"<rss version='2.0'><channel><title>Example News</title>{entries}</channel></rss>".encode()
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+class FakeFeedServer:
+    """Serves one feed with an ETag, answering 304 to a matching If-None-Match"""
+
+    def __init__(self, content, etag='"v1"'):
+        self.content = content
+        self.etag = etag
+        self.requests = []
+
+    def __call__(self, url, headers=None, **kwargs):
+        self.requests.append(dict(headers or {}))
+        if (headers or {}).get("If-None-Match") == self.etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.content, {"ETag": self.etag})
+
+@pytest.fixture
+def store(tmp_path):
+    return FeedStateStore(str(tmp_path / "feed_state.json"))
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakeFeedServer(rss(("a", "Mon, 06 Jan 2025 10:00:00 GMT"), ("b", "Mon, 06 Jan 2025 11:00:00 GMT")))
+    monkeypatch.setattr(ingest, "http_get", server)
+    return server
+
+def fetch_articles(store, monkeypatch, failing=()):
+    """Run the feed and extract stages over FEED_URL, failing the downloads of the given links"""
+    def extract_article(url, source):
+        if url in failing:
+            return None
+        return {"title": url, "text": "text", "url": url, "source": source}
+
+    monkeypatch.setattr(ingest, "extract_article", extract_article)
+    return [art["link"] for art in ingest.iter_rss_articles(state_store=store, seen_urls=set(), feed_urls=[FEED_URL],
+                                                            extract_processes=0)]
+
+def test_not_modified_feed(store, server, monkeypatch):
+    assert sorted(fetch_articles(store, monkeypatch)) == ["https://news.example/a", "https://news.example/b"]
+    assert store.conditional_headers(FEED_URL) == {"If-None-Match": '"v1"'}
+
+    assert ingest.fetch_feed(FEED_URL, store) is None
+    assert server.requests[-1] == {"If-None-Match": '"v1"'}
+    stats = store.get_stats()
+    assert (stats["total_fetches"], stats["not_modified_responses"]) == (2, 1)
+
+def test_failed_download_is_retried(store, server, monkeypatch):
+    assert fetch_articles(store, monkeypatch, failing={"https://news.example/b"}) == ["https://news.example/a"]
+    # Neither the validators nor the watermark are stored, so the next poll sees entry b again
+    assert store.conditional_headers(FEED_URL) == {}
+    assert store.get(FEED_URL)["latest_entry_at"] is None
+    assert fetch_articles(store, monkeypatch) == ["https://news.example/b"]
+    assert store.conditional_headers(FEED_URL) == {"If-None-Match": '"v1"'}
+
+def test_watermark_skips_older_entries(store, server, monkeypatch):
+    fetch_articles(store, monkeypatch)
+    # A changed feed: one new entry, and an old one whose id was never seen (e.g. a changed guid)
+    server.etag, server.content = '"v2"', rss(("c", "Mon, 06 Jan 2025 12:00:00 GMT"),
+                                              ("a2", "Mon, 06 Jan 2025 09:00:00 GMT"))
+    assert fetch_articles(store, monkeypatch) == ["https://news.example/c"]
+
+def test_revised_entry_is_new_again(store):
+    published = (2025, 1, 6, 10, 0, 0, 0, 6, 0)
+    entry = {"id": "a", "link": "https://news.example/a", "published_parsed": published}
+    store.mark_seen(FEED_URL, entry)
+    assert store.new_entries(FEED_URL, [entry]) == []
+    revised = dict(entry, updated_parsed=(2025, 1, 6, 12, 0, 0, 0, 6, 0))
+    assert store.new_entries(FEED_URL, [revised]) == [revised]
+
+def test_state_is_saved(store, tmp_path):
+    store.commit(FEED_URL, etag='"v1"', last_modified="Mon, 06 Jan 2025 11:00:00 GMT")
+    assert store.save()
+    reloaded = FeedStateStore(str(tmp_path / "feed_state.json"))
+    assert reloaded.conditional_headers(FEED_URL) == {"If-None-Match": '"v1"',
+                                                      "If-Modified-Since": "Mon, 06 Jan 2025 11:00:00 GMT"}
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded concurrent fetcher and its per-host limit
+"""
+
+import sys
+import os
+import threading
+import time
+from collections import Counter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import fetcher
+from app.fetcher import fetch_concurrently, FetchStats
+
+class HostTracker:
+    """A worker that records how many calls run at once per host"""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.running = Counter()
+        self.peak = Counter()
+
+    def __call__(self, url):
+        host = fetcher.get_host(url)
+        with self.lock:
+            self.running[host] += 1
+            self.peak[host] = max(self.peak[host], self.running[host])
+        time.sleep(self.delay)
+        with self.lock:
+            self.running[host] -= 1
+        return url
+
+def urls(host, n):
+    return [f"https://{host}/article/{i}" for i in range(n)]
+
+def test_per_host_limit():
+    tracker = HostTracker()
+    items = urls("a.example", 10) + urls("b.example", 10)
+    stats = FetchStats()
+    results = dict(fetch_concurrently(items, tracker, max_workers=8, per_host_limit=2, stats=stats))
+    assert results == {url: url for url in items}
+    assert tracker.peak == {"a.example": 2, "b.example": 2}
+    assert (stats.submitted, stats.succeeded, stats.failed) == (20, 20, 0)
+    assert not fetcher._host_counts
+
+def test_per_host_limit_is_shared_between_runs():
+    tracker = HostTracker()
+    runs = [threading.Thread(target=lambda: list(fetch_concurrently(urls("a.example", 6), tracker, max_workers=4,
+                                                                    per_host_limit=2)))
+            for _ in range(3)]
+    for run in runs:
+        run.start()
+    for run in runs:
+        run.join()
+    assert tracker.peak["a.example"] == 2
+
+def test_failures_yield_none():
+    def worker(url):
+        if url.endswith("/1"):
+            raise IOError("connection reset")
+        return url if not url.endswith("/2") else None
+
+    stats = FetchStats()
+    results = dict(fetch_concurrently(urls("a.example", 4), worker, max_workers=2, stats=stats))
+    assert results["https://a.example/article/1"] is None
+    assert results["https://a.example/article/2"] is None
+    assert (stats.succeeded, stats.failed) == (2, 2)
+
+def test_early_close_counts_only_started_jobs():
+    stats = FetchStats()
+    items = urls("a.example", 15) + urls("b.example", 15)
+    fetches = fetch_concurrently(items, HostTracker(), max_workers=4, per_host_limit=2, stats=stats)
+    next(fetches)
+    fetches.close()
+    # Four in flight and one more submitted after the first finished
+    assert stats.submitted <= 5
+    assert stats.completed == 1
+    assert not fetcher._host_counts
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the crash-resumable ingestion journal
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.journal import IngestJournal, FETCHED, CHECKED, STORED, MAX_RESUME_ATTEMPTS
+
+def article(n):
+    return {"url": f"https://news.example/{n}", "title": f"Story {n}", "text": "text"}
+
+def test_resume_after_last_checkpoint(tmp_path):
+    journal = IngestJournal(str(tmp_path / "journal.db"))
+    journal.record(article(1), FETCHED, "dead-run")
+    journal.record(dict(article(2), misinfo_verdict="Real"), CHECKED, "dead-run")
+    journal.record(article(3), FETCHED, "dead-run")
+    journal.advance(["https://news.example/3"], STORED)
+    journal.release("dead-run")
+
+    resumed = journal.resume(10, "next-run")
+    assert [(stage, art["url"]) for stage, art in resumed] == [(FETCHED, "https://news.example/1"),
+                                                              (CHECKED, "https://news.example/2")]
+    assert resumed[1][1]["misinfo_verdict"] == "Real"
+    journal.prune()
+    assert journal.get_stats()["stages"][STORED] == 0
+
+def test_live_leases_are_not_resumed(tmp_path):
+    journal = IngestJournal(str(tmp_path / "journal.db"), lease_seconds=60)
+    journal.record(article(1), FETCHED, "live-run")
+    assert journal.resume(10, "other-run") == []
+    assert journal.leased_urls() == {"https://news.example/1"}
+
+    # The same journal file opened by a second process sees the lease too
+    assert IngestJournal(str(tmp_path / "journal.db")).resume(10, "other-process") == []
+
+def test_expired_leases_are_resumed(tmp_path):
+    journal = IngestJournal(str(tmp_path / "journal.db"), lease_seconds=0.2)
+    journal.record(article(1), FETCHED, "crashed-run")
+    journal.record(article(2), FETCHED, "live-run")
+    time.sleep(0.1)
+    journal.heartbeat("live-run")
+    time.sleep(0.15)
+    # Only the crashed run's lease ran out
+    assert [art["url"] for _, art in journal.resume(10, "next-run")] == ["https://news.example/1"]
+    assert journal.leased_urls() == {"https://news.example/1", "https://news.example/2"}
+
+def test_articles_are_dropped_after_max_attempts(tmp_path):
+    journal = IngestJournal(str(tmp_path / "journal.db"))
+    journal.record(article(1), FETCHED, "run-0")
+    journal.release("run-0")
+    for attempt in range(MAX_RESUME_ATTEMPTS):
+        assert len(journal.resume(10, f"run-{attempt + 1}")) == 1
+        journal.release(f"run-{attempt + 1}")
+    assert journal.resume(10, "last-run") == []
+    assert journal.get_stats()["unfinished"] == 0
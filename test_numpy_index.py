@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for the built-in NumPy vector index
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from retrieval.numpy_index import NumpyVectorIndex, INITIAL_CAPACITY
+
+DIM = 8
+
+def _unit_vectors(n, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def _upsert(index, vectors, start=0):
+    ids = [f"p{i}" for i in range(start, start + len(vectors))]
+    index.upsert(ids=ids, embeddings=vectors, documents=[f"passage {i}" for i in range(start, start + len(vectors))],
+                 metadatas=[{"url": f"https://example.com/{i}", "chunk_index": 0}
+                            for i in range(start, start + len(vectors))])
+    return ids
+
+def _nearest(index, vector):
+    return index.query(query_embeddings=[vector], n_results=1)["ids"][0][0]
+
+def test_numpy_index_upsert_query_delete(tmp_path):
+    index = NumpyVectorIndex(str(tmp_path / "index"))
+    vectors = _unit_vectors(20)
+    _upsert(index, vectors)
+    assert index.count() == 20
+    assert _nearest(index, vectors[7]) == "p7"
+
+    # Replacing a passage hides its old row
+    index.upsert(ids=["p7"], embeddings=[vectors[3]], documents=["replaced"],
+                 metadatas=[{"url": "https://example.com/7", "chunk_index": 0}])
+    assert index.count() == 20
+    assert index.get(ids=["p7"])["documents"] == ["replaced"]
+    assert index.query(query_embeddings=[vectors[3]], n_results=2)["ids"][0] == ["p3", "p7"]
+
+    assert index.delete(ids=["p1", "p2"]) == 2
+    assert index.delete(where={"url": "https://example.com/5"}) == 1
+    assert index.count() == 17
+    hits = index.get(where={"url": {"$in": ["https://example.com/1", "https://example.com/6"]}})
+    assert hits["ids"] == ["p6"]
+    assert "p1" not in index.query(query_embeddings=[vectors[1]], n_results=20)["ids"][0]
+
+def test_numpy_index_compact_shrinks_files(tmp_path):
+    directory = str(tmp_path / "index")
+    index = NumpyVectorIndex(directory, dtype="float32")
+    vectors = _unit_vectors(INITIAL_CAPACITY * 4)
+    ids = _upsert(index, vectors)
+    index.delete(ids=ids[100:])
+
+    assert index.compact() == INITIAL_CAPACITY * 4 - 100
+    assert os.path.getsize(os.path.join(directory, "vectors.bin")) == INITIAL_CAPACITY * DIM * 4
+    assert os.path.getsize(os.path.join(directory, "tombstones.bits")) == INITIAL_CAPACITY // 8
+    assert index.compact() == 0
+
+    reopened = NumpyVectorIndex(directory)
+    assert reopened.count() == 100
+    assert _nearest(reopened, vectors[42]) == "p42"
+    # The compacted index grows again
+    _upsert(reopened, _unit_vectors(INITIAL_CAPACITY, seed=1), start=INITIAL_CAPACITY * 4)
+    assert reopened.count() == 100 + INITIAL_CAPACITY
+    assert _nearest(reopened, vectors[99]) == "p99"
+
+def test_concurrent_writers_get_distinct_rows(tmp_path):
+    """A writer that allocated rows holds them until it commits, even against another connection"""
+    directory = str(tmp_path / "index")
+    first, second = NumpyVectorIndex(directory), NumpyVectorIndex(directory)
+    vectors = _unit_vectors(2)
+    allocated, errors = threading.Event(), []
+    ensure_capacity = first._ensure_capacity
+
+    def paused_ensure_capacity(rows, dim):
+        # Give the second writer time to run while the first one has picked its rows
+        allocated.set()
+        time.sleep(0.2)
+        return ensure_capacity(rows, dim)
+
+    def write_first():
+        try:
+            first.upsert(ids=["a"], embeddings=[vectors[0]], metadatas=[{"url": "https://example.com/a"}])
+        except Exception as e:
+            errors.append(e)
+
+    first._ensure_capacity = paused_ensure_capacity
+    writer = threading.Thread(target=write_first)
+    writer.start()
+    allocated.wait(timeout=5)
+    second.upsert(ids=["b"], embeddings=[vectors[1]], metadatas=[{"url": "https://example.com/b"}])
+    writer.join()
+
+    assert errors == []
+    assert second.count() == 2 and second.rows == 2
+    assert _nearest(second, vectors[0]) == "a"
+    assert _nearest(second, vectors[1]) == "b"
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Tests for the staged ingestion pipeline
+"""
+
+import sys
+import os
+import queue
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from app import ingest
+from app.pipeline import Stage, BatchStage, DONE, progress_reporter
+from app.journal import IngestJournal
+from app.dedup import NearDuplicateIndex
+from app.feed_state import FeedStateStore
+from app.seen_urls import SeenUrlIndex
+from app import extract
+from app.extract import ExtractionPool, ExtractionProfileCache
+from retrieval.fallback_store import FallbackStore
+from retrieval.bm25 import BM25Index
+
+def drain(output):
+    items = []
+    while True:
+        item = output.get(timeout=5)
+        if item is DONE:
+            return items
+        items.append(item)
+
+def test_stage_drops_and_errors():
+    dropped, failed = [], []
+
+    def fn(n):
+        if n == 3:
+            raise ValueError("bad item")
+        return n * 10 if n % 2 else None
+
+    stage = Stage("test", fn, workers=3, on_error=lambda item, e: failed.append(item), on_drop=dropped.append)
+    output = queue.Queue()
+    stage.start(output)
+    for n in range(6):
+        stage.input.put(n)
+    stage.input.put(DONE)
+    assert sorted(drain(output)) == [10, 50]
+    assert sorted(dropped) == [0, 2, 4]
+    assert failed == [3]
+    assert (stage.stats.count, stage.stats.errors) == (6, 1)
+
+def test_batch_stage_flushes_partial_batches():
+    stage = BatchStage("batch", list, batch_size=4, max_wait=0.05)
+    output = queue.Queue()
+    stage.start(output)
+    for n in range(6):
+        stage.input.put(n)
+    assert output.get(timeout=5) == [0, 1, 2, 3]
+    # The rest is flushed after max_wait without waiting for the end of input
+    assert output.get(timeout=5) == [4, 5]
+    stage.input.put(DONE)
+    assert output.get(timeout=5) is DONE
+
+def test_progress_reporter_accepts_both_callback_styles():
+    calls = []
+    progress_reporter(lambda current, total: calls.append((current, total)))(1, 2, {"feed": {}})
+    progress_reporter(lambda current, total, stage_timings=None: calls.append(stage_timings))(1, 2, {"feed": {}})
+    assert calls == [(1, 2), {"feed": {}}]
+
+@pytest.fixture
+def stores(tmp_path, monkeypatch):
+    """Point ingest_news at scratch stores, with a canned misinformation verdict"""
+    store = FallbackStore(str(tmp_path / "articles.db"), legacy_json=str(tmp_path / "articles.json"))
+    bm25 = BM25Index(str(tmp_path / "bm25.db"))
+    monkeypatch.setattr(ingest, "VECTOR_STORE_AVAILABLE", False)
+    monkeypatch.setattr(ingest, "get_fallback_store", lambda: store)
+    monkeypatch.setattr(ingest, "get_bm25_index", lambda: bm25)
+    monkeypatch.setattr(ingest, "_ingest_journal", IngestJournal(str(tmp_path / "journal.db")))
+    monkeypatch.setattr(ingest, "_feed_state_store", FeedStateStore(str(tmp_path / "feed_state.json")))
+    monkeypatch.setattr(ingest, "_near_duplicate_index", NearDuplicateIndex(str(tmp_path / "dedup.db")))
+    monkeypatch.setattr(ingest, "seen_url_index", SeenUrlIndex())
+    monkeypatch.setattr(ingest, "detect_misinformation", lambda text: ("Real", "test"))
+    return store
+
+@pytest.fixture
+def pipeline(stores, monkeypatch):
+    """Run ingest_news against scratch stores and a fake feed of 30 articles, counting the articles pulled"""
+    pulled = []
+
+    def iter_rss_articles(**kwargs):
+        for i in range(30):
+            pulled.append(i)
+            yield {"title": f"Story {i}", "text": f"Unique story number {i} " + f"word{i} " * 40,
+                   "url": f"https://news.example/{i}", "link": f"https://news.example/{i}", "source": "Example"}
+
+    monkeypatch.setattr(ingest, "iter_rss_articles", iter_rss_articles)
+    return stores, pulled
+
+def test_ingest_stops_at_max_articles(pipeline):
+    store, pulled = pipeline
+    assert ingest.ingest_news(max_articles=5, batch_size=2, resume=False) == 5
+    assert store.count() == 5
+    # Articles are only pulled for a free slot
+    assert len(pulled) == 5
+
+def test_ingest_nothing_requested(pipeline):
+    store, pulled = pipeline
+    result = {}
+    run = threading.Thread(target=lambda: result.setdefault("count", ingest.ingest_news(max_articles=0)), daemon=True)
+    run.start()
+    run.join(timeout=5)
+    assert result == {"count": 0}
+    assert pulled == []
+
+def test_failed_articles_free_their_slots(pipeline, monkeypatch, capsys):
+    store, pulled = pipeline
+    analyse = ingest.analyse_article
+
+    def analyse_article(art):
+        if art["url"].endswith(("/1", "/2")):
+            raise RuntimeError("analysis crashed")
+        return analyse(art)
+
+    monkeypatch.setattr(ingest, "analyse_article", analyse_article)
+    assert ingest.ingest_news(max_articles=5, batch_size=2, resume=False) == 5
+    assert len(pulled) == 7
+    assert "5 successful, 2 errors" in capsys.readouterr().out
+
+class FakeResponse:
+    def __init__(self, content):
+        self.status_code = 200
+        self.content = content
+        self.headers = {}
+
+    def raise_for_status(self):
+        pass
+
+def test_process_mode_reads_ahead_boundedly(stores, tmp_path, monkeypatch):
+    """Parsing in worker processes downloads at most max_articles plus the pool's read-ahead"""
+    feeds = [f"https://feeds.example/{n}.xml" for n in range(3)]
+    items = {feed: "".join(f"<item><title>Story {n}</title><link>https://news.example/{n}</link></item>"
+                           for n in range(10 * i, 10 * i + 10)) for i, feed in enumerate(feeds)}
+    downloads = []
+
+    def fetch_html(url):
+        downloads.append(url)
+        n = int(url.rsplit("/", 1)[1])
+        text = " ".join(f"story{n} word{n}x{i}" for i in range(100))
+        return f"<html><body><h1>Story {n}</h1><article><p>{text}</p></article></body></html>".encode()
+
+    monkeypatch.setattr(ingest, "http_get", lambda url, headers=None: FakeResponse(
+        f"<rss version='2.0'><channel><title>Example</title>{items[url]}</channel></rss>".encode()))
+    monkeypatch.setattr(ingest, "fetch_html", fetch_html)
+    monkeypatch.setattr(extract, "extraction_profiles", ExtractionProfileCache(str(tmp_path / "profiles.json")))
+    pool = ExtractionPool(processes=2, chunksize=2)
+    monkeypatch.setattr(ingest, "get_extraction_pool", lambda processes: pool)
+    try:
+        assert ingest.ingest_news(max_articles=5, feed_urls=feeds, extract_processes=2, fetch_workers=1,
+                                  resume=False) == 5
+    finally:
+        pool.shutdown()
+    # One more download may have been in flight when the run stopped
+    assert len(downloads) <= 5 + pool.read_ahead + 1
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Tests for the lazy resource registry
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.resources import ResourceRegistry, can_import
+
+def test_broken_package_counts_as_missing(tmp_path, monkeypatch):
+    package = tmp_path / "broken_embeddings"
+    package.mkdir()
+    (package / "__init__.py").write_text("raise ImportError('native library missing')\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    assert not can_import("broken_embeddings")
+    assert not can_import("no_such_package_here")
+    assert can_import("json")
+
+def test_resources_load_once():
+    loads = []
+    registry = ResourceRegistry()
+    registry.register("model", lambda: loads.append(1) or "model")
+    registry.register("broken", lambda: 1 / 0)
+    assert registry.get("model") == registry.get("model") == "model"
+    assert loads == [1]
+    assert registry.get("broken") is None
+    stats = registry.get_stats()
+    assert stats["model"]["available"] and not stats["broken"]["available"]
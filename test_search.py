@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for rank fusion and the keyword fallback of the search
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from retrieval import search
+from retrieval.search import reciprocal_rank_fusion, search_hits
+from retrieval.fallback_store import FallbackStore
+from retrieval.bm25 import BM25Index
+
+ARTICLE = {"url": "https://a.example/rain", "link": "https://a.example/rain", "title": "Heavy rain floods the city",
+           "text": "Rain fell all night and streets flooded.", "source": "A News"}
+
+def test_reciprocal_rank_fusion():
+    assert reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "a"]], k=60) == ["b", "a", "c"]
+    assert reciprocal_rank_fusion([["a"], ["b", "a"]]) == ["a", "b"]
+    assert reciprocal_rank_fusion([]) == []
+
+class BrokenCollection:
+    """A vector store whose every read fails"""
+
+    def query(self, **kwargs):
+        raise RuntimeError("vector store unavailable")
+
+    def get(self, **kwargs):
+        raise RuntimeError("vector store unavailable")
+
+class FakeModel:
+    def encode(self, text):
+        return np.zeros(8, dtype=np.float32)
+
+@pytest.fixture
+def broken_vector_store(tmp_path, monkeypatch):
+    store = FallbackStore(str(tmp_path / "articles.db"), legacy_json=str(tmp_path / "articles.json"))
+    store.upsert_many([ARTICLE])
+    bm25 = BM25Index(str(tmp_path / "bm25.db"))
+    bm25.add_many([ARTICLE])
+    monkeypatch.setattr(search, "VECTOR_STORE_AVAILABLE", True)
+    monkeypatch.setattr(search, "get_collection", lambda: BrokenCollection())
+    monkeypatch.setattr(search, "get_embedding_model", lambda: FakeModel())
+    monkeypatch.setattr(search, "get_fallback_store", lambda: store)
+    monkeypatch.setattr(search, "get_bm25_index", lambda: bm25)
+
+@pytest.mark.parametrize("mode", ["hybrid", "dense", "keyword"])
+def test_vector_store_error_falls_back_to_fallback_store(broken_vector_store, mode):
+    hits, timings = search_hits("rain flooded streets", top_k=3, mode=mode)
+    assert [meta["url"] for meta, _ in hits] == ["https://a.example/rain"]
+    assert "streets flooded" in hits[0][1]
+    assert timings["mode"] == "keyword"
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for URL canonicalization and the seen-URL index
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.urls import canonicalize_url
+from app.seen_urls import SeenUrlIndex
+
+def test_tracking_and_amp_variants_are_equal():
+    canonical = "https://example.com/world/story"
+    variants = [
+        "https://www.example.com/world/story/",
+        "HTTPS://Example.com:443/world/story#comments",
+        "https://example.com/world/story?utm_source=rss&utm_medium=feed",
+        "https://amp.example.com/amp/world/story",
+        "https://example.com/world/story.amp",
+        "https://example.com/world/story?fbclid=abc",
+    ]
+    for url in variants:
+        assert canonicalize_url(url) == canonical, url
+
+def test_content_params_are_kept_and_sorted():
+    assert canonicalize_url("https://example.com/a?page=2&id=7&utm_campaign=x") == "https://example.com/a?id=7&page=2"
+    assert canonicalize_url("https://example.com/a?id=7") != canonicalize_url("https://example.com/a?id=8")
+
+def test_non_urls_are_left_alone():
+    assert canonicalize_url("") == ""
+    assert canonicalize_url("not a url") == "not a url"
+
+def test_seen_url_index():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return ["https://www.example.com/stored/?utm_source=rss"]
+
+    index = SeenUrlIndex(loader=loader)
+    assert "https://example.com/stored" in index
+    assert "https://example.com/new" not in index
+    index.add("https://example.com/new?fbclid=x")
+    assert "https://amp.example.com/new" in index
+    assert len(loads) == 1
+
+    index.reset()
+    assert "https://example.com/new" not in index
+    assert len(loads) == 2
+    stats = index.get_stats()
+    assert (stats["lookups"], stats["hits"]) == (4, 2)
@@ -0,0 +1,47 @@
+import os
+import threading
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Keep-alive pool sizing; concurrent requests per host are capped by app.fetcher
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "32"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "8"))
+HTTP_TIMEOUT = 10
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Return the shared keep-alive session, creating it on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({'User-Agent': USER_AGENT})
+            _session = session
+        return _session
+
+@contextmanager
+def use_adapter(adapter):
+    """Route every request of the shared session through adapter (e.g. replay or recording) while in the block"""
+    session = get_session()
+    previous = list(session.adapters.items())
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    try:
+        yield adapter
+    finally:
+        session.adapters.clear()
+        for prefix, previous_adapter in previous:
+            session.mount(prefix, previous_adapter)
+
+def http_get(url, headers=None, timeout=HTTP_TIMEOUT):
+    """GET a URL through the shared keep-alive session"""
+    return get_session().get(url, headers=headers, timeout=timeout)
@@ -0,0 +1,159 @@
+"""
+Process-wide registry of heavy resources (embedding model, Gemini client).
+
+Each resource is loaded on first use, exactly once per process, no matter
+how many modules ask for it; warm_up() can preload them on a background
+thread so the first search does not pay the load time.
+"""
+
+import importlib.util
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+GEMINI_MODEL_NAME = "gemini-1.5-flash"
+
+def can_import(module):
+    """
+    Whether a module actually imports. A package that is present but broken
+    (e.g. a torch build that fails to load) counts as missing, so callers
+    fall back instead of failing on first use. Only the import is paid here;
+    models still load lazily.
+    """
+    try:
+        importlib.import_module(module)
+        return True
+    except Exception as e:
+        if not (isinstance(e, ModuleNotFoundError) and e.name == module):
+            logger.warning(f"{module} is installed but failed to import: {e}")
+        return False
+
+SENTENCE_TRANSFORMERS_AVAILABLE = can_import("sentence_transformers")
+
+class ResourceRegistry:
+    """Named lazily loaded singletons with load-time accounting"""
+
+    def __init__(self):
+        self._loaders = {}
+        self._resources = {}
+        self._stats = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._warm_up_thread = None
+
+    def register(self, name, loader):
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks[name] = threading.Lock()
+
+    def get(self, name):
+        """Return the named resource, loading it on first use (None if loading failed)"""
+        if name in self._resources:
+            return self._resources[name]
+        with self._locks[name]:
+            if name not in self._resources:
+                start = time.perf_counter()
+                error = None
+                try:
+                    resource = self._loaders[name]()
+                except Exception as e:
+                    logger.error(f"Loading {name} failed: {e}")
+                    resource, error = None, str(e)
+                self._stats[name] = {
+                    "load_seconds": round(time.perf_counter() - start, 3),
+                    "available": resource is not None,
+                    "error": error
+                }
+                self._resources[name] = resource
+                logger.info(f"Loaded {name} in {self._stats[name]['load_seconds']}s")
+            return self._resources[name]
+
+    def is_loaded(self, name):
+        return name in self._resources
+
+    def warm_up(self, names=None, background=True):
+        """Load resources ahead of first use, on a daemon thread unless background=False"""
+        names = list(names or self._loaders)
+
+        def load_all():
+            for name in names:
+                self.get(name)
+
+        if not background:
+            load_all()
+            return None
+        with self._lock:
+            if self._warm_up_thread is None or not self._warm_up_thread.is_alive():
+                self._warm_up_thread = threading.Thread(target=load_all, name="warm-up", daemon=True)
+                self._warm_up_thread.start()
+            return self._warm_up_thread
+
+    def get_stats(self):
+        """Get load state and load time of every registered resource"""
+        with self._lock:
+            names = list(self._loaders)
+        return {name: dict(self._stats.get(name, {"loaded": False}), loaded=name in self._resources)
+                for name in names}
+
+def load_embedding_model():
+    if not SENTENCE_TRANSFORMERS_AVAILABLE:
+        return None
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+def get_gemini_api_key():
+    """Gemini API key from the environment or Streamlit secrets"""
+    from dotenv import load_dotenv
+
+    # Load environment variables with explicit path
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    logger.info(f"API key from environment: {'Found' if api_key else 'Not found'}")
+
+    if not api_key:
+        try:
+            import streamlit as st
+            api_key = st.secrets.get("GEMINI_API_KEY")
+            logger.info(f"API key from Streamlit secrets: {'Found' if api_key else 'Not found'}")
+        except Exception as secrets_error:
+            logger.info(f"Could not access Streamlit secrets: {secrets_error}")
+
+    # Strip any whitespace
+    return api_key.strip() if api_key else None
+
+def load_gemini_model():
+    api_key = get_gemini_api_key()
+    if not api_key:
+        logger.warning("No Gemini API key found - using fallback methods only")
+        return None
+
+    import google.generativeai as genai
+
+    logger.info(f"Using API key (first 10 chars): {api_key[:10]}...")
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+    logger.info("Successfully configured Gemini API")
+    return model
+
+registry = ResourceRegistry()
+registry.register("embedding_model", load_embedding_model)
+registry.register("gemini", load_gemini_model)
+
+def get_embedding_model():
+    """The shared SentenceTransformer, or None when sentence-transformers is not installed"""
+    return registry.get("embedding_model")
+
+def get_gemini_model():
+    """The shared Gemini model, or None when no API key is configured"""
+    return registry.get("gemini")
+
+def warm_up(names=None, background=True):
+    return registry.warm_up(names, background)
+
+def get_resource_stats():
+    return registry.get_stats()
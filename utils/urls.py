@@ -0,0 +1,60 @@
+import re
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# Query parameters that only carry tracking / campaign information
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "ocid", "cmpid", "cmp", "ref", "ref_src", "referrer", "ito",
+    "at_medium", "at_campaign", "at_custom1", "at_custom2", "at_custom3", "at_custom4",
+    "ns_mchannel", "ns_source", "ns_campaign", "ns_linkname", "ns_fee",
+    "_ga", "_gl", "smid", "smtyp", "outputtype", "amp"
+}
+TRACKING_PREFIXES = ("utm_", "at_", "ns_", "pk_", "mtm_")
+
+AMP_SEGMENT = re.compile(r"/amp(?=/|$)")         # /amp/story, /story/amp
+AMP_SUFFIX = re.compile(r"\.amp(\.html?)?$")      # /story.amp, /story.amp.html
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize an article URL so that tracking and AMP variants compare equal.
+
+    Lowercases the scheme and host, drops "www."/"amp." host prefixes,
+    fragments, tracking query parameters and AMP path markers, sorts the
+    remaining query parameters and strips trailing slashes.
+    """
+    if not url:
+        return url
+
+    try:
+        parsed = urlparse(url.strip())
+    except Exception:
+        return url
+
+    if not parsed.netloc:
+        return url
+
+    host = parsed.netloc.lower()
+    for prefix in ("www.", "amp."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    scheme = parsed.scheme.lower()
+    default_port = {"http": ":80", "https": ":443"}.get(scheme)
+    if default_port and host.endswith(default_port):
+        host = host[:-len(default_port)]
+
+    path = parsed.path or "/"
+    path = AMP_SEGMENT.sub("", path)
+    path = AMP_SUFFIX.sub(lambda m: m.group(1) or "", path)
+    if len(path) > 1:
+        path = path.rstrip("/")
+    path = path or "/"
+
+    query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+             if not is_tracking_param(k)]
+    query.sort()
+
+    return urlunparse((scheme, host, path, "", urlencode(query), ""))